@@ -0,0 +1,80 @@
+"""
+Size and parse-time comparison of JSONL logs and .seg files (see src/log_segment.py).
+
+    python benchmarks/bench_log_segment.py [--days 30] [--rows 600] [--repeat 3]
+
+Writes synthetic days to a temporary directory, converts them and times reading
+the rows back and streaming them through the default aggregators.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log_analyzer import iter_log_entries, stream_log, default_aggregators
+from src.log_segment import convert_log, SEGMENT_SUFFIX
+from synthetic_logs import write_days, dates_from
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--rows', type=int, default=600, help='rows per day (600 = 10 hours at 1/min)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    jsonl_dir = tempfile.mkdtemp(prefix="bench_jsonl_")
+    seg_dir = tempfile.mkdtemp(prefix="bench_seg_")
+    try:
+        dates = dates_from("2025-01-01", args.days)
+        for directory in (jsonl_dir, seg_dir):
+            write_days(directory, dates, args.rows, seed=args.seed)
+        jsonl_bytes = seg_bytes = 0
+        for date_str in dates:
+            before, after = convert_log(date_str, seg_dir)
+            jsonl_bytes += before
+            seg_bytes += after
+
+        def read_rows(directory, suffix):
+            for date_str in dates:
+                for _ in iter_log_entries(os.path.join(directory, f"daily_log_{date_str}{suffix}")):
+                    pass
+
+        def report(directory):
+            aggregators = default_aggregators()
+            for _ in stream_log(dates, aggregators.values(), directory):
+                pass
+
+        results = [
+            ("size (bytes)", jsonl_bytes, seg_bytes),
+            ("read rows (s)", best_of(args.repeat, lambda: read_rows(jsonl_dir, ".jsonl")),
+             best_of(args.repeat, lambda: read_rows(seg_dir, SEGMENT_SUFFIX))),
+            ("stream_log + aggregators (s)", best_of(args.repeat, lambda: report(jsonl_dir)),
+             best_of(args.repeat, lambda: report(seg_dir))),
+        ]
+        print(f"{args.days} days x {args.rows} rows")
+        print(f"{'':<30}{'JSONL':>14}{'.seg':>14}{'ratio':>8}")
+        for name, a, b in results:
+            fmt = "{:>14,}" if isinstance(a, int) else "{:>14.3f}"
+            print(f"{name:<30}" + fmt.format(a) + fmt.format(b) + f"{b / a:>8.2f}")
+    finally:
+        shutil.rmtree(jsonl_dir)
+        shutil.rmtree(seg_dir)
+
+
+if __name__ == "__main__":
+    main()
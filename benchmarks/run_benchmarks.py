@@ -0,0 +1,198 @@
+"""
+Report-generation benchmarks on synthetic logs (see synthetic_logs.py).
+
+    python benchmarks/run_benchmarks.py [--scale 0.1] [--only day_1s,year] [--repeat 3]
+                                        [--output benchmarks/results/latest.json] [--baseline OLD.json]
+
+Each scale writes its logs to a fresh temporary directory, then times
+get_log_content, calculate_app_usage_stats and generate_prompt_parts for
+every day (the latter from a cold start and again resuming from its
+checkpoint) with the calendar stubbed out. Wall time is the best of --repeat
+runs; peak memory comes from a separate run under tracemalloc. Results
+(seconds, rows/s, MB/s, peak MB) are written as JSON, and with --baseline the
+ratio to an earlier results file is printed next to each number.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic_logs import write_days, dates_from, many_apps
+
+# name -> (days, rows per day, synthetic_rows options)
+SCALES = {
+    'typical': (1, 600, {}),                                    # 10 hours at one capture a minute
+    'day_1s': (1, 43200, {'interval': 1}),                      # one capture a second until midnight
+    'year': (365, 600, {}),
+    'many_apps': (1, 10000, {'interval': 5, 'apps': many_apps(1000), 'switch_rate': 0.9}),
+    'long_japanese': (1, 10000, {'interval': 5, 'japanese': True}),
+}
+FIRST_DATE = "2025-01-01"
+
+
+def _stub_calendar():
+    """
+    Installs a stand-in for src.calendar_utils so no credentials or network are
+    involved: every day has the same three meetings.
+    """
+    stub = types.ModuleType("src.calendar_utils")
+
+    def get_todays_event_items(target_date=None):
+        day = target_date.strftime("%Y-%m-%d")
+        return [{'summary': summary, 'start': {'dateTime': f"{day}T{start}:00"}, 'end': {'dateTime': f"{day}T{end}:00"}}
+                for summary, start, end in (("朝会", "09:00", "09:15"), ("設計レビュー", "13:00", "14:00"),
+                                            ("1on1", "16:30", "17:00"))]
+
+    def event_start_summary(event):
+        return event['start']['dateTime'], event.get('summary', 'No Title')
+
+    def event_interval(event):
+        start = datetime.datetime.fromisoformat(event['start']['dateTime'])
+        end = datetime.datetime.fromisoformat(event['end']['dateTime'])
+        return start, end, event.get('summary', 'No Title')
+
+    stub.get_todays_event_items = get_todays_event_items
+    stub.event_start_summary = event_start_summary
+    stub.event_interval = event_interval
+    sys.modules["src.calendar_utils"] = stub
+
+
+def _clear_derived(log_dir):
+    """Removes checkpoints and indexes so the next report run starts cold."""
+    for name in (".checkpoints", ".time_index"):
+        shutil.rmtree(os.path.join(log_dir, name), ignore_errors=True)
+
+
+def measure(fn, dates, repeat, setup=None):
+    """Best wall time of fn over all dates, and the peak traced memory (MB) of one more pass."""
+    def run():
+        for date_str in dates:
+            fn(date_str)
+
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak / 1e6
+
+
+def run_scale(name, scale, repeat, seed, report_generator):
+    days, rows_per_day, options = SCALES[name]
+    days = max(1, round(days * scale)) if days > 1 else 1
+    rows_per_day = max(1, round(rows_per_day * scale))
+    log_dir = report_generator.LOG_DIR
+    shutil.rmtree(log_dir, ignore_errors=True)
+    dates = dates_from(FIRST_DATE, days)
+    rows, size = write_days(log_dir, dates, rows_per_day, seed=seed, **options)
+
+    def prompt(date_str):
+        report_generator.generate_prompt_parts(date_str, calendar_timeout=5)
+
+    cases = {
+        'get_log_content': (report_generator.get_log_content, None),
+        'calculate_app_usage_stats': (report_generator.calculate_app_usage_stats, None),
+        'generate_prompt_parts': (prompt, lambda: _clear_derived(log_dir)),
+        'generate_prompt_parts (checkpointed)': (prompt, None),
+    }
+    results = {}
+    for case, (fn, setup) in cases.items():
+        seconds, peak_mb = measure(fn, dates, repeat, setup)
+        results[case] = {
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else None,
+            'mb_per_second': size / 1e6 / seconds if seconds else None,
+            'peak_mb': peak_mb,
+        }
+    return {'days': days, 'rows': rows, 'bytes': size, 'functions': results}
+
+
+def _ratio(current, baseline):
+    if not baseline or current is None or baseline.get('seconds') in (None, 0):
+        return ""
+    return f"{current['seconds'] / baseline['seconds']:>8.2f}x"
+
+
+def print_results(results, baseline=None):
+    header = f"{'':<40}{'seconds':>10}{'rows/s':>14}{'MB/s':>9}{'peak MB':>9}"
+    print(header + ("  vs base" if baseline else ""))
+    for name, scale in results['scales'].items():
+        print(f"{name}: {scale['days']} days, {scale['rows']:,} rows, {scale['bytes'] / 1e6:.1f} MB")
+        base = (baseline or {}).get('scales', {}).get(name, {}).get('functions', {})
+        for case, r in scale['functions'].items():
+            print(f"  {case:<38}{r['seconds']:>10.3f}{r['rows_per_second']:>14,.0f}"
+                  f"{r['mb_per_second']:>9.1f}{r['peak_mb']:>9.1f}{_ratio(r, base.get(case))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies rows per day (and the days of "year")')
+    parser.add_argument('--only', type=str, help=f'comma-separated subset of: {", ".join(SCALES)}')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', type=str, default=os.path.join(ROOT, "benchmarks", "results", "latest.json"))
+    parser.add_argument('--baseline', type=str, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SCALES)
+    unknown = [n for n in names if n not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale: {', '.join(unknown)}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.output)
+
+    # report_generator reads logs/ and templates/ relative to the working directory
+    _stub_calendar()
+    workdir = tempfile.mkdtemp(prefix="bench_reports_")
+    shutil.copytree(os.path.join(ROOT, "templates"), os.path.join(workdir, "templates"))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from src import report_generator
+        results = {
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'scales': {},
+        }
+        for name in names:
+            results['scales'][name] = run_scale(name, args.scale, args.repeat, args.seed, report_generator)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+
+    print_results(results, baseline)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nResults: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Synthetic daily_log_*.jsonl files for benchmarks.
+
+    python benchmarks/synthetic_logs.py OUT_DIR --days 30 --rows 600 [--interval 60] [--apps 8] [--japanese]
+
+Rows look like the ones main.py writes: a text_summary of up to 500 characters
+with a text_ref, the occasional unchanged frame and "continued" run records,
+in capture order. The same seed always produces the same files.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.log_analyzer import log_path
+from src.blob_store import text_hash
+
+APPS = ["Code", "Google Chrome", "Slack", "Terminal", "Zoom", "Notion", "Finder", "Microsoft Excel"]
+WORDS = ["def", "import", "return", "会議", "資料", "確認", "レビュー", "デプロイ", "エラー", "ModuleNotFoundError",
+         "pull request", "議事録", "スケジュール", "async", "await", "SELECT * FROM", "予算", "見積もり"]
+JAPANESE_PHRASES = ["本日の定例会議では", "来期の予算案について", "担当者から説明があり", "見積もりの再確認を行った。",
+                    "レビュー指摘事項の対応状況を", "スケジュールに反映し", "関係部署へ共有した。", "議事録を作成して",
+                    "次回までの宿題として", "デプロイ手順書を更新する。", "障害報告の一次回答を", "お客様へ送付済み。"]
+SUMMARY_CHARS = 500  # main.append_log cuts the summary here
+DAY_START = 8 * 3600
+
+
+def many_apps(n):
+    """n distinct app names, for the many-apps scale."""
+    return APPS[:n] if n <= len(APPS) else APPS + [f"App {i:04d}" for i in range(n - len(APPS))]
+
+
+def _clock(seconds):
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _text(rng, japanese):
+    if japanese:
+        text = ""
+        while len(text) < SUMMARY_CHARS:
+            text += rng.choice(JAPANESE_PHRASES)
+        return text
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120)))
+
+
+def synthetic_rows(rng, n, interval=60, apps=APPS, japanese=False, switch_rate=0.15, run_rate=0.1):
+    """
+    Yields up to n log rows (dicts) for one day, one capture every interval
+    seconds from 08:00, never past 23:59:59.
+    """
+    t = DAY_START
+    app = rng.choice(apps)
+    produced = 0
+    while produced < n and t < 86400:
+        if rng.random() < switch_rate:
+            app = rng.choice(apps)
+        text = _text(rng, japanese)
+        row = {'timestamp': _clock(t), 'app_name': app, 'text_summary': text[:SUMMARY_CHARS],
+               'text_ref': text_hash(text)}
+        if rng.random() < 0.05:
+            row['unchanged'] = True
+        yield row
+        produced += 1
+        t += interval
+        if produced < n and rng.random() < run_rate:
+            run = rng.randint(2, 20)
+            end = t + (run - 1) * interval
+            if end >= 86400:
+                return
+            yield {'timestamp': _clock(t), 'app_name': app, 'type': 'continued', 'end': _clock(end), 'count': run}
+            produced += 1
+            t = end + interval
+
+
+def dates_from(first, days):
+    first = datetime.date.fromisoformat(first)
+    return [(first + datetime.timedelta(days=i)).isoformat() for i in range(days)]
+
+
+def write_day(log_dir, date_str, rows):
+    """Writes rows as the day's JSONL log. Returns (row count, bytes written)."""
+    count = 0
+    with open(log_path(date_str, log_dir), "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+        return count, f.tell()
+
+
+def write_days(log_dir, dates, rows_per_day, seed=1, **options):
+    """Writes one synthetic log per date. Returns (total rows, total bytes). options go to synthetic_rows."""
+    os.makedirs(log_dir, exist_ok=True)
+    rng = random.Random(seed)
+    total_rows = total_bytes = 0
+    for date_str in dates:
+        rows, size = write_day(log_dir, date_str, synthetic_rows(rng, rows_per_day, **options))
+        total_rows += rows
+        total_bytes += size
+    return total_rows, total_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('out_dir')
+    parser.add_argument('--first', default="2025-01-01", help='first date (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--rows', type=int, default=600, help='rows per day (600 = 10 hours at 1/min)')
+    parser.add_argument('--interval', type=int, default=60, help='seconds between captures')
+    parser.add_argument('--apps', type=int, default=len(APPS), help='number of distinct apps')
+    parser.add_argument('--japanese', action='store_true', help='500-character Japanese summaries')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rows, size = write_days(args.out_dir, dates_from(args.first, args.days), args.rows, seed=args.seed,
+                            interval=args.interval, apps=many_apps(args.apps), japanese=args.japanese)
+    print(f"{args.days} days, {rows:,} rows, {size:,} bytes -> {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,175 @@
 import datetime
 import os
 import sys
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # Ensure src is in sys.path
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
-from src.report_generator import generate_prompt_parts
+from src.report_generator import generate_prompt_parts, generate_period_prompt_parts, prefetch_events, CALENDAR_TIMEOUT
+from src.log_analyzer import find_log
+from src.sessions import IDLE_THRESHOLD
+from src.time_index import normalize_time
+
+OUTPUT_DIR = "outputs"
+
+def parse_date(date_str):
+    """YYMMDD -> YYYY-MM-DD. Exits with a message on bad input."""
+    try:
+        return datetime.datetime.strptime(date_str, "%y%m%d").strftime("%Y-%m-%d")
+    except ValueError:
+        print("Error: Date must be in YYMMDD format (e.g., 251224 for 2025-12-24)")
+        sys.exit(1)
+
+def build_prompt_files(target_date_str, idle_threshold, budget, calendar_timeout, events, full_text=False):
+    """
+    Worker for batch mode: builds one day's prompt from already fetched calendar
+    events and writes the instructions and the log section to per-date files.
+    Returns (seconds, total characters, whether the day had a log file).
+    """
+    started = time.perf_counter()
+    instructions, logs = generate_prompt_parts(target_date_str, idle_threshold=idle_threshold, budget=budget,
+                                               calendar_timeout=calendar_timeout, events=events, full_text=full_text)
+    if not instructions:
+        raise RuntimeError("Prompt generation failed. Check if template exists.")
+    for name, text in (("daily_report_prompt", instructions), ("daily_report_logs", logs)):
+        with open(os.path.join(OUTPUT_DIR, f"{name}_{target_date_str}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+    return time.perf_counter() - started, len(instructions) + len(logs), find_log(target_date_str) is not None
+
+def run_batch(args):
+    """
+    Non-interactive --from/--to mode. Calendar events are fetched in this
+    process with one client (the API client cannot be shared with worker
+    processes), and each date is handed to the process pool as soon as its
+    events arrive, so calendar requests overlap with prompt building.
+    """
+    first = datetime.date.fromisoformat(parse_date(args.from_date))
+    last = datetime.date.fromisoformat(parse_date(args.to_date))
+    if last < first:
+        print("Error: --to must not be earlier than --from")
+        sys.exit(1)
+    dates = [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    print(f"{dates[0]} ~ {dates[-1]} ({len(dates)}日分) の日報プロンプトを一括生成しています...\n")
+    started = time.perf_counter()
+    calendar_seconds = {}
+    futures = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for date_str, events, seconds in prefetch_events(dates, timeout=args.calendar_timeout):
+            calendar_seconds[date_str] = seconds
+            futures[date_str] = pool.submit(build_prompt_files, date_str, args.idle_threshold, args.budget,
+                                            args.calendar_timeout, events, args.full_text)
+
+        print(f"{'日付':<10}  {'カレンダー':>8}  {'生成':>7}  {'文字数':>8}  備考")
+        failed = 0
+        for date_str in dates:
+            calendar = f"{calendar_seconds[date_str]:.2f}s" if calendar_seconds[date_str] is not None else "タイムアウト"
+            try:
+                seconds, chars, has_log = futures[date_str].result()
+            except Exception as e:
+                failed += 1
+                print(f"{date_str:<10}  {calendar:>8}  {'-':>7}  {'-':>8}  エラー: {e}")
+                continue
+            print(f"{date_str:<10}  {calendar:>8}  {seconds:>6.2f}s  {chars:>8}  {'' if has_log else 'ログなし'}")
+
+    print(f"\n合計 {time.perf_counter() - started:.2f}秒 (成功 {len(dates) - failed} / {len(dates)}日)")
+    print(f"出力先: {OUTPUT_DIR}/daily_report_prompt_<日付>.txt, {OUTPUT_DIR}/daily_report_logs_<日付>.txt")
+    if failed:
+        sys.exit(1)
 
 def main():
     parser = argparse.ArgumentParser(description='Generate daily report prompt and optionally submit to Perplexity.')
     parser.add_argument('--date', type=str, help='Target date in YYMMDD format (e.g., 241225). Defaults to today.', default=datetime.datetime.now().strftime("%y%m%d"))
+    parser.add_argument('--idle-threshold', type=int, default=IDLE_THRESHOLD, help=f'Gaps between captures longer than this many seconds are not counted as app usage (default: {IDLE_THRESHOLD}).')
+    parser.add_argument('--budget', type=int, help='Condense the work log to at most this many characters (e.g. 20000 for one Perplexity paste).')
+    parser.add_argument('--calendar-timeout', type=float, default=CALENDAR_TIMEOUT, help=f'Seconds to wait for Google Calendar before continuing without it (default: {CALENDAR_TIMEOUT}).')
+    parser.add_argument('--submitter', choices=['pyautogui', 'playwright'], default='pyautogui', help='How to drive Perplexity: screen coordinates (pyautogui) or browser automation (playwright).')
+    parser.add_argument('--from', dest='from_date', type=str, help='Batch mode: first date (YYMMDD). Writes one prompt per day without prompting.')
+    parser.add_argument('--to', dest='to_date', type=str, help='Batch mode: last date (YYMMDD), inclusive. Defaults to --from.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Batch mode: number of worker processes (default: CPU count).')
+    parser.add_argument('--since', type=str, help='Only report the part of the day from this time (HH:MM), e.g. 13:00.')
+    parser.add_argument('--until', type=str, help='Only report the part of the day before this time (HH:MM), e.g. 18:00.')
+    parser.add_argument('--period', choices=['week', 'month'], help='Build a weekly (Mon-Sun) or monthly report for the period containing --date, from per-day summaries.')
+    parser.add_argument('--full-text', action='store_true', help='Show the full OCR text of captures whose 500-character summary was cut (ignored with --budget).')
+    parser.add_argument('--no-live', action='store_true', help="Always read today's log from disk instead of asking the running main.py for its in-memory stats.")
     
     args = parser.parse_args()
-    input_date_str = args.date
-    
-    # 1. Parse YYMMDD -> Date Object
+    if args.to_date and not args.from_date:
+        parser.error("--to requires --from")
+    if args.from_date and args.period:
+        parser.error("--period cannot be combined with --from/--to")
+    if (args.since or args.until) and (args.from_date or args.period):
+        parser.error("--since/--until only apply to a single day's report")
     try:
-        target_date_obj = datetime.datetime.strptime(input_date_str, "%y%m%d")
-    except ValueError:
-        print("Error: Date must be in YYMMDD format (e.g., 251224 for 2025-12-24)")
-        sys.exit(1)
+        since = normalize_time(args.since) if args.since else None
+        until = normalize_time(args.until) if args.until else None
+    except ValueError as e:
+        parser.error(str(e))
+    if args.from_date:
+        args.to_date = args.to_date or args.from_date
+        run_batch(args)
+        return
 
-    # 2. Convert to YYYY-MM-DD string for internal use
-    target_date_str = target_date_obj.strftime("%Y-%m-%d")
+    # 1. Parse YYMMDD -> YYYY-MM-DD string for internal use
+    target_date_str = parse_date(args.date)
 
-    # 3. Generate Parts
-    print(f"{target_date_str} の日報プロンプトを生成しています...\n")
-    instructions, logs = generate_prompt_parts(target_date_str)
+    # 2. Generate Parts
+    if args.period:
+        print(f"{target_date_str} を含む{'週' if args.period == 'week' else '月'}のプロンプトを日別サマリーから生成しています...\n")
+        instructions, logs, first, last = generate_period_prompt_parts(
+            args.period, target_date_str, idle_threshold=args.idle_threshold, calendar_timeout=args.calendar_timeout)
+        prompt_name, report_name = "period_report_prompt.txt", f"{args.period}ly_report_{first}_{last}.md"
+        parts_titles = ("指示", "期間の集計データ")
+    else:
+        window = f" ({(since or '')[:5]}〜{(until or '')[:5]})" if since or until else ""
+        print(f"{target_date_str}{window} の日報プロンプトを生成しています...\n")
+        instructions, logs = generate_prompt_parts(target_date_str, idle_threshold=args.idle_threshold, budget=args.budget,
+                                                   calendar_timeout=args.calendar_timeout, since=since, until=until,
+                                                   live=not args.no_live, full_text=args.full_text)
+        prompt_name, report_name = "daily_report_prompt.txt", f"daily_report_{target_date_str}.md"
+        parts_titles = ("指示とカレンダー", "作業ログデータ (統計含む)")
     
     if not instructions:
         print("Error: Prompt generation failed. Check if template exists.")
         sys.exit(1)
     
     # Ensure outputs dir exists
-    OUTPUT_DIR = "outputs"
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    # 4. Save Instructions
-    output_file = os.path.join(OUTPUT_DIR, "daily_report_prompt.txt")
+    # 3. Save Instructions
+    output_file = os.path.join(OUTPUT_DIR, prompt_name)
     with open(output_file, "w", encoding="utf-8") as f:
         f.write(instructions)
         
     print(f"プロンプト（指示書のみ）を保存しました: {output_file}")
     
-    # 5. Handle submission
+    # 4. Handle submission
     print("\n--- 自動送信 ---")
     choice = input("Perplexityにブラウザ経由で自動送信しますか？ (y/n): ").strip().lower()
     
     if choice == 'y':
         print("ブラウザを操作しています...")
-        from src.perplexity_automator import submit_to_perplexity
-        
-        response = submit_to_perplexity({
-            "指示とカレンダー": instructions,
-            "作業ログデータ (統計含む)": logs
-        })
+        prompt_parts = {
+            parts_titles[0]: instructions,
+            parts_titles[1]: logs
+        }
+        if args.submitter == 'playwright':
+            from src.perplexity_common import select_search_mode
+            from src.perplexity_playwright import submit_with_playwright
+            response = submit_with_playwright(prompt_parts, search_mode=select_search_mode())
+        else:
+            from src.perplexity_automator import submit_to_perplexity
+            response = submit_to_perplexity(prompt_parts)
         
-        report_filename = os.path.join(OUTPUT_DIR, f"daily_report_{target_date_str}.md")
+        report_filename = os.path.join(OUTPUT_DIR, report_name)
         with open(report_filename, "w", encoding="utf-8") as f:
             f.write(response)
         
-        print(f"\n日報を保存しました: {report_filename}")
+        print(f"\nレポートを保存しました: {report_filename}")
     else:
         print("\n--- プロンプトのプレビュー ---\n")
         print(instructions[:500] + "\n...(省略)...")
@@ -3,30 +3,68 @@ import datetime
 import json
 import os
 import sys
+import argparse
 
 # Ensure src is in sys.path
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
-from src.ocr_utils import get_screen_text
-from src.app_utils import get_active_window_info
+from src.backends import get_backend, BACKENDS
+from src.capture_engine import CaptureEngine, SWITCH_SETTLE
+from src.tile_ocr import TileOCR
+from src.dedup import RunCollapser
+from src.blob_store import BlobStore
+from src.metrics import Metrics, NULL_METRICS, Histogram, SNAPSHOT_INTERVAL
+from src.adaptive_interval import AdaptivePacer, MIN_INTERVAL, MAX_INTERVAL
+from src.live_stats import LiveStats, serve_live_stats, LIVE_PORT
 
 LOG_DIR = "logs"
+CAPTURE_INTERVAL = 60   # seconds between captures, independent of OCR time
+OCR_WORKERS = 2
+MAX_PENDING_FRAMES = 4  # oldest frame is dropped beyond this backlog
+FRAME_HASH_MAX_DISTANCE = 3  # 64-bit dHash bits; frames this close reuse the previous OCR text
 
 def ensure_log_dir():
     if not os.path.exists(LOG_DIR):
         os.makedirs(LOG_DIR)
 
-def get_log_filename():
-    date_str = datetime.datetime.now().strftime("%Y-%m-%d")
+def get_log_filename(when=None):
+    when = when or datetime.datetime.now()
+    date_str = when.strftime("%Y-%m-%d")
     return os.path.join(LOG_DIR, f"daily_log_{date_str}.jsonl")
 
-def append_log(app_name, text):
-    filename = get_log_filename()
-    
-    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-    
-    # Simple deduplication or cleanup could be added here
-    # For now, we save everything as requested, but maybe truncate very long text
+_blob_stores = {}
+
+def get_blob_store(when):
+    """Returns the blob store holding full OCR texts for the day of `when`."""
+    date_str = when.strftime("%Y-%m-%d")
+    store = _blob_stores.get(date_str)
+    if store is None:
+        _blob_stores.clear()  # Only the current day is ever written
+        store = _blob_stores[date_str] = BlobStore(LOG_DIR, date_str)
+    return store
+
+_live_stats = None  # Today's in-memory aggregates, served to daily_report.py (see live_stats)
+
+def _write_row(log_entry, when):
+    """Appends one JSON row to the log of when's day and returns the number of bytes written."""
+    line = json.dumps(log_entry, ensure_ascii=False) + '\n'
+    with open(get_log_filename(when), 'a', encoding='utf-8') as f:
+        f.write(line)
+    if _live_stats is not None:
+        _live_stats.add(log_entry, when.strftime("%Y-%m-%d"))
+    return len(line.encode('utf-8'))
+
+def append_log(app_name, text, captured_at=None, unchanged=False, text_ref=None, interval=None):
+    """
+    Appends one log row and returns the number of bytes written.
+    interval: seconds until the next capture, recorded when it varies (adaptive capture).
+    """
+    captured_at = captured_at or datetime.datetime.now()
+
+    timestamp = captured_at.strftime("%H:%M:%S")
+
+    # Near-duplicates are collapsed by RunCollapser before reaching here
+    # The full text lives in the blob store (text_ref); the row keeps a short summary
     text_summary = text.replace("\n", " ")[:500] # Limit to 500 chars for summary column
 
     log_entry = {
@@ -34,34 +72,182 @@ def append_log(app_name, text):
         'app_name': app_name,
         'text_summary': text_summary
     }
+    if text_ref:
+        log_entry['text_ref'] = text_ref
+    if unchanged:
+        log_entry['unchanged'] = True
+    if interval is not None:
+        log_entry['interval'] = round(interval, 3)
+
+    written = _write_row(log_entry, captured_at)
 
-    with open(filename, 'a', encoding='utf-8') as f:
-        json.dump(log_entry, f, ensure_ascii=False)
-        f.write('\n')
-    
     print(f"[{timestamp}] Saved log for {app_name}")
+    return written
+
+def append_run(app_name, start, end, count, interval=None):
+    """
+    Appends a run-length record standing in for `count` near-duplicate captures
+    of app_name between start and end. Returns the number of bytes written.
+    interval: seconds until the capture after the run's last one, if adaptive.
+    """
+    log_entry = {
+        'timestamp': start.strftime("%H:%M:%S"),
+        'app_name': app_name,
+        'type': 'continued',
+        'end': end.strftime("%H:%M:%S"),
+        'count': count
+    }
+    if interval is not None:
+        log_entry['interval'] = round(interval, 3)
+
+    written = _write_row(log_entry, start)
+
+    print(f"[{log_entry['end']}] Collapsed {count} near-duplicate captures of {app_name}")
+    return written
+
+def append_app_switch(app_name, switched_at):
+    """Appends a row marking the moment app_name came to the front. Returns the number of bytes written."""
+    log_entry = {
+        'timestamp': switched_at.strftime("%H:%M:%S"),
+        'app_name': app_name,
+        'type': 'app_switch'
+    }
+
+    written = _write_row(log_entry, switched_at)
+
+    print(f"[{log_entry['timestamp']}] Switched to {app_name}")
+    return written
+
+class BenchmarkStats:
+    """End-to-end pipeline numbers printed after a --benchmark run, read from the run's metrics."""
+
+    def __init__(self, metrics):
+        self.started = time.monotonic()
+        self.metrics = metrics
+
+    def report(self, engine):
+        elapsed = time.monotonic() - self.started
+        snapshot = self.metrics.snapshot()
+        ocr = snapshot['stages'].get('ocr') or Histogram().summary()
+        counters = snapshot['counters']
+
+        print("\n--- Benchmark ---")
+        print(f"Elapsed: {elapsed:.2f}s")
+        print(f"Frames captured: {engine.captured} ({engine.captured / elapsed:.2f} frames/s)")
+        print(f"OCR runs: {ocr['count']}, skipped (unchanged): {engine.skipped}, dropped: {engine.dropped}")
+        print(f"OCR latency p50/p95/p99: {ocr['p50'] * 1000:.1f} / {ocr['p95'] * 1000:.1f} / {ocr['p99'] * 1000:.1f} ms")
+        print(f"Log entries: {counters.get('log_rows', 0)}, bytes written: {counters.get('bytes_written', 0)}")
+
+def main_loop(backend, interval=CAPTURE_INTERVAL, benchmark=False, metrics_path=None,
+              metrics_interval=SNAPSHOT_INTERVAL, pacer=None, app_events=True, settle=SWITCH_SETTLE,
+              live_port=LIVE_PORT, max_distance=FRAME_HASH_MAX_DISTANCE):
+    global _live_stats
 
-def main_loop():
     print("Starting Auto Daily Report Tool...")
     print("Press Ctrl+C to stop.")
     ensure_log_dir()
-    
+
+    # daily_report.py asks this process for today's stats instead of rescanning the log
+    server = None
+    if live_port is not None:
+        _live_stats = LiveStats(LOG_DIR)
+        _live_stats.load_day(datetime.datetime.now().strftime("%Y-%m-%d"))
+        try:
+            server = serve_live_stats(_live_stats, live_port)
+        except OSError as e:
+            print(f"Live stats server not started (port {live_port}): {e}")
+            _live_stats = None
+
+    # Stage timers cost nothing unless a metrics file or --benchmark asks for them
+    if metrics_path or benchmark:
+        metrics = Metrics(metrics_path, interval=metrics_interval)
+    else:
+        metrics = NULL_METRICS
+    stats = BenchmarkStats(metrics) if benchmark else None
+
+    active_app = metrics.timed('app', backend.apps.active_app)
+    grab_screen = metrics.timed('capture', backend.screen.capture)
+    log_capture = metrics.timed('write', append_log)
+
+    def capture_frame():
+        """Grab the active app and a raw frame; OCR happens later on the worker pool."""
+        return active_app(), grab_screen()
+
+    # Adaptive intervals of captures that may end up in a run, by capture time
+    run_intervals = {}
+
+    def write_run(app_name, start, end, count):
+        written = append_run(app_name, start, end, count, interval=run_intervals.get(end))
+        for captured_at in [t for t in run_intervals if t <= end]:
+            del run_intervals[captured_at]
+        metrics.incr('log_rows')
+        metrics.incr('bytes_written', written)
+
+    # Near-duplicates of the previous row are folded into "continued" records
+    collapser = RunCollapser(flush_fn=write_run)
+
+    def write_capture(capture, text):
+        if capture.unchanged:
+            metrics.incr('unchanged_frames')
+        if text.strip(): # Only log if there is text
+            if capture.interval is not None:
+                run_intervals[capture.captured_at] = capture.interval
+            if collapser.add(capture.captured_at, capture.app_name, text):
+                metrics.incr('collapsed_frames')
+                return
+            run_intervals.pop(capture.captured_at, None)
+            text_ref = get_blob_store(capture.captured_at).put(text)
+            written = log_capture(capture.app_name, text, captured_at=capture.captured_at,
+                                  unchanged=capture.unchanged, text_ref=text_ref, interval=capture.interval)
+            metrics.incr('log_rows')
+            metrics.incr('bytes_written', written)
+        else:
+            metrics.incr('empty_frames')
+            print(f"[{capture.captured_at.strftime('%H:%M:%S')}] No text detected in {capture.app_name}")
+
+    def write_switch(switch):
+        # A pending run belongs before the switch in the log, and nothing after it continues that run
+        collapser.reset()
+        written = append_app_switch(switch.app_name, switch.switched_at)
+        metrics.incr('app_switches')
+        metrics.incr('bytes_written', written)
+
+    # Only tiles that changed since a cached screen are sent to the recognizer
+    tile_ocr = TileOCR(backend.screen.thumbnail, backend.recognizer.recognize_regions)
+    ocr_fn = metrics.timed('ocr', tile_ocr.recognize)
+
+    engine = CaptureEngine(
+        capture_fn=capture_frame,
+        ocr_fn=ocr_fn,
+        write_fn=write_capture,
+        interval=interval,
+        workers=OCR_WORKERS,
+        max_pending=MAX_PENDING_FRAMES,
+        fingerprint_fn=metrics.timed('fingerprint', backend.screen.fingerprint),
+        max_distance=max_distance,
+        pacer=pacer,
+        switch_events=backend.apps.switch_events() if app_events else None,
+        switch_fn=write_switch,
+        settle=settle,
+    )
+    if metrics.enabled:
+        metrics.gauges_fn = lambda: {'frames_captured': engine.captured, 'frames_skipped': engine.skipped,
+                                     'frames_dropped': engine.dropped, 'ocr_backlog': len(engine.queue)}
+
     try:
-        while True:
-            # Capture data
-            app_name = get_active_window_info()
-            text = get_screen_text()
-            
-            # Log data
-            if text.strip(): # Only log if there is text
-                append_log(app_name, text)
-            else:
-                 print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] No text detected in {app_name}")
-
-            # Wait for 60 seconds
-            time.sleep(60)
-            
+        try:
+            engine.run()
+        finally:
+            collapser.flush()
+            metrics.write()
+            if server is not None:
+                server.shutdown()
+        if stats:
+            stats.report(engine)
+
     except KeyboardInterrupt:
+        if stats:
+            stats.report(engine)
         print("\nStopping tool.")
         sys.exit(0)
     except Exception as e:
@@ -69,5 +255,63 @@ def main_loop():
         # Optionally log the error to a file
         time.sleep(60) # Wait before retrying to avoid rapid failure loops
 
+def main():
+    global LOG_DIR
+
+    parser = argparse.ArgumentParser(description='Record screen text and the active app into daily logs.')
+    parser.add_argument('--backend', choices=BACKENDS, default='macos', help='Capture/OCR backend (default: macos).')
+    parser.add_argument('--replay-dir', type=str, help='Directory with recorded frames and frames.jsonl (replay backend).')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier; the capture interval is divided by it.')
+    parser.add_argument('--ocr-latency', type=float, help='Simulated OCR seconds for replayed frames without ocr_seconds.')
+    parser.add_argument('--loop', action='store_true', help='Restart the replay from the first frame when it ends.')
+    parser.add_argument('--log-dir', type=str, default=LOG_DIR, help=f'Log output directory (default: {LOG_DIR}).')
+    parser.add_argument('--benchmark', action='store_true', help='Print throughput, OCR latency and bytes written on exit.')
+    parser.add_argument('--metrics', type=str, metavar='PATH',
+                        help='Write per-stage latency percentiles and counters to PATH (Prometheus text if it ends in .prom, else JSON).')
+    parser.add_argument('--metrics-interval', type=float, default=SNAPSHOT_INTERVAL,
+                        help=f'Seconds between metrics file updates (default: {SNAPSHOT_INTERVAL}).')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Vary the capture interval with activity: back off while nothing changes or input is idle, tighten after app switches.')
+    parser.add_argument('--min-interval', type=float, default=MIN_INTERVAL, help=f'Shortest adaptive interval in seconds (default: {MIN_INTERVAL}).')
+    parser.add_argument('--max-interval', type=float, default=MAX_INTERVAL, help=f'Longest adaptive interval in seconds (default: {MAX_INTERVAL}).')
+    parser.add_argument('--max-load', type=float,
+                        help='Load average per CPU above which the adaptive interval is not shortened below the normal one.')
+    parser.add_argument('--no-app-events', action='store_true',
+                        help='Do not log app switches as they happen; only sample the active app at each capture.')
+    parser.add_argument('--switch-settle', type=float, default=SWITCH_SETTLE,
+                        help=f'Seconds a newly activated app must stay in front before it is captured (default: {SWITCH_SETTLE}).')
+    parser.add_argument('--frame-hash-distance', type=int, default=FRAME_HASH_MAX_DISTANCE,
+                        help=f'Largest dHash difference in bits (0-64) for a frame to reuse the previous OCR text; '
+                             f'also what the adaptive interval counts as a small change (default: {FRAME_HASH_MAX_DISTANCE}).')
+    parser.add_argument('--no-live-stats', action='store_true',
+                        help=f"Do not serve today's stats to daily_report.py on 127.0.0.1:{LIVE_PORT}.")
+    args = parser.parse_args()
+
+    LOG_DIR = args.log_dir
+    if not 0 <= args.frame_hash_distance <= 64:
+        parser.error('--frame-hash-distance must be between 0 and 64')
+    if args.backend == 'replay':
+        if not args.replay_dir:
+            parser.error('--replay-dir is required with --backend replay')
+        backend = get_backend('replay', frame_dir=args.replay_dir, loop=args.loop, ocr_latency=args.ocr_latency)
+    else:
+        backend = get_backend(args.backend)
+
+    pacer = None
+    if args.adaptive:
+        if not 0 < args.min_interval <= args.max_interval:
+            parser.error('--min-interval must be positive and not above --max-interval')
+        pacer = AdaptivePacer(base=CAPTURE_INTERVAL / args.speed,
+                              min_interval=args.min_interval / args.speed,
+                              max_interval=args.max_interval / args.speed,
+                              small_change=args.frame_hash_distance,
+                              max_load=args.max_load,
+                              idle_fn=backend.apps.idle_seconds)
+
+    main_loop(backend, interval=CAPTURE_INTERVAL / args.speed, benchmark=args.benchmark,
+              metrics_path=args.metrics, metrics_interval=args.metrics_interval, pacer=pacer,
+              app_events=not args.no_app_events, settle=args.switch_settle / args.speed,
+              live_port=None if args.no_live_stats else LIVE_PORT, max_distance=args.frame_hash_distance)
+
 if __name__ == "__main__":
-    main_loop()
+    main()
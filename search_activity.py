@@ -0,0 +1,59 @@
+import datetime
+import os
+import sys
+import argparse
+
+# Ensure src is in sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from src.activity_index import ActivityIndex, INDEX_PATH
+from src.log_analyzer import LOG_DIR
+
+def parse_date(date_str):
+    """YYMMDD -> YYYY-MM-DD. Exits with a message on bad input."""
+    try:
+        return datetime.datetime.strptime(date_str, "%y%m%d").strftime("%Y-%m-%d")
+    except ValueError:
+        print("Error: Date must be in YYMMDD format (e.g., 251224 for 2025-12-24)")
+        sys.exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over captured activity logs.')
+    parser.add_argument('--index-path', default=INDEX_PATH, help=f'SQLite index file (default: {INDEX_PATH}).')
+    parser.add_argument('--log-dir', default=LOG_DIR, help=f'Directory with daily_log_*.jsonl (default: {LOG_DIR}).')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('index', help='Index rows appended to the logs since the last run (safe to run after every capture or nightly).')
+
+    query = commands.add_parser('query', help='Search the index (new log rows are indexed first).')
+    query.add_argument('text', help='Search text. FTS5 syntax such as AND/OR/NOT and "phrases" is supported.')
+    query.add_argument('--from', dest='from_date', help='First date to search (YYMMDD).')
+    query.add_argument('--to', dest='to_date', help='Last date to search (YYMMDD), inclusive.')
+    query.add_argument('--app', help='Only rows captured in this app (exact name, e.g. "Code").')
+    query.add_argument('--limit', type=int, default=20, help='Maximum number of results (default: 20).')
+    query.add_argument('--no-update', action='store_true', help='Search the index as it is, without indexing new rows first.')
+
+    args = parser.parse_args()
+    index = ActivityIndex(args.index_path, args.log_dir)
+    try:
+        if args.command == 'index' or not args.no_update:
+            added = index.index_all()
+            if args.command == 'index':
+                for date_str, n in added.items():
+                    print(f"{date_str}: {n}件を追加")
+                print(f"インデックスを更新しました: {args.index_path} (追加 {sum(added.values())}件)")
+                return
+
+        since = parse_date(args.from_date) if args.from_date else None
+        until = parse_date(args.to_date) if args.to_date else None
+        results = index.search(args.text, since=since, until=until, app=args.app, limit=args.limit)
+        if not results:
+            print("該当する記録はありません。")
+            return
+        for r in results:
+            print(f"{r['date']} {r['timestamp']} | {r['app_name']} | {r['snippet']}")
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+SQLite FTS5 full-text index over captured activity.
+
+Rows of logs/daily_log_*.jsonl (date, time, app and the full OCR text from the
+blob store, or the 500-character summary for older rows) are loaded into
+cache/activity_index.db. Indexing is incremental per file: the byte offset
+reached in each log is stored next to the rows, so re-running only reads what
+was appended. A log that was truncated, replaced or rewritten (see
+log_checkpoint.tail_guard) has its rows dropped and is indexed again. Days
+converted to .seg files (see log_segment) are indexed as a whole and only
+again when the file's size or inode changes.
+
+Text is tokenized with the trigram tokenizer when SQLite has it, so Japanese
+text and parts of identifiers can be searched as substrings.
+"""
+import glob
+import os
+import re
+import sqlite3
+
+from src.blob_store import BlobStore
+from src.log_analyzer import LOG_DIR, find_log, iter_log_entries, iter_log_entries_from, prepare_entry
+from src.log_checkpoint import tail_guard
+from src.log_segment import SEGMENT_SUFFIX
+
+INDEX_PATH = os.path.join("cache", "activity_index.db")
+SNIPPET_TOKENS = 16
+SHORT_QUERY = 3     # trigrams cannot match shorter queries; those fall back to LIKE
+SNIPPET_CHARS = 40  # context on each side of a LIKE match
+
+_LOG_NAME = re.compile(r"daily_log_(\d{4}-\d{2}-\d{2})(?:\.jsonl|\.seg)$")
+
+
+def _filters(where, params, since, until, app):
+    """Adds the date range and app conditions shared by both search paths."""
+    if since:
+        where.append("date >= ?")
+        params.append(since)
+    if until:
+        where.append("date <= ?")
+        params.append(until)
+    if app:
+        where.append("app_name = ?")
+        params.append(app)
+    return where, params
+
+
+class ActivityIndex:
+    def __init__(self, path=INDEX_PATH, log_dir=LOG_DIR):
+        self.log_dir = log_dir
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self._create_schema()
+
+    def close(self):
+        self.db.close()
+
+    def _create_schema(self):
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (date TEXT PRIMARY KEY, inode INTEGER, offset INTEGER, guard TEXT)")
+        exists = self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'activity'").fetchone()
+        if not exists:
+            columns = "text, app_name UNINDEXED, date UNINDEXED, timestamp UNINDEXED"
+            try:
+                self.db.execute(f"CREATE VIRTUAL TABLE activity USING fts5({columns}, tokenize='trigram')")
+            except sqlite3.OperationalError:
+                # SQLite before 3.34 has no trigram tokenizer
+                self.db.execute(f"CREATE VIRTUAL TABLE activity USING fts5({columns})")
+        self.db.commit()
+
+    # --- indexing ---
+
+    def log_dates(self):
+        dates = set()
+        for filename in glob.glob(os.path.join(self.log_dir, "daily_log_*")):
+            match = _LOG_NAME.search(filename)
+            if match:
+                dates.add(match.group(1))
+        return sorted(dates)
+
+    def index_file(self, date_str):
+        """Indexes the rows appended to one day's log since the last call. Returns the number of rows added."""
+        filename = find_log(date_str, self.log_dir)
+        if filename is None:
+            return 0
+        st = os.stat(filename)
+        segment = filename.endswith(SEGMENT_SUFFIX)
+        row = self.db.execute("SELECT inode, offset, guard FROM files WHERE date = ?", (date_str,)).fetchone()
+        offset = 0
+        if row is not None:
+            inode, offset, guard = row
+            if segment:
+                # A .seg file is written in one go: unchanged size and inode means nothing new
+                offset = st.st_size if (inode, offset) == (st.st_ino, st.st_size) else 0
+            elif inode != st.st_ino or st.st_size < offset or guard != tail_guard(filename, offset):
+                offset = 0
+        if row is not None and offset == st.st_size:
+            return 0
+
+        if segment:
+            entries = ((entry, st.st_size) for entry in iter_log_entries(filename))
+        else:
+            entries = iter_log_entries_from(filename, offset)
+        blobs = BlobStore(self.log_dir, date_str)
+        rows = []
+        end = offset
+        for entry, end in entries:
+            if not prepare_entry(entry, date_str) or entry.get('type') in ('continued', 'app_switch'):
+                continue
+            text = (blobs.get(entry['text_ref']) if entry.get('text_ref') else None) or entry.get('text_summary', '')
+            if text:
+                rows.append((text, entry['app_name'], date_str, entry['timestamp']))
+
+        # Rows and the new offset are committed together, so an interrupted run is simply redone
+        with self.db:
+            if offset == 0:
+                self.db.execute("DELETE FROM activity WHERE date = ?", (date_str,))
+            self.db.executemany("INSERT INTO activity (text, app_name, date, timestamp) VALUES (?, ?, ?, ?)", rows)
+            self.db.execute("INSERT OR REPLACE INTO files (date, inode, offset, guard) VALUES (?, ?, ?, ?)",
+                            (date_str, st.st_ino, st.st_size if segment else end,
+                             None if segment else tail_guard(filename, end)))
+        return len(rows)
+
+    def index_all(self):
+        """Indexes every log file. Returns {date: rows added} for the files that had new rows."""
+        added = {}
+        for date_str in self.log_dates():
+            n = self.index_file(date_str)
+            if n:
+                added[date_str] = n
+        return added
+
+    # --- search ---
+
+    def search(self, query, since=None, until=None, app=None, limit=20):
+        """
+        Returns the best matches as dicts with date, timestamp, app_name and a
+        snippet with the hits in [brackets], best first. since/until are
+        inclusive YYYY-MM-DD dates; app matches the app name exactly.
+        query uses FTS5 syntax; input that is not valid FTS5 is searched as a phrase.
+        """
+        if len(query.strip()) < SHORT_QUERY:
+            return self._search_short(query.strip(), since, until, app, limit)
+        where, params = _filters(["activity MATCH ?"], [query], since, until, app)
+        sql = (f"SELECT date, timestamp, app_name, snippet(activity, 0, '[', ']', '…', {SNIPPET_TOKENS}) "
+               f"FROM activity WHERE {' AND '.join(where)} ORDER BY bm25(activity), date DESC, timestamp DESC LIMIT ?")
+        try:
+            rows = self.db.execute(sql, params + [limit]).fetchall()
+        except sqlite3.OperationalError:
+            params[0] = '"' + query.replace('"', '""') + '"'
+            rows = self.db.execute(sql, params + [limit]).fetchall()
+        return [{'date': d, 'timestamp': t, 'app_name': a, 'snippet': s} for d, t, a, s in rows]
+
+    def _search_short(self, query, since, until, app, limit):
+        """Substring scan for one- and two-character queries (e.g. 会議), newest first."""
+        pattern = "%" + re.sub(r"([%_\\])", r"\\\1", query) + "%"
+        where, params = _filters(["text LIKE ? ESCAPE '\\'"], [pattern], since, until, app)
+        rows = self.db.execute(
+            f"SELECT date, timestamp, app_name, text FROM activity WHERE {' AND '.join(where)} "
+            "ORDER BY date DESC, timestamp DESC LIMIT ?", params + [limit]).fetchall()
+        results = []
+        for d, t, a, text in rows:
+            i = text.find(query)
+            snippet = text[max(0, i - SNIPPET_CHARS):i] + f"[{query}]" + text[i + len(query):i + len(query) + SNIPPET_CHARS]
+            results.append({'date': d, 'timestamp': t, 'app_name': a, 'snippet': " ".join(snippet.split())})
+        return results
@@ -0,0 +1,103 @@
+"""
+Activity-adaptive capture interval.
+
+After every capture the scheduler asks AdaptivePacer how long to wait before
+the next one:
+
+- the foreground app changed, or the screen changed a lot (perceptual hash
+  distance of at least big_change bits): the minimum interval, so a burst of
+  context switches is sampled closely;
+- the screen and app are unchanged, or there has been no keyboard or mouse
+  input for idle_after seconds: the interval is multiplied by `backoff`, up
+  to the maximum;
+- anything else (ordinary activity): the interval relaxes back to `base`,
+  growing step by step after a switch or dropping straight back after a
+  backoff.
+
+While the 1-minute load average per CPU is above max_load, the interval is
+never shorter than base, so a busy machine is not sampled more often.
+The interval chosen after a capture is what that capture's log row covers;
+it is recorded in the row (see sessions.SessionAggregator).
+"""
+import os
+
+from src.frame_hash import hamming_distance
+
+MIN_INTERVAL = 10     # seconds
+MAX_INTERVAL = 300
+BACKOFF = 2.0
+BIG_CHANGE = 16       # of 64 dHash bits
+IDLE_AFTER = 120      # seconds without keyboard or mouse input
+
+
+def system_load():
+    """1-minute load average per CPU, or None where the OS does not report it."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AdaptivePacer:
+    """
+    idle_fn() -> seconds since the last user input (or None if unknown) and
+    load_fn() -> load per CPU (or None) are optional. small_change is the
+    hash distance still treated as an unchanged screen.
+    """
+
+    def __init__(self, base=60, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, backoff=BACKOFF,
+                 small_change=0, big_change=BIG_CHANGE, idle_after=IDLE_AFTER, max_load=None,
+                 idle_fn=None, load_fn=system_load):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("need 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.base = min(max(base, min_interval), max_interval)
+        self.backoff = backoff
+        self.small_change = small_change
+        self.big_change = big_change
+        self.idle_after = idle_after
+        self.max_load = max_load
+        self.idle_fn = idle_fn
+        self.load_fn = load_fn
+        self.interval = self.base
+        self._last = None  # (app_name, fingerprint) of the previous capture
+
+    def next_interval(self, app_name, fingerprint=None):
+        """Records a capture and returns the seconds to wait before the next one."""
+        last, self._last = self._last, (app_name, fingerprint)
+        distance = None
+        if last is not None and fingerprint is not None and last[1] is not None:
+            distance = hamming_distance(fingerprint, last[1])
+
+        if last is None:
+            interval = self.base
+        elif app_name != last[0] or (distance is not None and distance >= self.big_change):
+            interval = self.min_interval
+        elif self._is_idle() or (distance is not None and distance <= self.small_change):
+            interval = self.interval * self.backoff
+        elif self.interval < self.base:
+            interval = min(self.interval * self.backoff, self.base)
+        else:
+            interval = self.base
+
+        if self.max_load is not None and self._load_above_ceiling():
+            interval = max(interval, self.base)
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+        return self.interval
+
+    def _is_idle(self):
+        if self.idle_fn is None:
+            return False
+        try:
+            idle = self.idle_fn()
+        except Exception:
+            return False
+        return idle is not None and idle >= self.idle_after
+
+    def _load_above_ceiling(self):
+        try:
+            load = self.load_fn()
+        except Exception:
+            return False
+        return load is not None and load > self.max_load
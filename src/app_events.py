@@ -0,0 +1,86 @@
+"""
+Foreground-app change notifications.
+
+An app switch source calls callback(app_name) whenever another application
+comes to the front. Callbacks are delivered on the thread that calls
+pump(timeout), which the capture engine does while it waits for the next
+capture, so no locking is needed on its side. On macOS the source observes
+NSWorkspaceDidActivateApplicationNotification and pump() runs the main run
+loop; FakeAppSwitchSource lets tests inject switches.
+"""
+import threading
+import time
+from collections import deque
+
+
+class AppSwitchSource:
+    def start(self, callback):
+        """Begins delivering switches to callback(app_name) from pump()."""
+        self.callback = callback
+
+    def stop(self):
+        pass
+
+    def pump(self, timeout):
+        """Delivers pending switches, waiting up to timeout seconds for one."""
+        raise NotImplementedError
+
+
+class FakeAppSwitchSource(AppSwitchSource):
+    """Switches are injected with switch(app_name), from any thread."""
+
+    def __init__(self):
+        self.callback = None
+        self._pending = deque()
+        self._cond = threading.Condition()
+
+    def switch(self, app_name):
+        with self._cond:
+            self._pending.append(app_name)
+            self._cond.notify_all()
+
+    def pump(self, timeout):
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            pending = list(self._pending)
+            self._pending.clear()
+        for app_name in pending:
+            if self.callback is not None:
+                self.callback(app_name)
+
+
+class WorkspaceAppSwitchSource(AppSwitchSource):
+    """NSWorkspace did-activate notifications (macOS). Must be pumped on the main thread."""
+
+    def __init__(self):
+        self.callback = None
+        self._observer = None
+
+    def start(self, callback):
+        from AppKit import (NSWorkspace, NSWorkspaceDidActivateApplicationNotification,
+                            NSWorkspaceApplicationKey)
+        self.callback = callback
+
+        def on_activate(notification):
+            app = notification.userInfo()[NSWorkspaceApplicationKey]
+            self.callback(app.localizedName() or "Unknown")
+
+        center = NSWorkspace.sharedWorkspace().notificationCenter()
+        self._observer = center.addObserverForName_object_queue_usingBlock_(
+            NSWorkspaceDidActivateApplicationNotification, None, None, on_activate)
+
+    def stop(self):
+        if self._observer is not None:
+            from AppKit import NSWorkspace
+            NSWorkspace.sharedWorkspace().notificationCenter().removeObserver_(self._observer)
+            self._observer = None
+
+    def pump(self, timeout):
+        from Foundation import NSRunLoop, NSDate, NSDefaultRunLoopMode
+        deadline = time.monotonic() + timeout
+        handled = NSRunLoop.currentRunLoop().runMode_beforeDate_(
+            NSDefaultRunLoopMode, NSDate.dateWithTimeIntervalSinceNow_(timeout))
+        if not handled:
+            # No run loop sources yet: returns at once, so wait out the slice
+            time.sleep(max(0.0, deadline - time.monotonic()))
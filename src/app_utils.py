@@ -1,3 +1,4 @@
+import Quartz
 from AppKit import NSWorkspace
 
 def get_active_window_info():
@@ -10,3 +11,10 @@ def get_active_window_info():
     if active_app:
         return active_app.localizedName()
     return "Unknown"
+
+def get_idle_seconds():
+    """
+    Returns the seconds since the last keyboard, mouse or trackpad input.
+    """
+    return Quartz.CGEventSourceSecondsSinceLastEventType(
+        Quartz.kCGEventSourceStateCombinedSessionState, Quartz.kCGAnyInputEventType)
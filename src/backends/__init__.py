@@ -0,0 +1,25 @@
+"""
+Capture/OCR backends.
+
+A backend bundles the three platform-specific pieces the capture loop needs:
+a screen source, a text recognizer and an active-app source. The macOS backend
+wraps Quartz/Vision/AppKit; the replay backend streams recorded frames so the
+pipeline can be profiled on any machine.
+"""
+from src.backends.base import Backend, ScreenSource, TextRecognizer, AppSource
+
+BACKENDS = ("macos", "replay")
+
+
+def get_backend(name, **options):
+    """
+    Returns a Backend by name. Platform modules are imported lazily so the
+    replay backend works where pyobjc is not installed.
+    """
+    if name == "macos":
+        from src.backends.macos import create_backend
+    elif name == "replay":
+        from src.backends.replay import create_backend
+    else:
+        raise ValueError(f"Unknown backend: {name} (choose from {', '.join(BACKENDS)})")
+    return create_backend(**options)
@@ -0,0 +1,56 @@
+"""
+Backend interfaces. Frames are opaque objects owned by the backend; only the
+backend that produced a frame knows how to read pixels or text from it.
+"""
+from src.frame_hash import dhash, HASH_WIDTH, HASH_HEIGHT
+
+
+class ScreenSource:
+    def capture(self):
+        """Returns a frame, or None if nothing could be captured. Raises StopIteration when exhausted."""
+        raise NotImplementedError
+
+    def thumbnail(self, frame, width, height):
+        """Returns the frame as row-major 8-bit grayscale bytes of width x height."""
+        raise NotImplementedError
+
+    def fingerprint(self, frame):
+        """64-bit perceptual hash of the frame, or None if there is no frame."""
+        if frame is None:
+            return None
+        return dhash(self.thumbnail(frame, HASH_WIDTH + 1, HASH_HEIGHT))
+
+
+class TextRecognizer:
+    def recognize(self, frame):
+        """Returns all text in the frame, one line per recognized string."""
+        raise NotImplementedError
+
+    def recognize_regions(self, frame, rects):
+        """
+        Recognizes text inside the given (x, y, width, height) rects, normalized
+        with a top-left origin. Returns a list of (text, rect) in frame coordinates.
+        """
+        raise NotImplementedError
+
+
+class AppSource:
+    def active_app(self):
+        """Returns the name of the foreground application."""
+        raise NotImplementedError
+
+    def idle_seconds(self):
+        """Seconds since the last keyboard or mouse input, or None if unknown."""
+        return None
+
+    def switch_events(self):
+        """An app switch source (see app_events) for this platform, or None to rely on polling."""
+        return None
+
+
+class Backend:
+    def __init__(self, name, screen, recognizer, apps):
+        self.name = name
+        self.screen = screen
+        self.recognizer = recognizer
+        self.apps = apps
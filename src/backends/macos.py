@@ -0,0 +1,40 @@
+"""
+macOS backend: Quartz screen capture, Vision OCR and AppKit's frontmost app.
+"""
+from src.backends.base import Backend, ScreenSource, TextRecognizer, AppSource
+from src import ocr_utils, app_utils
+from src.app_events import WorkspaceAppSwitchSource
+
+
+class QuartzScreenSource(ScreenSource):
+    def capture(self):
+        return ocr_utils.capture_screen_to_image()
+
+    def thumbnail(self, frame, width, height):
+        return ocr_utils.capture_thumbnail(frame, width, height)
+
+    def fingerprint(self, frame):
+        return ocr_utils.frame_fingerprint(frame)
+
+
+class VisionTextRecognizer(TextRecognizer):
+    def recognize(self, frame):
+        return ocr_utils.recognize_text(frame)
+
+    def recognize_regions(self, frame, rects):
+        return ocr_utils.recognize_text_regions(frame, rects)
+
+
+class AppKitAppSource(AppSource):
+    def active_app(self):
+        return app_utils.get_active_window_info()
+
+    def idle_seconds(self):
+        return app_utils.get_idle_seconds()
+
+    def switch_events(self):
+        return WorkspaceAppSwitchSource()
+
+
+def create_backend():
+    return Backend("macos", QuartzScreenSource(), VisionTextRecognizer(), AppKitAppSource())
@@ -0,0 +1,96 @@
+"""
+Minimal PNG reader for replayed frames (8-bit, non-interlaced, no palette).
+Pure Python so the replay backend has no image-library dependency; record
+frames at a reduced resolution if decode time matters.
+"""
+import struct
+import zlib
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}  # gray, RGB, gray+alpha, RGBA
+
+
+def read_png(path):
+    """Returns (width, height, channels, pixels) with pixels as row-major bytes."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"Not a PNG file: {path}")
+
+    header = None
+    chunks = []
+    pos = 8
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if chunk_type == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+        elif chunk_type == b"IDAT":
+            chunks.append(body)
+        elif chunk_type == b"IEND":
+            break
+
+    if header is None:
+        raise ValueError(f"PNG has no IHDR chunk: {path}")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or interlace or color_type not in CHANNELS:
+        raise ValueError(f"Unsupported PNG format (depth={depth}, color={color_type}, interlace={interlace}): {path}")
+
+    channels = CHANNELS[color_type]
+    stride = width * channels
+    raw = zlib.decompress(b"".join(chunks))
+    pixels = bytearray(height * stride)
+    prev = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        _unfilter(raw[start], line, prev, channels)
+        pixels[y * stride:(y + 1) * stride] = line
+        prev = line
+    return width, height, channels, bytes(pixels)
+
+
+def _unfilter(filter_type, line, prev, bpp):
+    n = len(line)
+    if filter_type == 0:
+        return
+    if filter_type == 1:
+        for i in range(bpp, n):
+            line[i] = (line[i] + line[i - bpp]) & 0xFF
+    elif filter_type == 2:
+        line[:] = bytes((a + b) & 0xFF for a, b in zip(line, prev))
+    elif filter_type == 3:
+        for i in range(n):
+            left = line[i - bpp] if i >= bpp else 0
+            line[i] = (line[i] + ((left + prev[i]) >> 1)) & 0xFF
+    elif filter_type == 4:
+        for i in range(n):
+            a = line[i - bpp] if i >= bpp else 0
+            b = prev[i]
+            c = prev[i - bpp] if i >= bpp else 0
+            p = a + b - c
+            pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+            if pa <= pb and pa <= pc:
+                predictor = a
+            elif pb <= pc:
+                predictor = b
+            else:
+                predictor = c
+            line[i] = (line[i] + predictor) & 0xFF
+    else:
+        raise ValueError(f"Unknown PNG filter type: {filter_type}")
+
+
+def gray_thumbnail(width, height, channels, pixels, out_width, out_height):
+    """Nearest-neighbour downsample to row-major 8-bit grayscale."""
+    out = bytearray(out_width * out_height)
+    for ty in range(out_height):
+        row = (ty * height // out_height) * width
+        for tx in range(out_width):
+            i = (row + tx * width // out_width) * channels
+            if channels >= 3:
+                out[ty * out_width + tx] = (pixels[i] * 299 + pixels[i + 1] * 587 + pixels[i + 2] * 114) // 1000
+            else:
+                out[ty * out_width + tx] = pixels[i]
+    return bytes(out)
@@ -0,0 +1,129 @@
+"""
+Replay backend: streams a directory of recorded frames instead of the live screen.
+
+The directory holds PNG frames and a frames.jsonl manifest, one line per frame:
+
+    {"file": "000001.png", "app_name": "Slack", "text": "...",
+     "lines": [["text", [x, y, w, h]], ...], "ocr_seconds": 1.8, "idle_seconds": 0}
+
+"text" is what the recognizer returns for the frame. "lines" (optional) gives
+positioned lines for region-of-interest OCR; without it the whole text is
+treated as one line covering the frame. "ocr_seconds" (optional) is the
+recorded OCR latency, replayed as a sleep so benchmarks see realistic load.
+"idle_seconds" (optional) is the time since the last user input when the
+frame was recorded, for the adaptive capture interval.
+"""
+import json
+import os
+import threading
+import time
+
+from src.backends.base import Backend, ScreenSource, TextRecognizer, AppSource
+from src.backends.png import read_png, gray_thumbnail
+
+MANIFEST_NAME = "frames.jsonl"
+FULL_FRAME = (0.0, 0.0, 1.0, 1.0)
+
+
+class ReplayFrame:
+    def __init__(self, index, path, record):
+        self.index = index
+        self.path = path
+        self.record = record
+
+
+class ReplayScreenSource(ScreenSource):
+    def __init__(self, frame_dir, records, loop=False):
+        self.frame_dir = frame_dir
+        self.records = records
+        self.loop = loop
+        self.position = 0
+        self.last_record = None  # record of the frame captured last
+        self._decoded = (None, None)  # (path, (width, height, channels, pixels)) of the last frame read
+        self._lock = threading.Lock()
+
+    def peek(self):
+        """The record that the next capture() will return, or None at the end."""
+        if self.position >= len(self.records):
+            if not self.loop or not self.records:
+                return None
+            self.position = 0
+        return self.records[self.position]
+
+    def capture(self):
+        record = self.peek()
+        if record is None:
+            raise StopIteration
+        frame = ReplayFrame(self.position, os.path.join(self.frame_dir, record["file"]), record)
+        self.position += 1
+        self.last_record = record
+        return frame
+
+    def thumbnail(self, frame, width, height):
+        with self._lock:
+            path, decoded = self._decoded
+            if path != frame.path:
+                decoded = read_png(frame.path)
+                self._decoded = (frame.path, decoded)
+        return gray_thumbnail(*decoded, width, height)
+
+
+class ReplayTextRecognizer(TextRecognizer):
+    def __init__(self, ocr_latency=None):
+        self.ocr_latency = ocr_latency
+
+    def _simulate_latency(self, frame, share=1.0):
+        latency = frame.record.get("ocr_seconds", self.ocr_latency)
+        if latency:
+            time.sleep(latency * share)
+
+    def recognize(self, frame):
+        if frame is None:
+            return ""
+        self._simulate_latency(frame)
+        return frame.record.get("text", "")
+
+    def recognize_regions(self, frame, rects):
+        if frame is None or not rects:
+            return []
+        self._simulate_latency(frame, share=min(1.0, sum(w * h for _, _, w, h in rects)))
+        lines = frame.record.get("lines")
+        if lines is None:
+            lines = [(frame.record.get("text", ""), FULL_FRAME)]
+        return [(text, tuple(rect)) for text, rect in lines if _center_in_any(rect, rects)]
+
+
+class ReplayAppSource(AppSource):
+    def __init__(self, screen):
+        self.screen = screen
+
+    def active_app(self):
+        record = self.screen.peek()
+        return record.get("app_name", "Unknown") if record else "Unknown"
+
+    def idle_seconds(self):
+        record = self.screen.last_record
+        return record.get("idle_seconds") if record else None
+
+
+def _center_in_any(rect, rects):
+    cx = rect[0] + rect[2] / 2
+    cy = rect[1] + rect[3] / 2
+    return any(x <= cx < x + w and y <= cy < y + h for x, y, w, h in rects)
+
+
+def load_manifest(frame_dir):
+    path = os.path.join(frame_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Replay manifest not found: {path}")
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+def create_backend(frame_dir, loop=False, ocr_latency=None):
+    screen = ReplayScreenSource(frame_dir, load_manifest(frame_dir), loop=loop)
+    return Backend("replay", screen, ReplayTextRecognizer(ocr_latency), ReplayAppSource(screen))
@@ -0,0 +1,89 @@
+"""
+Content-addressed store for full OCR text.
+
+Log rows keep a short text_summary for prompts and a text_ref pointing at the
+full text here. Texts are normalized, hashed and zlib-compressed into one
+pack file per day, with a small append-only index:
+
+    logs/blobs/<date>.pack   concatenated compressed blobs
+    logs/blobs/<date>.idx    "<hash> <offset> <length>" per line
+
+Identical screens within a day are stored once.
+"""
+import hashlib
+import os
+import zlib
+
+BLOB_DIR = "blobs"
+COMPRESSION_LEVEL = 6
+
+
+def normalize_text(text):
+    """Strips each line and drops empty ones so cosmetic differences hash the same."""
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def text_hash(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, log_dir, date_str):
+        self.dir = os.path.join(log_dir, BLOB_DIR)
+        self.pack_path = os.path.join(self.dir, f"{date_str}.pack")
+        self.index_path = os.path.join(self.dir, f"{date_str}.idx")
+        self._index = None  # hash -> (offset, length), loaded on first use
+
+    def _load_index(self):
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        if not os.path.exists(self.index_path):
+            return self._index
+
+        pack_size = os.path.getsize(self.pack_path) if os.path.exists(self.pack_path) else 0
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 3:
+                    continue
+                digest, offset, length = parts[0], int(parts[1]), int(parts[2])
+                # Skip entries whose blob never made it to disk (e.g. a crash mid-write)
+                if offset + length <= pack_size:
+                    self._index[digest] = (offset, length)
+        return self._index
+
+    def put(self, text):
+        """Stores text if it is not already present and returns its hash."""
+        normalized = normalize_text(text)
+        digest = text_hash(normalized)
+        index = self._load_index()
+        if digest in index:
+            return digest
+
+        os.makedirs(self.dir, exist_ok=True)
+        blob = zlib.compress(normalized.encode("utf-8"), COMPRESSION_LEVEL)
+        with open(self.pack_path, "ab") as f:
+            offset = f.tell()
+            f.write(blob)
+        # The index is written after the blob so it never points past the pack
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(f"{digest} {offset} {len(blob)}\n")
+        index[digest] = (offset, len(blob))
+        return digest
+
+    def get(self, digest):
+        """Returns the stored text for digest, or None if it is unknown."""
+        location = self._load_index().get(digest)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.pack_path, "rb") as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).decode("utf-8")
+
+    def __contains__(self, digest):
+        return digest in self._load_index()
+
+    def __len__(self):
+        return len(self._load_index())
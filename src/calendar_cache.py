@@ -0,0 +1,245 @@
+"""
+On-disk cache for Google Calendar events.
+
+Layout under cache/calendar/<calendar id>/:
+    sync.json         events of the recent window plus the API's nextSyncToken
+    days/<date>.json  frozen snapshot of a past day
+
+Past days are served from their snapshot without touching the API (or even
+building the service). Recent days are kept current with incremental
+syncToken requests, which only return what changed since the last call.
+Days older than the sync window are fetched once with timeMin/timeMax and
+then frozen. Several calendars can be fetched in parallel and merged with
+fetch_calendars().
+"""
+import datetime
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_DIR = os.path.join("cache", "calendar")
+SYNC_WINDOW_DAYS = 30
+
+
+def _is_gone(error):
+    """True for the HTTP 410 the API returns when a sync token has expired."""
+    return getattr(getattr(error, 'resp', None), 'status', None) == 410
+
+
+def _parse_time(value):
+    # fromisoformat() before Python 3.11 does not accept a trailing 'Z'
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone().replace(tzinfo=None)
+
+
+def event_overlaps_day(event, day):
+    """True if the event (timed or all-day) overlaps the local calendar day."""
+    start, end = event.get('start', {}), event.get('end', {})
+    if 'date' in start:
+        first = datetime.date.fromisoformat(start['date'])
+        last = datetime.date.fromisoformat(end.get('date', start['date']))  # exclusive
+        return first <= day < max(last, first + datetime.timedelta(days=1))
+    if 'dateTime' not in start:
+        return False
+    day_start = datetime.datetime.combine(day, datetime.time.min)
+    ev_start = _parse_time(start['dateTime'])
+    ev_end = _parse_time(end.get('dateTime', start['dateTime']))
+    return ev_start < day_start + datetime.timedelta(days=1) and max(ev_end, ev_start + datetime.timedelta(seconds=1)) > day_start
+
+
+def _event_end(event):
+    end = event.get('end', event.get('start', {}))
+    if 'dateTime' in end:
+        return _parse_time(end['dateTime'])
+    return datetime.datetime.combine(datetime.date.fromisoformat(end['date']), datetime.time.min)
+
+
+def event_sort_key(event):
+    start = event.get('start', {})
+    if 'dateTime' in start:
+        return _parse_time(start['dateTime'])
+    return datetime.datetime.combine(datetime.date.fromisoformat(start['date']), datetime.time.min)
+
+
+class CalendarCache:
+    """
+    service_factory() returns a Calendar API service (or None when there are no
+    credentials). It is only called when the API is actually needed. One cache
+    may be used from several threads; its lookups run one at a time, so the
+    service (whose HTTP client is not thread-safe) is never used concurrently.
+    """
+
+    def __init__(self, service_factory, calendar_id='primary', cache_dir=CACHE_DIR,
+                 sync_window_days=SYNC_WINDOW_DAYS, today_fn=datetime.date.today):
+        self.service_factory = service_factory
+        self.calendar_id = calendar_id
+        self.dir = os.path.join(cache_dir, re.sub(r'[^\w.@-]', '_', calendar_id))
+        self.sync_window = datetime.timedelta(days=sync_window_days)
+        self.today_fn = today_fn
+        self._state = None
+        self._lock = threading.Lock()
+
+    # --- storage ---
+
+    def _day_path(self, day):
+        return os.path.join(self.dir, "days", f"{day.isoformat()}.json")
+
+    def _sync_path(self):
+        return os.path.join(self.dir, "sync.json")
+
+    def _read_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _load_state(self):
+        if self._state is None:
+            self._state = self._read_json(self._sync_path()) or {}
+        return self._state
+
+    # --- API ---
+
+    def _list_all(self, service, **params):
+        """Follows pageToken links. Returns (items, nextSyncToken or None)."""
+        items = []
+        page_token = None
+        while True:
+            if page_token:
+                params['pageToken'] = page_token
+            result = service.events().list(calendarId=self.calendar_id, **params).execute()
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+
+    def _full_sync(self, service, window_start):
+        time_min = datetime.datetime.combine(window_start, datetime.time.min).astimezone().isoformat()
+        items, token = self._list_all(service, timeMin=time_min, singleEvents=True, maxResults=2500)
+        self._state = {
+            'window_start': window_start.isoformat(),
+            'sync_token': token,
+            'events': {e['id']: e for e in items if e.get('status') != 'cancelled'},
+        }
+
+    def _prune(self, window_start):
+        """Drops events that ended before the sync window so sync.json stays small."""
+        cutoff = datetime.datetime.combine(window_start, datetime.time.min)
+        events = self._state['events']
+        for event_id in [i for i, e in events.items() if _event_end(e) < cutoff]:
+            del events[event_id]
+
+    def sync(self, service):
+        """Brings the recent window up to date, incrementally when a sync token is available."""
+        state = self._load_state()
+        window_start = self.today_fn() - self.sync_window
+        token = state.get('sync_token')
+
+        if token and state.get('window_start', '') <= window_start.isoformat():
+            try:
+                items, new_token = self._list_all(service, syncToken=token, singleEvents=True)
+            except Exception as e:
+                if not _is_gone(e):
+                    raise
+                self._full_sync(service, window_start)  # Token expired: start over
+            else:
+                events = state['events']
+                for item in items:
+                    if item.get('status') == 'cancelled':
+                        events.pop(item['id'], None)
+                    else:
+                        events[item['id']] = item
+                state['sync_token'] = new_token or token
+                self._prune(window_start)
+        else:
+            self._full_sync(service, window_start)
+
+        self._write_json(self._sync_path(), self._state)
+
+    def events_for_day(self, day):
+        """Returns the raw event items overlapping the given date, sorted by start."""
+        with self._lock:
+            return self._events_for_day(day)
+
+    def _events_for_day(self, day):
+        if isinstance(day, datetime.datetime):
+            day = day.date()
+        today = self.today_fn()
+
+        if day < today:
+            snapshot = self._read_json(self._day_path(day))
+            if snapshot is not None:
+                return snapshot
+
+        service = self.service_factory()
+        if not service:
+            return []
+
+        if day >= today - self.sync_window:
+            self.sync(service)
+            events = [e for e in self._state['events'].values() if event_overlaps_day(e, day)]
+        else:
+            start = datetime.datetime.combine(day, datetime.time.min)
+            items, _ = self._list_all(
+                service,
+                timeMin=start.astimezone().isoformat(),
+                timeMax=(start + datetime.timedelta(days=1)).astimezone().isoformat(),
+                singleEvents=True,
+            )
+            events = [e for e in items if e.get('status') != 'cancelled']
+
+        events.sort(key=event_sort_key)
+        if day < today:
+            # Past days do not change any more; freeze them
+            self._write_json(self._day_path(day), events)
+        return events
+
+
+def merge_events(event_lists):
+    """
+    Merges per-calendar event lists into one time-sorted list. The same meeting
+    seen on several calendars (same iCalUID and start) is kept once, from the
+    first calendar that listed it.
+    """
+    merged = {}
+    for events in event_lists:
+        for event in events:
+            start = event.get('start', {})
+            key = (event.get('iCalUID') or event.get('id'), start.get('dateTime') or start.get('date'))
+            merged.setdefault(key, event)
+    return sorted(merged.values(), key=event_sort_key)
+
+
+def fetch_calendars(caches, day, max_workers=8):
+    """
+    Fetches the day from several CalendarCache objects in parallel.
+    Returns (merged events, {calendar_id: seconds}). A calendar that fails is
+    reported and skipped so the others still show up.
+    """
+    def fetch(cache):
+        started = time.perf_counter()
+        try:
+            events = cache.events_for_day(day)
+        except Exception as e:
+            print(f"Calendar {cache.calendar_id} failed: {e}")
+            events = []
+        return events, time.perf_counter() - started
+
+    if len(caches) == 1:
+        results = [fetch(caches[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(caches))) as pool:
+            results = list(pool.map(fetch, caches))
+
+    latencies = {cache.calendar_id: elapsed for cache, (_, elapsed) in zip(caches, results)}
+    return merge_events(events for events, _ in results), latencies
@@ -0,0 +1,138 @@
+"""
+In-memory fake of the parts of the Calendar API v3 service used by this project:
+service.events().list(...).execute() with paging, timeMin/timeMax filtering and
+syncToken incremental sync. Used by tests and benchmarks in place of the real API.
+"""
+import datetime
+import itertools
+
+
+class FakeHttpError(Exception):
+    """Mimics googleapiclient.errors.HttpError enough for status checks."""
+
+    def __init__(self, status, message=""):
+        super().__init__(message or f"HTTP {status}")
+        self.resp = type("Response", (), {"status": status})()
+
+
+def _parse(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone()
+
+
+def _start(event):
+    start = event['start']
+    if 'dateTime' in start:
+        return _parse(start['dateTime'])
+    return datetime.datetime.combine(datetime.date.fromisoformat(start['date']), datetime.time.min).astimezone()
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self):
+        return self._fn()
+
+
+class FakeCalendar:
+    def __init__(self):
+        self.events = {}      # id -> event resource
+        self.changes = []     # (version, event id) in change order
+        self.version = 0
+        self.expired = set()  # sync tokens that now answer 410
+
+
+class FakeEventsResource:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, calendarId, **params):
+        return _Request(lambda: self.service._list(calendarId, **params))
+
+
+class FakeCalendarService:
+    def __init__(self, page_size=50, latency=0.0):
+        self.calendars = {}
+        self.page_size = page_size
+        self.latency = latency
+        self.calls = []  # (calendarId, params) for every list() executed
+        self._ids = itertools.count(1)
+
+    def _calendar(self, calendar_id):
+        return self.calendars.setdefault(calendar_id, FakeCalendar())
+
+    # --- test helpers ---
+
+    def add_event(self, summary, start, end, calendar_id='primary', all_day=False, **fields):
+        """Adds an event; start/end are datetimes (or dates with all_day=True). Returns its id."""
+        cal = self._calendar(calendar_id)
+        event_id = fields.pop('id', f"ev{next(self._ids)}")
+        if all_day:
+            times = {'start': {'date': start.isoformat()}, 'end': {'date': end.isoformat()}}
+        else:
+            times = {'start': {'dateTime': start.astimezone().isoformat()},
+                     'end': {'dateTime': end.astimezone().isoformat()}}
+        cal.events[event_id] = dict(id=event_id, status='confirmed', summary=summary, **times, **fields)
+        self._touch(cal, event_id)
+        return event_id
+
+    def update_event(self, event_id, calendar_id='primary', **fields):
+        cal = self._calendar(calendar_id)
+        cal.events[event_id].update(fields)
+        self._touch(cal, event_id)
+
+    def cancel_event(self, event_id, calendar_id='primary'):
+        cal = self._calendar(calendar_id)
+        cal.events[event_id]['status'] = 'cancelled'
+        self._touch(cal, event_id)
+
+    def expire_sync_tokens(self, calendar_id='primary'):
+        cal = self._calendar(calendar_id)
+        cal.expired.update(str(v) for v in range(cal.version + 1))
+
+    def _touch(self, cal, event_id):
+        cal.version += 1
+        cal.changes.append((cal.version, event_id))
+
+    # --- API surface ---
+
+    def events(self):
+        return FakeEventsResource(self)
+
+    def _list(self, calendarId, syncToken=None, pageToken=None, timeMin=None, timeMax=None,
+              singleEvents=False, orderBy=None, maxResults=None, **_):
+        if self.latency:
+            import time
+            time.sleep(self.latency)
+        self.calls.append((calendarId, dict(syncToken=syncToken, pageToken=pageToken, timeMin=timeMin, timeMax=timeMax)))
+        cal = self._calendar(calendarId)
+
+        if syncToken is not None:
+            if timeMin or timeMax or orderBy:
+                raise FakeHttpError(400, "syncToken cannot be combined with timeMin/timeMax/orderBy")
+            if syncToken in cal.expired:
+                raise FakeHttpError(410, "Sync token is no longer valid")
+            since = int(syncToken)
+            changed_ids = []
+            for version, event_id in cal.changes:
+                if version > since and event_id not in changed_ids:
+                    changed_ids.append(event_id)
+            items = [cal.events[i] for i in changed_ids]
+        else:
+            items = [e for e in cal.events.values() if e['status'] != 'cancelled']
+            if timeMin:
+                items = [e for e in items if _start(e) >= _parse(timeMin) or
+                         _parse(e['end'].get('dateTime', timeMin)) > _parse(timeMin)]
+            if timeMax:
+                items = [e for e in items if _start(e) < _parse(timeMax)]
+            items.sort(key=_start)
+
+        offset = int(pageToken or 0)
+        page = items[offset:offset + self.page_size]
+        result = {'items': [dict(e) for e in page]}
+        if offset + self.page_size < len(items):
+            result['nextPageToken'] = str(offset + self.page_size)
+        elif orderBy is None and timeMax is None:
+            # Like the real API, only unbounded listings hand out a sync token
+            result['nextSyncToken'] = str(cal.version)
+        return result
@@ -1,17 +1,62 @@
 import datetime
+import functools
 import os.path
+import threading
+import configparser
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
+from src.calendar_cache import CalendarCache, fetch_calendars
+
 # If modifying these scopes, delete the file token.json.
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
-def get_calendar_service():
-    """Shows basic usage of the Google Calendar API.
-    Prints the start and name of the next 10 events on the user's calendar.
+CALENDAR_CONFIG_PATH = "./config/calendar_settings.ini"
+
+_creds = None
+_creds_lock = threading.Lock()
+_services = {}  # calendar ID -> Calendar API service
+_services_lock = threading.Lock()
+_caches = {}
+_caches_lock = threading.Lock()
+
+def load_calendar_ids():
+    """
+    Returns the calendar IDs to read, from [calendars] ids in the config file
+    (comma or newline separated). Defaults to the primary calendar.
+    """
+    config = configparser.ConfigParser()
+    config.read(CALENDAR_CONFIG_PATH)
+    ids = config.get('calendars', 'ids', fallback='primary')
+    return [i.strip() for i in ids.replace('\n', ',').split(',') if i.strip()] or ['primary']
+
+def get_calendar_service(calendar_id='primary'):
+    """
+    Returns the Calendar API service for one calendar, built only once per
+    process whichever thread asks. The underlying HTTP client is not
+    thread-safe, so each calendar gets its own service and its CalendarCache
+    serializes the calls made with it. Credentials are loaded and refreshed
+    only once per process. Returns None if no credentials are available.
     """
+    with _services_lock:
+        service = _services.get(calendar_id)
+        if service is None:
+            creds = _get_credentials()
+            if not creds:
+                return None
+            service = _services[calendar_id] = build('calendar', 'v3', credentials=creds)
+        return service
+
+def _get_credentials():
+    global _creds
+    with _creds_lock:
+        if _creds is None:
+            _creds = _load_credentials()
+        return _creds
+
+def _load_credentials():
     creds = None
     # The file token.json stores the user's access and refresh tokens, and is
     # created automatically when the authorization flow completes for the first
@@ -41,49 +86,66 @@ def get_calendar_service():
         with open('token.json', 'w') as token:
             token.write(creds.to_json())
 
-    service = build('calendar', 'v3', credentials=creds)
-    return service
+    return creds
 
-def get_todays_events(target_date=None):
+def get_todays_event_items(target_date=None):
     """
-    Returns a list of events for the specified day.
-    Each event is a tuple (start_time, summary).
+    Returns the raw Calendar API event resources for the specified day from
+    every configured calendar, fetched in parallel, merged and de-duplicated.
+    Served from the local calendar cache where possible (see calendar_cache).
     target_date: datetime.date or datetime.datetime object. If None, uses today.
     """
-    service = get_calendar_service()
-    if not service:
-        return []
-
     if target_date is None:
         target_date = datetime.datetime.now()
-    
-    # Ensure it's a datetime object for replacement
-    if isinstance(target_date, datetime.date) and not isinstance(target_date, datetime.datetime):
-        target_date = datetime.datetime.combine(target_date, datetime.time.min)
 
-    # Use local timezone offset instead of 'Z' (UTC)
-    # astimezone() without arguments uses the local timezone
-    start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0).astimezone().isoformat()
-    end_of_day = target_date.replace(hour=23, minute=59, second=59, microsecond=0).astimezone().isoformat()
+    calendar_ids = load_calendar_ids()
+    with _caches_lock:
+        for calendar_id in calendar_ids:
+            if calendar_id not in _caches:
+                # The service is only built if the cache cannot answer by itself
+                _caches[calendar_id] = CalendarCache(functools.partial(get_calendar_service, calendar_id),
+                                                     calendar_id=calendar_id)
+        caches = [_caches[i] for i in calendar_ids]
 
     try:
-        events_result = service.events().list(calendarId='primary', timeMin=start_of_day,
-                                              timeMax=end_of_day, singleEvents=True,
-                                              orderBy='startTime').execute()
-        events = events_result.get('items', [])
-        
-        event_list = []
-        for event in events:
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            summary = event.get('summary', 'No Title')
-            event_list.append((start, summary))
-            
-        return event_list
+        events, latencies = fetch_calendars(caches, target_date)
+        if len(calendar_ids) > 1:
+            for calendar_id, seconds in latencies.items():
+                print(f"Calendar {calendar_id}: {seconds * 1000:.0f} ms")
+        return events
 
     except Exception as e:
         print(f"An error occurred: {e}")
         return []
 
+def event_start_summary(event):
+    """Returns (start, summary) for an event resource."""
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    summary = event.get('summary', 'No Title')
+    return start, summary
+
+def event_interval(event):
+    """
+    Returns (start, end, summary) with naive local datetimes,
+    or None for all-day events.
+    """
+    start = event['start'].get('dateTime')
+    end = event.get('end', {}).get('dateTime')
+    if not start or not end:
+        return None
+    # fromisoformat() before Python 3.11 does not accept a trailing 'Z'
+    start = datetime.datetime.fromisoformat(start.replace('Z', '+00:00')).astimezone().replace(tzinfo=None)
+    end = datetime.datetime.fromisoformat(end.replace('Z', '+00:00')).astimezone().replace(tzinfo=None)
+    return start, end, event.get('summary', 'No Title')
+
+def get_todays_events(target_date=None):
+    """
+    Returns a list of events for the specified day.
+    Each event is a tuple (start_time, summary).
+    target_date: datetime.date or datetime.datetime object. If None, uses today.
+    """
+    return [event_start_summary(event) for event in get_todays_event_items(target_date)]
+
 if __name__ == '__main__':
     events = get_todays_events()
     for start, summary in events:
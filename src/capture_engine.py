@@ -0,0 +1,334 @@
+"""
+Pipelined capture engine.
+
+A scheduler takes frames on a fixed grid (start + n * interval), a bounded
+pool of worker threads runs OCR, and a single writer thread appends the
+results in capture order. When OCR falls behind, the oldest pending frame is
+dropped so the capture cadence never depends on OCR latency.
+
+If a fingerprint function is given, frames whose perceptual hash is within
+max_distance of the last OCR'd frame (and whose app did not change) skip OCR
+entirely and reuse the cached text.
+
+With a pacer (see adaptive_interval), the interval is chosen again after
+every capture instead of staying fixed, and stored on the capture.
+
+With an app switch source (see app_events), the scheduler pumps it while
+waiting. Each switch is passed to the writer in sequence with the captures,
+and once the new app has stayed in front for `settle` seconds a capture is
+taken right away; the grid then restarts from it, so switches do not raise
+the capture rate.
+"""
+import datetime
+import threading
+import time
+from collections import deque
+
+from src.frame_hash import hamming_distance
+
+SWITCH_SETTLE = 3  # seconds the new app must stay in front before it is captured
+PUMP_SLICE = 0.5   # longest single pump, so stop() is noticed quickly
+
+
+class Capture:
+    """A single captured frame waiting for OCR."""
+
+    def __init__(self, seq, captured_at, app_name, frame):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.app_name = app_name
+        self.frame = frame
+        self.fingerprint = None
+        self.unchanged = False
+        self.ref_seq = None  # For unchanged frames: the capture whose text is reused
+        self.interval = None  # Seconds until the next capture, when paced adaptively
+
+
+class AppSwitch:
+    """A foreground-app change reported by the switch source."""
+
+    def __init__(self, seq, switched_at, app_name):
+        self.seq = seq
+        self.switched_at = switched_at
+        self.app_name = app_name
+
+
+class DropOldestQueue:
+    """Bounded FIFO that discards the oldest item instead of blocking the producer."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item):
+        """Enqueue item. Returns the dropped item if the queue was full, else None."""
+        with self._cond:
+            dropped = None
+            if len(self._items) >= self.maxsize:
+                dropped = self._items.popleft()
+            self._items.append(item)
+            self._cond.notify()
+            return dropped
+
+    def get(self):
+        """Block until an item is available. Returns None once closed and drained."""
+        with self._cond:
+            while not self._items and not self._closed:
+                self._cond.wait()
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class ReorderBuffer:
+    """
+    Collects results completed out of order and hands them out by sequence number.
+    A result of None marks a dropped frame, which is skipped.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._next_seq = 0
+        self._end_seq = None
+        self._cond = threading.Condition()
+
+    def complete(self, seq, result):
+        with self._cond:
+            self._pending[seq] = result
+            self._cond.notify_all()
+
+    def finish(self, end_seq):
+        """No sequence number at or above end_seq will be completed."""
+        with self._cond:
+            self._end_seq = end_seq
+            self._cond.notify_all()
+
+    def drain(self, write_fn):
+        """Call write_fn for every result in order until finish() is reached."""
+        while True:
+            with self._cond:
+                while self._next_seq not in self._pending:
+                    if self._end_seq is not None and self._next_seq >= self._end_seq:
+                        return
+                    self._cond.wait()
+                result = self._pending.pop(self._next_seq)
+                self._next_seq += 1
+            if result is not None:
+                write_fn(*result)
+
+
+class CaptureEngine:
+    """
+    capture_fn() -> (app_name, frame) must be fast; it runs on the scheduler thread.
+    It may raise StopIteration to end the run when its source is exhausted.
+    ocr_fn(frame) -> text runs on the worker pool.
+    write_fn(capture, text) runs on the single writer thread, in capture order.
+    fingerprint_fn(frame) -> int or None is optional and runs on the scheduler thread.
+    pacer.next_interval(app_name, fingerprint) -> seconds is optional and replaces
+    the fixed interval after each capture.
+    switch_events is an optional app switch source; switch_fn(app_switch) then
+    runs on the writer thread for every switch.
+    """
+
+    def __init__(self, capture_fn, ocr_fn, write_fn, interval=60, workers=2, max_pending=4,
+                 fingerprint_fn=None, max_distance=0, pacer=None, switch_events=None, switch_fn=None,
+                 settle=SWITCH_SETTLE):
+        self.capture_fn = capture_fn
+        self.ocr_fn = ocr_fn
+        self.write_fn = write_fn
+        self.fingerprint_fn = fingerprint_fn
+        self.max_distance = max_distance
+        self.interval = interval
+        self.pacer = pacer
+        self.switch_events = switch_events
+        self.switch_fn = switch_fn
+        self.settle = settle
+        self.workers = workers
+        self.queue = DropOldestQueue(max_pending)
+        self.results = ReorderBuffer()
+        self.captured = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.switches = 0
+        self._seq = 0
+        self._reference = None  # Last capture sent to OCR
+        self._last_ocr = (None, "")  # (seq, text) of the last OCR result written
+        self._last_app = None
+        self._settle_at = None  # monotonic time of the capture due after a switch
+        self._stop = threading.Event()
+        self._threads = []
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self):
+        """Run the scheduler on the calling thread until stop() or KeyboardInterrupt."""
+        self._start_threads()
+        if self.switch_events is not None:
+            self.switch_events.start(self._on_switch)
+        try:
+            next_tick = time.monotonic()
+            while not self._stop.is_set():
+                self._capture_once()
+                next_tick = self._wait(self._next_tick(next_tick, time.monotonic()))
+        finally:
+            if self.switch_events is not None:
+                self.switch_events.stop()
+            self._shutdown()
+
+    def _wait(self, next_tick):
+        """
+        Waits until next_tick, or until a switched-to app has settled.
+        Returns the tick the next capture is taken for.
+        """
+        if self.switch_events is None:
+            self._stop.wait(max(0.0, next_tick - time.monotonic()))
+            return next_tick
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self._settle_at is not None and now >= self._settle_at:
+                return now
+            if now >= next_tick:
+                return next_tick
+            until = next_tick if self._settle_at is None else min(next_tick, self._settle_at)
+            self.switch_events.pump(min(until - now, PUMP_SLICE))
+        return next_tick
+
+    def _on_switch(self, app_name):
+        """Switch source callback, on the scheduler thread."""
+        if app_name == self._last_app:
+            return
+        self._last_app = app_name
+        seq = self._seq
+        self._seq += 1
+        self.switches += 1
+        self.results.complete(seq, (AppSwitch(seq, datetime.datetime.now(), app_name), None))
+        # Every further switch pushes the capture back, so only the app that stays is captured
+        self._settle_at = time.monotonic() + self.settle
+
+    def _next_tick(self, tick, now):
+        """Advance by the current interval, skipping slots the capture itself overran."""
+        tick += self.interval
+        if tick <= now:
+            missed = int((now - tick) // self.interval) + 1
+            tick += missed * self.interval
+        return tick
+
+    def _capture_once(self):
+        seq = self._seq
+        captured_at = datetime.datetime.now()
+        try:
+            app_name, frame = self.capture_fn()
+        except StopIteration:
+            # The source is exhausted (e.g. a finished replay)
+            self.stop()
+            return
+        except Exception as e:
+            print(f"[{captured_at.strftime('%H:%M:%S')}] Capture failed: {e}")
+            return
+        self._seq += 1
+        self.captured += 1
+        self._last_app = app_name
+        self._settle_at = None  # This capture already shows the app switched to
+        capture = Capture(seq, captured_at, app_name, frame)
+
+        unchanged = self._is_unchanged(capture)
+        if self.pacer is not None:
+            capture.interval = self.interval = self.pacer.next_interval(app_name, capture.fingerprint)
+
+        if unchanged:
+            capture.frame = None
+            self.skipped += 1
+            self.results.complete(seq, (capture, None))
+            return
+        self._reference = capture
+
+        dropped = self.queue.put(capture)
+        if dropped is not None:
+            self.dropped += 1
+            if dropped is self._reference:
+                self._reference = None
+            self.results.complete(dropped.seq, None)
+            print(f"[{dropped.captured_at.strftime('%H:%M:%S')}] OCR is falling behind; dropped frame for {dropped.app_name}")
+
+    def _is_unchanged(self, capture):
+        if self.fingerprint_fn is None:
+            return False
+        try:
+            capture.fingerprint = self.fingerprint_fn(capture.frame)
+        except Exception as e:
+            print(f"[{capture.captured_at.strftime('%H:%M:%S')}] Frame hashing failed: {e}")
+            return False
+
+        ref = self._reference
+        if (ref is None or capture.fingerprint is None or ref.fingerprint is None
+                or ref.app_name != capture.app_name):
+            return False
+        if hamming_distance(capture.fingerprint, ref.fingerprint) > self.max_distance:
+            return False
+        capture.unchanged = True
+        capture.ref_seq = ref.seq
+        return True
+
+    def _start_threads(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"ocr-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._writer = threading.Thread(target=self._write_loop, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def _worker(self):
+        while True:
+            capture = self.queue.get()
+            if capture is None:
+                return
+            try:
+                text = self.ocr_fn(capture.frame)
+            except Exception as e:
+                print(f"[{capture.captured_at.strftime('%H:%M:%S')}] OCR failed: {e}")
+                text = ""
+            capture.frame = None  # Release the image as soon as possible
+            self.results.complete(capture.seq, (capture, text))
+
+    def _write_loop(self):
+        def write(capture, text):
+            if isinstance(capture, AppSwitch):
+                if self.switch_fn is not None:
+                    try:
+                        self.switch_fn(capture)
+                    except Exception as e:
+                        print(f"[{capture.switched_at.strftime('%H:%M:%S')}] Failed to write app switch: {e}")
+                return
+            if capture.unchanged:
+                ref_seq, text = self._last_ocr
+                if ref_seq != capture.ref_seq:
+                    # The reference frame was dropped or failed, nothing to reuse
+                    return
+            else:
+                self._last_ocr = (capture.seq, text)
+            try:
+                self.write_fn(capture, text)
+            except Exception as e:
+                print(f"[{capture.captured_at.strftime('%H:%M:%S')}] Failed to write log: {e}")
+        self.results.drain(write)
+
+    def _shutdown(self):
+        """Let the workers finish frames already captured, then flush the writer."""
+        self.queue.close()
+        for t in self._threads:
+            t.join()
+        self.results.finish(self._seq)
+        self._writer.join()
+        self._threads = []
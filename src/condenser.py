@@ -0,0 +1,167 @@
+"""
+Budgeted condensation of the log section of the prompt.
+
+Consecutive entries of the same app are merged into time blocks. Within each
+block, distinct snippets are ranked greedily by novelty (how many character
+3-grams they add beyond the snippets ranked before them). Snippets are then
+admitted across all blocks -- every block's best snippet first, then every
+block's second best, and so on -- while they fit the character budget.
+If even the block headers do not fit, the smallest blocks are folded into
+their neighbours. The result is deterministic and never exceeds the budget.
+"""
+from src.log_analyzer import entry_count, entry_end
+
+SNIPPET_CHARS = 160
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 40  # distinct snippets kept per block, thinned evenly over time
+MAX_OTHER_APPS = 3   # folded app names listed in a block header
+
+
+class Block:
+    def __init__(self, app_name, start, end):
+        self.app_name = app_name
+        self.start = start
+        self.end = end
+        self.count = 0
+        self.others = set()   # apps folded into this block
+        self.candidates = []  # distinct snippets in capture order
+        self._seen = set()
+        self._distinct = 0
+        self._stride = 1
+
+    def add_snippet(self, text):
+        snippet = " ".join(text.split())[:SNIPPET_CHARS]
+        if not snippet or snippet in self._seen:
+            return
+        self._seen.add(snippet)
+        self._distinct += 1
+        if self._distinct % self._stride:
+            return
+        self.candidates.append(snippet)
+        if len(self.candidates) >= MAX_CANDIDATES:
+            # Keep every other candidate so long blocks stay sampled across their whole span
+            self.candidates = self.candidates[::2]
+            self._stride *= 2
+
+    def header(self):
+        label = self.app_name
+        if self.others:
+            names = sorted(self.others)
+            label += " (他: " + ", ".join(names[:MAX_OTHER_APPS]) + (" 等" if len(names) > MAX_OTHER_APPS else "") + ")"
+        return f"{self.start[:5]}-{self.end[:5]} | {label} | {self.count}回"
+
+    def absorb(self, other):
+        """Folds a neighbouring block into this one, keeping the dominant app name."""
+        apps = {self.app_name, other.app_name} | self.others | other.others
+        if other.count > self.count:
+            self.app_name = other.app_name
+        self.others = apps - {self.app_name}
+        self.start = min(self.start, other.start)
+        self.end = max(self.end, other.end)
+        self.count += other.count
+        for snippet in other.candidates:
+            if snippet not in self.candidates:
+                self.candidates.append(snippet)
+        if len(self.candidates) > MAX_CANDIDATES:
+            self.candidates = self.candidates[::2]
+
+
+class BlockAggregator:
+    """Collects app blocks while the log is streamed (see log_analyzer.stream_log)."""
+
+    STATE_FIELDS = ('app_name', 'start', 'end', 'count', 'candidates', '_distinct', '_stride')
+
+    def __init__(self):
+        self.blocks = []
+
+    def state(self):
+        return {'blocks': [
+            dict({f: getattr(b, f) for f in self.STATE_FIELDS}, others=sorted(b.others), seen=sorted(b._seen))
+            for b in self.blocks
+        ]}
+
+    def load_state(self, state):
+        self.blocks = []
+        for data in state['blocks']:
+            block = Block(data['app_name'], data['start'], data['end'])
+            for f in self.STATE_FIELDS:
+                setattr(block, f, data[f])
+            block.others = set(data['others'])
+            block._seen = set(data['seen'])
+            self.blocks.append(block)
+
+    def add(self, entry):
+        block = self.blocks[-1] if self.blocks else None
+        if block is None or block.app_name != entry['app_name']:
+            block = Block(entry['app_name'], entry['timestamp'], entry_end(entry))
+            self.blocks.append(block)
+        block.end = entry_end(entry)
+        block.count += entry_count(entry)
+        if entry.get('type') not in ('continued', 'app_switch'):
+            block.add_snippet(entry.get('text_summary', ''))
+
+
+def _shingles(text):
+    return {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+
+
+def rank_by_novelty(snippets):
+    """Greedy ordering: each pick adds the most 3-grams not covered by earlier picks."""
+    remaining = [(i, s, _shingles(s)) for i, s in enumerate(snippets)]
+    covered = set()
+    ranked = []
+    while remaining:
+        best = max(remaining, key=lambda r: (len(r[2] - covered), -r[0]))
+        remaining.remove(best)
+        ranked.append(best[1])
+        covered |= best[2]
+    return ranked
+
+
+def _fold_smallest(blocks):
+    """
+    Merges the block with the fewest captures into its smaller neighbour.
+    Returns how many header characters were saved.
+    """
+    i = min(range(len(blocks)), key=lambda k: (blocks[k].count, k))
+    if i == 0:
+        j = 1
+    elif i == len(blocks) - 1:
+        j = i - 1
+    else:
+        j = i - 1 if blocks[i - 1].count <= blocks[i + 1].count else i + 1
+    keep, drop = min(i, j), max(i, j)
+    freed = len(blocks[keep].header()) + len(blocks[drop].header()) + 2
+    blocks[keep].absorb(blocks[drop])
+    del blocks[drop]
+    return freed - len(blocks[keep].header()) - 1
+
+
+def condense_blocks(blocks, budget):
+    """Returns prompt lines for the blocks whose total length (with newlines) fits budget."""
+    blocks = list(blocks)
+    used = sum(len(b.header()) + 1 for b in blocks)
+    while len(blocks) > 1 and used > budget:
+        used -= _fold_smallest(blocks)
+
+    ranked = [rank_by_novelty(b.candidates) for b in blocks]
+    chosen = [set() for _ in blocks]
+    for rank in range(max((len(r) for r in ranked), default=0)):
+        for i, snippets in enumerate(ranked):
+            if rank < len(snippets):
+                cost = len(snippets[rank]) + 5  # "  - " prefix and newline
+                if used + cost <= budget:
+                    chosen[i].add(snippets[rank])
+                    used += cost
+
+    lines = []
+    for block, picked in zip(blocks, chosen):
+        lines.append(block.header())
+        # Keep the selected snippets in capture order
+        lines.extend(f"  - {s}" for s in block.candidates if s in picked)
+
+    # A single block whose header alone is over budget is the only way to get here
+    text = "\n".join(lines)
+    if len(text) > budget:
+        return [text[:budget]]
+    return lines
@@ -0,0 +1,96 @@
+"""
+Near-duplicate suppression of OCR snapshots at write time.
+
+Each capture's text is reduced to a 64-bit SimHash over character shingles.
+A capture that is a near-duplicate of the last row written (same app, same
+day) is collapsed into a single run-length "continued" record of that row
+instead of repeating the text. Long texts are hashed from WINDOWS runs of
+shingles spread evenly over the whole text, so work per capture is bounded
+by MAX_SHINGLES and safe inside the capture loop while a change anywhere
+on the screen still reaches the signature.
+"""
+import hashlib
+
+SHINGLE_SIZE = 4
+MAX_SHINGLES = 2000  # longer texts are sampled in WINDOWS evenly spaced runs
+WINDOWS = 16
+MAX_DISTANCE = 3     # of 64 bits; roughly "98% the same"
+MAX_RUN = 30         # flush a run after this many captures so a crash loses little
+
+
+def simhash(text, shingle_size=SHINGLE_SIZE):
+    text = " ".join(text.split())
+    count = len(text) - shingle_size + 1
+    if count < 1:
+        shingles = {text}
+    else:
+        starts = range(count)
+        if count > MAX_SHINGLES:
+            # Contiguous runs, so text shifted by a few characters still shares most shingles
+            width = MAX_SHINGLES // WINDOWS
+            spacing = (count - width) / (WINDOWS - 1)
+            starts = [round(w * spacing) + i for w in range(WINDOWS) for i in range(width)]
+        shingles = {text[i:i + shingle_size] for i in starts}
+
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for s in shingles
+    ]
+    threshold = len(rows) / 2
+    value = 0
+    for column in zip(*rows):
+        value = (value << 1) | (column.count("1") > threshold)
+    return value
+
+
+class RunCollapser:
+    """
+    Absorbs consecutive near-duplicates of the last written row into a run and
+    calls flush_fn(app_name, start, end, count) when the run ends.
+    """
+
+    def __init__(self, flush_fn=None, max_distance=MAX_DISTANCE, max_run=MAX_RUN):
+        self.flush_fn = flush_fn
+        self.max_distance = max_distance
+        self.max_run = max_run
+        self._run = None  # [app_name, start, end, count]
+        self._last_row = None  # ((app_name, date), signature) of the last row actually written
+
+    def add(self, captured_at, app_name, text):
+        """Returns True if the capture was absorbed into a run and must not be written."""
+        signature = simhash(text)
+        key = (app_name, captured_at.date())
+        # A run continues the row before it, so it must match that row and nothing
+        # older: in A, B, A' the A' is a new row, not B's screen continuing
+        duplicate = (self._last_row is not None and self._last_row[0] == key
+                     and bin(signature ^ self._last_row[1]).count("1") <= self.max_distance)
+        run = self._run
+
+        if run and not duplicate:
+            self.flush()
+            run = None
+
+        if duplicate:
+            if run is None:
+                self._run = [app_name, captured_at, captured_at, 1]
+            else:
+                run[2] = captured_at
+                run[3] += 1
+                if run[3] >= self.max_run:
+                    self.flush()
+            return True
+
+        self._last_row = (key, signature)
+        return False
+
+    def reset(self):
+        """Flushes the run and forgets the last row, for when another kind of row is written after it."""
+        self.flush()
+        self._last_row = None
+
+    def flush(self):
+        if self._run:
+            app_name, start, end, count = self._run
+            self._run = None
+            if self.flush_fn:
+                self.flush_fn(app_name, start, end, count)
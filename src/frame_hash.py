@@ -0,0 +1,51 @@
+"""
+Cheap perceptual hashes for captured frames.
+
+Frames are compared through a tiny grayscale thumbnail (a few dozen bytes),
+so deciding whether the screen changed costs far less than running OCR.
+"""
+import zlib
+
+HASH_WIDTH = 8
+HASH_HEIGHT = 8
+
+
+def dhash(gray, width=HASH_WIDTH + 1, height=HASH_HEIGHT):
+    """
+    Difference hash of a row-major 8-bit grayscale thumbnail.
+    Each bit records whether a pixel is brighter than its right neighbour,
+    so a (w+1) x h thumbnail yields a w*h bit integer.
+    """
+    value = 0
+    for y in range(height):
+        row = y * width
+        for x in range(width - 1):
+            value = (value << 1) | (gray[row + x] > gray[row + x + 1])
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+# Drops the low 3 bits of each pixel so antialiasing and subpixel
+# rendering noise do not mark a tile as changed.
+_QUANTIZE = bytes(v & 0xF8 for v in range(256))
+
+
+def tile_hashes(gray, width, height, cols, rows):
+    """
+    Splits a row-major grayscale thumbnail into cols x rows tiles and returns
+    one CRC per tile, in row-major tile order.
+    """
+    tile_w = width // cols
+    tile_h = height // rows
+    hashes = []
+    for r in range(rows):
+        for c in range(cols):
+            chunk = b"".join(
+                gray[(r * tile_h + y) * width + c * tile_w:(r * tile_h + y) * width + (c + 1) * tile_w]
+                for y in range(tile_h)
+            )
+            hashes.append(zlib.crc32(chunk.translate(_QUANTIZE)))
+    return hashes
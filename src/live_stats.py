@@ -0,0 +1,183 @@
+"""
+Today's log aggregates, kept in memory by the capture process and served
+on localhost.
+
+LiveStats loads what today's log already holds when the capture process
+starts and is then fed every row main.py writes, so it always matches the
+file. serve_live_stats() exposes it over HTTP on 127.0.0.1:
+
+    GET /stats?date=YYYY-MM-DD&log_dir=PATH[&lines=1]
+        aggregator states (the same ones log_checkpoint saves), a summary
+        and, with lines=1, the prompt lines; JSON
+    GET /log?date=YYYY-MM-DD&log_dir=PATH[&tail=N]
+        the prompt lines as text
+
+A different date or log directory gets 404. Requests whose Host header is
+not 127.0.0.1 or localhost on the server's port get 403, so a web page
+cannot read the log through DNS rebinding. fetch_live() and restore_live()
+are the client side: report_generator uses them for today's report and reads
+the log from disk when the capture process is not running.
+"""
+import json
+import os
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.log_analyzer import LOG_DIR, stream_log, prepare_entry, format_log_line, default_aggregators
+from src.sessions import SessionAggregator
+from src.condenser import BlockAggregator
+
+LIVE_HOST = "127.0.0.1"
+LIVE_PORT = 8765
+LIVE_TIMEOUT = 0.5  # seconds a report waits for the capture process before reading the log itself
+RECENT_LINES = 20
+
+
+def live_aggregators():
+    aggregators = default_aggregators()
+    aggregators['sessions'] = SessionAggregator()
+    aggregators['blocks'] = BlockAggregator()
+    return aggregators
+
+
+class LiveStats:
+    """Aggregators and prompt lines for the current day. Thread-safe."""
+
+    def __init__(self, log_dir=LOG_DIR):
+        self.log_dir = os.path.abspath(log_dir)
+        self.date_str = None
+        self.aggregators = None
+        self.lines = []
+        self._lock = threading.Lock()
+
+    def load_day(self, date_str):
+        """Starts over with the rows the day's log already holds."""
+        aggregators = live_aggregators()
+        lines = list(stream_log(date_str, aggregators.values(), self.log_dir))
+        with self._lock:
+            self.date_str, self.aggregators, self.lines = date_str, aggregators, lines
+
+    def add(self, row, date_str):
+        """Feeds one row that has just been appended to the date's log."""
+        if date_str != self.date_str:
+            # A new day: its log already contains this row
+            self.load_day(date_str)
+            return
+        entry = dict(row)
+        if not prepare_entry(entry, date_str):
+            return
+        with self._lock:
+            for aggregator in self.aggregators.values():
+                aggregator.add(entry)
+            self.lines.append(format_log_line(entry))
+
+    def stats_json(self, date_str, lines=False):
+        """The /stats response body, or None if date_str is not the current day."""
+        with self._lock:
+            if date_str != self.date_str:
+                return None
+            states = {name: aggregator.state() for name, aggregator in self.aggregators.items()}
+            # Durations need finished sessions; finish a copy so the live one keeps growing
+            sessions = SessionAggregator()
+            sessions.load_state(states['sessions'])
+            sessions.finish()
+            body = {
+                'date': self.date_str,
+                'log_dir': self.log_dir,
+                'rows': len(self.lines),
+                'summary': {
+                    'capture_count': self.aggregators['counts'].total,
+                    'record_period': self.aggregators['time_range'].period_text(),
+                    'app_seconds': {app: d.total_seconds() for app, d in sessions.durations().items()},
+                    'switches': self.aggregators['switches'].switches,
+                    'recent': self.lines[-RECENT_LINES:],
+                },
+                'aggregators': states,
+            }
+            if lines:
+                body['lines'] = self.lines
+            # Serialized under the lock: the states share dicts with the live aggregators
+            return json.dumps(body, ensure_ascii=False).encode('utf-8')
+
+    def log_text(self, date_str, tail=None):
+        with self._lock:
+            if date_str != self.date_str:
+                return None
+            lines = self.lines[-tail:] if tail else self.lines
+            return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        port = self.server.server_address[1]
+        if self.headers.get('Host') not in (f"{LIVE_HOST}:{port}", f"localhost:{port}"):
+            self.send_error(403)
+            return
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        live = self.server.live
+        body = None
+        if query.get('log_dir') and os.path.abspath(query['log_dir']) == live.log_dir:
+            try:
+                if url.path == "/stats":
+                    body, content_type = live.stats_json(query.get('date'), query.get('lines') == "1"), "application/json"
+                elif url.path == "/log":
+                    tail = int(query['tail']) if query.get('tail') else None
+                    body, content_type = live.log_text(query.get('date'), tail), "text/plain; charset=utf-8"
+            except ValueError:
+                self.send_error(400)
+                return
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # One line per report request would drown the capture log
+
+
+def serve_live_stats(live, port=LIVE_PORT):
+    """Serves live on 127.0.0.1:port from a daemon thread. Returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer((LIVE_HOST, port), _Handler)
+    server.daemon_threads = True
+    server.live = live
+    threading.Thread(target=server.serve_forever, name="live-stats", daemon=True).start()
+    return server
+
+
+def fetch_live(date_str, log_dir=LOG_DIR, lines=True, port=LIVE_PORT, timeout=LIVE_TIMEOUT):
+    """The capture process's /stats for date_str, or None if it is not running or has no such day."""
+    query = urllib.parse.urlencode({'date': date_str, 'log_dir': os.path.abspath(log_dir), 'lines': int(lines)})
+    try:
+        with urllib.request.urlopen(f"http://{LIVE_HOST}:{port}/stats?{query}", timeout=timeout) as response:
+            return json.load(response)
+    except (OSError, ValueError):
+        return None
+
+
+def restore_live(date_str, aggregators, keep_lines=True, log_dir=LOG_DIR, port=LIVE_PORT, timeout=LIVE_TIMEOUT):
+    """
+    Loads the capture process's state for date_str into aggregators (a dict
+    of name -> fresh aggregator, as for log_checkpoint). Returns the prompt
+    lines so far ([] without keep_lines), or None if the process is not
+    running or its state does not fit, in which case aggregators are left fresh.
+    """
+    live = fetch_live(date_str, log_dir, keep_lines, port, timeout)
+    if live is None or not set(aggregators) <= set(live.get('aggregators', {})):
+        return None
+    fresh = {name: aggregator.state() for name, aggregator in aggregators.items()}
+    try:
+        for name, aggregator in aggregators.items():
+            aggregator.load_state(live['aggregators'][name])
+    except (KeyError, TypeError, ValueError):
+        # e.g. a different idle threshold than the capture process uses
+        for name, aggregator in aggregators.items():
+            aggregator.load_state(fresh[name])
+        return None
+    return live.get('lines', []) if keep_lines else []
@@ -0,0 +1,257 @@
+"""
+Single-pass streaming analysis of daily_log_*.jsonl files.
+
+stream_log() reads each log line once, yields the prompt line for it and
+feeds the entry to every aggregator on the way, so counts, time range,
+hourly histogram and app switches are computed together with bounded memory.
+Days converted to the binary format (see log_segment) are read the same way.
+"""
+import datetime
+import json
+import os
+
+from src.log_segment import SEGMENT_SUFFIX, iter_segment_entries
+
+LOG_DIR = "logs"
+
+
+def log_path(date_str, log_dir=LOG_DIR):
+    return os.path.join(log_dir, f"daily_log_{date_str}.jsonl")
+
+
+def find_log(date_str, log_dir=LOG_DIR):
+    """The day's log file: the JSONL while it exists, else a converted .seg file, else None."""
+    for path in (log_path(date_str, log_dir), os.path.join(log_dir, f"daily_log_{date_str}{SEGMENT_SUFFIX}")):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def iter_log_entries(filename):
+    """Yields parsed log rows from a JSONL or .seg file, skipping lines that are not valid JSON."""
+    if filename.endswith(SEGMENT_SUFFIX):
+        yield from iter_segment_entries(filename)
+        return
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def iter_log_entries_from(filename, offset=0):
+    """
+    Yields (entry, offset just past its line) for the complete lines after a
+    byte offset, skipping lines that are not valid JSON. A last line without
+    its newline is still being written and is left for the next read.
+    """
+    with open(filename, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                return
+            offset += len(line)
+            try:
+                yield json.loads(line), offset
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+
+def prepare_entry(entry, date_str):
+    """Fills in the keys stream_log guarantees. Returns False for rows to skip."""
+    if 'timestamp' not in entry:
+        return False
+    entry.setdefault('date', date_str)
+    entry.setdefault('app_name', 'Unknown')
+    return True
+
+
+def entry_count(entry):
+    """Number of captures a row stands for ("continued" rows cover several, app switches none)."""
+    if entry.get('type') == 'app_switch':
+        return 0
+    return entry.get('count', 1)
+
+
+def entry_end(entry):
+    return entry.get('end', entry['timestamp'])
+
+
+def format_log_line(entry):
+    """Formats one log row for the prompt."""
+    if entry.get('type') == 'continued':
+        return f"{entry['timestamp']}-{entry['end']} | {entry['app_name']} | （同様の画面が継続: {entry['count']}回）"
+    if entry.get('type') == 'app_switch':
+        return f"{entry['timestamp']} | {entry['app_name']} | （アプリ切り替え）"
+    return f"{entry['timestamp']} | {entry['app_name']} | {entry.get('text_summary', '')}"
+
+
+def stream_log(date_strs, aggregators=(), log_dir=LOG_DIR, format_fn=format_log_line):
+    """
+    Yields prompt lines for the logs of the given dates (a date string or a list)
+    while feeding every entry to the aggregators. Missing log files are skipped.
+    Each entry gets a 'date' key so aggregators can work across days.
+    format_fn(entry) makes the prompt line (format_log_line by default).
+    """
+    if isinstance(date_strs, str):
+        date_strs = [date_strs]
+    for date_str in date_strs:
+        filename = find_log(date_str, log_dir)
+        if filename is None:
+            continue
+        for entry in iter_log_entries(filename):
+            if not prepare_entry(entry, date_str):
+                continue
+            for aggregator in aggregators:
+                aggregator.add(entry)
+            yield format_fn(entry)
+
+
+def entry_datetime(date_str, timestamp):
+    return datetime.datetime.strptime(f"{date_str} {timestamp}", "%Y-%m-%d %H:%M:%S")
+
+
+class AppCountAggregator:
+    """Captures per app."""
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+
+    def add(self, entry):
+        n = entry_count(entry)
+        if not n:
+            return
+        self.counts[entry['app_name']] = self.counts.get(entry['app_name'], 0) + n
+        self.total += n
+
+    def state(self):
+        return {'counts': self.counts, 'total': self.total}
+
+    def load_state(self, state):
+        self.counts = dict(state['counts'])
+        self.total = state['total']
+
+    def render(self):
+        if not self.counts:
+            return []
+        lines = ["\n### アプリ使用統計 (キャプチャ頻度)"]
+        lines.append("| アプリケーション | キャプチャ回数 |")
+        lines.append("|---|---|")
+        # Sort by frequency
+        for app, count in sorted(self.counts.items(), key=lambda x: x[1], reverse=True):
+            lines.append(f"| {app} | {count}回 |")
+        return lines
+
+
+class TimeRangeAggregator:
+    """First and last capture time."""
+
+    def __init__(self):
+        self.first = None  # (date, timestamp)
+        self.last = None
+
+    def add(self, entry):
+        if self.first is None:
+            self.first = (entry['date'], entry['timestamp'])
+        self.last = (entry['date'], entry_end(entry))
+
+    def state(self):
+        return {'first': self.first, 'last': self.last}
+
+    def load_state(self, state):
+        self.first = tuple(state['first']) if state['first'] else None
+        self.last = tuple(state['last']) if state['last'] else None
+
+    def duration(self):
+        if self.first is None:
+            return datetime.timedelta(0)
+        return entry_datetime(*self.last) - entry_datetime(*self.first)
+
+    def period_text(self):
+        """'HH:MM~HH:MM(約h時間mm分)' as used in the report title."""
+        if self.first is None:
+            return "記録なし"
+        minutes = int(self.duration().total_seconds()) // 60
+        return f"{self.first[1][:5]}~{self.last[1][:5]}(約{minutes // 60}時間{minutes % 60:02d}分)"
+
+
+class HourlyHistogramAggregator:
+    """Captures per hour of day."""
+
+    def __init__(self):
+        self.hours = {}
+
+    def add(self, entry):
+        n = entry_count(entry)
+        if not n:
+            return
+        hour = int(entry['timestamp'][:2])
+        self.hours[hour] = self.hours.get(hour, 0) + n
+
+    def state(self):
+        return {'hours': self.hours}
+
+    def load_state(self, state):
+        self.hours = {int(h): n for h, n in state['hours'].items()}
+
+    def render(self):
+        if not self.hours:
+            return []
+        peak = max(self.hours.values())
+        lines = ["\n### 時間帯別キャプチャ数"]
+        lines.append("| 時間帯 | キャプチャ回数 | |")
+        lines.append("|---|---|---|")
+        for hour in sorted(self.hours):
+            count = self.hours[hour]
+            bar = "█" * max(1, round(count / peak * 20))
+            lines.append(f"| {hour:02d}:00 | {count}回 | {bar} |")
+        return lines
+
+
+class AppSwitchAggregator:
+    """Foreground app switches and the most frequent transitions."""
+
+    TOP_TRANSITIONS = 5
+
+    def __init__(self):
+        self.switches = 0
+        self.transitions = {}
+        self.last_app = None
+
+    def add(self, entry):
+        app = entry['app_name']
+        if self.last_app is not None and app != self.last_app:
+            self.switches += 1
+            key = f"{self.last_app} → {app}"
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.last_app = app
+
+    def state(self):
+        return {'switches': self.switches, 'transitions': self.transitions, 'last_app': self.last_app}
+
+    def load_state(self, state):
+        self.switches = state['switches']
+        self.transitions = dict(state['transitions'])
+        self.last_app = state['last_app']
+
+    def render(self):
+        if not self.switches:
+            return []
+        lines = [f"\n### アプリ切り替え (合計 {self.switches}回)"]
+        lines.append("| 切り替え | 回数 |")
+        lines.append("|---|---|")
+        top = sorted(self.transitions.items(), key=lambda x: x[1], reverse=True)[:self.TOP_TRANSITIONS]
+        for key, count in top:
+            lines.append(f"| {key} | {count}回 |")
+        return lines
+
+
+def default_aggregators():
+    return {
+        'counts': AppCountAggregator(),
+        'time_range': TimeRangeAggregator(),
+        'hourly': HourlyHistogramAggregator(),
+        'switches': AppSwitchAggregator(),
+    }
@@ -0,0 +1,108 @@
+"""
+Byte-offset checkpoints for re-streaming a growing log.
+
+After a day's log has been streamed, the byte offset reached, the file's
+inode and the serialized aggregator state (plus, optionally, the prompt lines
+produced so far) are saved to logs/.checkpoints/. The next run restores that
+state and only parses the lines appended since. A checkpoint is discarded,
+and the log rescanned from byte 0, when the file was replaced (different
+inode), truncated (shorter than the offset) or rewritten (the bytes just
+before the offset changed), or when the aggregators do not match it.
+"""
+import hashlib
+import json
+import os
+
+from src.log_analyzer import LOG_DIR, log_path, stream_log, iter_log_entries_from, prepare_entry, format_log_line
+
+CHECKPOINT_VERSION = 1
+GUARD_BYTES = 256  # bytes before the offset that must be unchanged to resume
+
+
+def checkpoint_path(date_str, log_dir=LOG_DIR):
+    return os.path.join(log_dir, ".checkpoints", f"daily_log_{date_str}.json")
+
+
+def tail_guard(filename, offset):
+    """Hash of the bytes just before offset; changes if the file was rewritten up to there."""
+    with open(filename, 'rb') as f:
+        f.seek(max(0, offset - GUARD_BYTES))
+        return hashlib.sha1(f.read(min(offset, GUARD_BYTES))).hexdigest()
+
+
+def _load(date_str, filename, aggregators, keep_lines, log_dir):
+    """Restores aggregator state. Returns (offset, lines) to resume from, or None."""
+    try:
+        with open(checkpoint_path(date_str, log_dir), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    st = os.stat(filename)
+    offset = checkpoint.get('offset', 0)
+    if (checkpoint.get('version') != CHECKPOINT_VERSION
+            or checkpoint.get('inode') != st.st_ino
+            or st.st_size < offset
+            or sorted(checkpoint.get('aggregators', {})) != sorted(aggregators)
+            or (keep_lines and checkpoint.get('lines') is None)
+            or checkpoint.get('guard') != tail_guard(filename, offset)):
+        return None
+    fresh = {name: aggregator.state() for name, aggregator in aggregators.items()}
+    try:
+        for name, aggregator in aggregators.items():
+            aggregator.load_state(checkpoint['aggregators'][name])
+    except (KeyError, TypeError, ValueError):
+        # Undo a partial restore so the rescan starts from clean aggregators
+        for name, aggregator in aggregators.items():
+            aggregator.load_state(fresh[name])
+        return None
+    return offset, checkpoint.get('lines')
+
+
+def _save(date_str, filename, aggregators, offset, lines, log_dir):
+    path = checkpoint_path(date_str, log_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    checkpoint = {
+        'version': CHECKPOINT_VERSION,
+        'inode': os.stat(filename).st_ino,
+        'offset': offset,
+        'guard': tail_guard(filename, offset),
+        'aggregators': {name: aggregator.state() for name, aggregator in aggregators.items()},
+        'lines': lines,
+    }
+    # Concurrent report runs (e.g. batch workers) must not share a temp file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def stream_log_checkpointed(date_str, aggregators, keep_lines=True, log_dir=LOG_DIR):
+    """
+    Like log_analyzer.stream_log for a single day, resuming from the day's
+    checkpoint. aggregators is a dict of name -> aggregator with state() and
+    load_state(); they must be fresh. With keep_lines, the prompt lines from
+    earlier runs are replayed from the checkpoint before the new ones.
+    The checkpoint is updated once the generator has been exhausted, before
+    the caller renders (and so finishes) the aggregators.
+    Converted days (see log_segment) no longer grow and are read in full.
+    """
+    filename = log_path(date_str, log_dir)
+    if not os.path.exists(filename):
+        yield from stream_log(date_str, aggregators.values(), log_dir)
+        return
+
+    offset, lines = _load(date_str, filename, aggregators, keep_lines, log_dir) or (0, [])
+    lines = list(lines or []) if keep_lines else None
+    if lines:
+        yield from lines
+    for entry, offset in iter_log_entries_from(filename, offset):
+        if not prepare_entry(entry, date_str):
+            continue
+        for aggregator in aggregators.values():
+            aggregator.add(entry)
+        line = format_log_line(entry)
+        if lines is not None:
+            lines.append(line)
+        yield line
+    _save(date_str, filename, aggregators, offset, lines, log_dir)
@@ -0,0 +1,313 @@
+"""
+Compact binary log format for finished days (daily_log_<date>.seg).
+
+The file is a magic header followed by length-prefixed segments of up to
+ROWS_PER_SEGMENT rows each. Within a segment the rows are stored by column:
+
+    u32 payload length, then the payload:
+    u16 rows, u32 first start, u32 last end       (seconds since midnight)
+    u16 apps, then per app: u16 length + UTF-8    (segment-local app table)
+    u32[rows] start, u32[rows] end, u32[rows] count, u16[rows] app, u8[rows] flags
+    u32 refs, then 20 bytes per text_ref          (binary SHA-1)
+    u32 texts, u32[texts] lengths in characters, u32 size + zlib(UTF-8 text_summary column)
+    u32 size + zlib(JSON list of any other keys), 0 when there are none
+
+Integers are little-endian. Reading a segment is a handful of array
+frombytes() calls and one decompress and decode per text column instead of
+one json.loads() per row, and the start/end in each segment header let
+time-window reads skip whole segments without decoding them.
+
+iter_segment_entries() yields the same dicts the JSONL lines held, so
+log_analyzer.iter_log_entries() reads either format. The day being captured
+stays JSONL; finished days are converted with:
+
+    python -m src.log_segment [--keep-jsonl] [YYYY-MM-DD ...]
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+SEGMENT_SUFFIX = ".seg"
+MAGIC = b"WCSEG1\n"
+ROWS_PER_SEGMENT = 1024
+COMPRESSION_LEVEL = 6
+NO_END = 0xFFFFFFFF
+
+FLAG_CONTINUED = 1
+FLAG_UNCHANGED = 2
+FLAG_REF = 4
+FLAG_TEXT = 8
+FLAG_EXTRA = 16
+FLAG_NO_COUNT = 32
+FLAG_PLAIN = FLAG_TEXT | FLAG_REF | FLAG_NO_COUNT
+
+_TIME = re.compile(r"^(\d{2}):(\d{2}):(\d{2})$")
+_REF = re.compile(r"^[0-9a-f]{40}$")
+_SWAP = sys.byteorder != "little"
+
+
+def _seconds(value):
+    match = _TIME.match(value) if isinstance(value, str) else None
+    if not match:
+        return None
+    h, m, s = (int(g) for g in match.groups())
+    return h * 3600 + m * 60 + s
+
+
+_clock_cache = {}
+
+
+def _clock(seconds):
+    text = _clock_cache.get(seconds)
+    if text is None:
+        text = _clock_cache[seconds] = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return text
+
+
+def _pack_array(typecode, values):
+    a = array(typecode, values)
+    if _SWAP:
+        a.byteswap()
+    return a.tobytes()
+
+
+def _unpack_array(typecode, data, offset, n):
+    a = array(typecode)
+    size = a.itemsize * n
+    a.frombytes(data[offset:offset + size])
+    if _SWAP:
+        a.byteswap()
+    return a, offset + size
+
+
+def encode_segment(entries):
+    """Encodes up to 65535 log rows as one segment payload."""
+    apps, app_ids = [], {}
+    starts, ends, counts, app_col, flags = [], [], [], [], []
+    refs, texts, extras = [], [], []
+
+    for entry in entries:
+        extra = dict(entry)
+        flag = 0
+        start = _seconds(extra.get('timestamp'))
+        if start is None:
+            start = 0  # kept verbatim in the extra column
+        else:
+            del extra['timestamp']
+        app = extra.pop('app_name', '')
+        if not isinstance(app, str):
+            extra['app_name'], app = app, ''
+        if app not in app_ids:
+            app_ids[app] = len(apps)
+            apps.append(app)
+
+        end = NO_END
+        if 'end' in extra and _seconds(extra['end']) is not None:
+            end = _seconds(extra.pop('end'))
+        if extra.get('type') == 'continued':
+            flag |= FLAG_CONTINUED
+            del extra['type']
+        count = extra.get('count')
+        if isinstance(count, int) and not isinstance(count, bool) and 0 <= count < NO_END:
+            del extra['count']
+        else:
+            count = 0
+            flag |= FLAG_NO_COUNT
+        if extra.get('unchanged') is True:
+            flag |= FLAG_UNCHANGED
+            del extra['unchanged']
+        if isinstance(extra.get('text_ref'), str) and _REF.match(extra['text_ref']):
+            flag |= FLAG_REF
+            refs.append(bytes.fromhex(extra.pop('text_ref')))
+        if isinstance(extra.get('text_summary'), str):
+            flag |= FLAG_TEXT
+            texts.append(extra.pop('text_summary'))
+        if extra:
+            flag |= FLAG_EXTRA
+            extras.append(extra)
+
+        starts.append(start)
+        ends.append(end)
+        counts.append(count)
+        app_col.append(app_ids[app])
+        flags.append(flag)
+
+    last_end = max((e if e != NO_END else s for s, e in zip(starts, ends)), default=0)
+    parts = [struct.pack("<HII", len(starts), min(starts, default=0), last_end), struct.pack("<H", len(apps))]
+    for app in apps:
+        raw = app.encode('utf-8')
+        parts.append(struct.pack("<H", len(raw)) + raw)
+    parts += [_pack_array('I', starts), _pack_array('I', ends), _pack_array('I', counts),
+              _pack_array('H', app_col), bytes(flags)]
+    parts.append(struct.pack("<I", len(refs)) + b"".join(refs))
+    text_blob = zlib.compress("".join(texts).encode('utf-8', 'surrogatepass'), COMPRESSION_LEVEL)
+    parts.append(struct.pack("<I", len(texts)) + _pack_array('I', map(len, texts)))
+    parts.append(struct.pack("<I", len(text_blob)) + text_blob)
+    extra_blob = zlib.compress(json.dumps(extras, ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL) if extras else b""
+    parts.append(struct.pack("<I", len(extra_blob)) + extra_blob)
+    return b"".join(parts)
+
+
+def segment_bounds(payload):
+    """(first start, last end) in seconds since midnight, read from the segment header."""
+    _, first, last = struct.unpack_from("<HII", payload, 0)
+    return first, last
+
+
+def decode_segment(payload):
+    """Returns the rows of one segment payload as log dicts."""
+    n, _, _ = struct.unpack_from("<HII", payload, 0)
+    offset = 10
+    (n_apps,) = struct.unpack_from("<H", payload, offset)
+    offset += 2
+    apps = []
+    for _ in range(n_apps):
+        (length,) = struct.unpack_from("<H", payload, offset)
+        apps.append(payload[offset + 2:offset + 2 + length].decode('utf-8'))
+        offset += 2 + length
+    starts, offset = _unpack_array('I', payload, offset, n)
+    ends, offset = _unpack_array('I', payload, offset, n)
+    counts, offset = _unpack_array('I', payload, offset, n)
+    app_col, offset = _unpack_array('H', payload, offset, n)
+    flags = payload[offset:offset + n]
+    offset += n
+
+    (n_refs,) = struct.unpack_from("<I", payload, offset)
+    offset += 4
+    refs = [payload[offset + 20 * i:offset + 20 * (i + 1)].hex() for i in range(n_refs)]
+    offset += 20 * n_refs
+
+    (n_texts,) = struct.unpack_from("<I", payload, offset)
+    lengths, offset = _unpack_array('I', payload, offset + 4, n_texts)
+    (size,) = struct.unpack_from("<I", payload, offset)
+    text_blob = zlib.decompress(payload[offset + 4:offset + 4 + size]).decode('utf-8', 'surrogatepass')
+    offset += 4 + size
+    (size,) = struct.unpack_from("<I", payload, offset)
+    extras = json.loads(zlib.decompress(payload[offset + 4:offset + 4 + size])) if size else []
+
+    bounds = list(accumulate(lengths, initial=0))
+    texts = iter([text_blob[a:b] for a, b in zip(bounds, bounds[1:])])
+    refs, extras = iter(refs), iter(extras)
+    timestamps = [_clock(t) for t in starts]
+    names = [apps[a] for a in app_col]
+
+    rows = []
+    for i, flag in enumerate(flags):
+        if flag == FLAG_PLAIN and ends[i] == NO_END:
+            # The common capture row, built in one go
+            rows.append({'timestamp': timestamps[i], 'app_name': names[i],
+                         'text_summary': next(texts), 'text_ref': next(refs)})
+            continue
+        entry = {'timestamp': timestamps[i], 'app_name': names[i]}
+        if flag & FLAG_CONTINUED:
+            entry['type'] = 'continued'
+        if ends[i] != NO_END:
+            entry['end'] = _clock(ends[i])
+        if not flag & FLAG_NO_COUNT:
+            entry['count'] = counts[i]
+        if flag & FLAG_TEXT:
+            entry['text_summary'] = next(texts)
+        if flag & FLAG_REF:
+            entry['text_ref'] = next(refs)
+        if flag & FLAG_UNCHANGED:
+            entry['unchanged'] = True
+        if flag & FLAG_EXTRA:
+            entry.update(next(extras))
+        rows.append(entry)
+    return rows
+
+
+def write_segment_file(path, entries, rows_per_segment=ROWS_PER_SEGMENT):
+    """Writes log rows to a .seg file (atomically)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            if len(batch) == rows_per_segment:
+                payload = encode_segment(batch)
+                f.write(struct.pack("<I", len(payload)) + payload)
+                batch = []
+        if batch:
+            payload = encode_segment(batch)
+            f.write(struct.pack("<I", len(payload)) + payload)
+    os.replace(tmp, path)
+
+
+def iter_segment_entries(path, since=None, until=None):
+    """
+    Yields the rows of a .seg file. With since/until ('HH:MM:SS'), segments
+    that lie entirely outside [since, until) are skipped without decoding;
+    rows of the remaining segments are all yielded.
+    """
+    since_s = _seconds(since) if since else None
+    until_s = _seconds(until) if until else None
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"not a log segment file: {path}")
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                return
+            (size,) = struct.unpack("<I", header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return  # truncated last segment
+            first, last = segment_bounds(payload)
+            if until_s is not None and first >= until_s:
+                return
+            if since_s is not None and last < since_s:
+                continue
+            yield from decode_segment(payload)
+
+
+def convert_log(date_str, log_dir, keep_jsonl=False):
+    """
+    Converts one day's JSONL log to a .seg file, checks that it reads back the
+    same rows, and removes the JSONL unless keep_jsonl. Returns (JSONL bytes, .seg bytes).
+    """
+    from src.log_analyzer import log_path, iter_log_entries
+
+    source = log_path(date_str, log_dir)
+    target = os.path.join(log_dir, f"daily_log_{date_str}{SEGMENT_SUFFIX}")
+    # Rows without a timestamp are skipped by every reader, so they are not carried over;
+    # a missing app name is filled in the way readers do (see log_analyzer.prepare_entry)
+    entries = [e for e in iter_log_entries(source) if isinstance(e, dict) and 'timestamp' in e]
+    for entry in entries:
+        entry.setdefault('app_name', 'Unknown')
+    write_segment_file(target, entries)
+    if list(iter_segment_entries(target)) != entries:
+        os.remove(target)
+        raise ValueError(f"{source}: converted rows do not read back identically")
+    sizes = os.path.getsize(source), os.path.getsize(target)
+    if not keep_jsonl:
+        os.remove(source)
+    return sizes
+
+
+if __name__ == "__main__":
+    from src.log_analyzer import LOG_DIR
+
+    parser = argparse.ArgumentParser(description='Convert finished daily_log_*.jsonl files to the compact .seg format.')
+    parser.add_argument('dates', nargs='*', help='Dates to convert (YYYY-MM-DD). Defaults to every day before today.')
+    parser.add_argument('--log-dir', default=LOG_DIR)
+    parser.add_argument('--keep-jsonl', action='store_true', help='Keep the JSONL files (the JSONL is then read instead of the .seg).')
+    args = parser.parse_args()
+
+    dates = args.dates
+    if not dates:
+        today = datetime.date.today().isoformat()
+        names = (os.path.basename(p) for p in glob.glob(os.path.join(args.log_dir, "daily_log_*.jsonl")))
+        dates = sorted(d for d in (n[len("daily_log_"):-len(".jsonl")] for n in names) if d < today)
+    for date_str in dates:
+        before, after = convert_log(date_str, args.log_dir, keep_jsonl=args.keep_jsonl)
+        print(f"{date_str}: {before:,} -> {after:,} bytes ({after / max(1, before):.0%})")
@@ -0,0 +1,186 @@
+"""
+Per-stage latency metrics for the capture daemon.
+
+Metrics.timed(stage, fn) wraps a pipeline stage (screen capture, app lookup,
+frame hashing, OCR, log append) so every call lands in a rolling histogram of
+the last WINDOW durations; incr() counts events such as skipped or empty
+frames and bytes written. Every `interval` seconds a snapshot with
+p50/p95/p99 per stage and all counters is written to the metrics file, as
+Prometheus text format when the path ends in .prom and as JSON otherwise.
+
+When metrics are disabled, NULL_METRICS is used instead: its timed() returns
+the function unchanged, so the hot path pays nothing.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+WINDOW = 1024          # most recent samples kept per stage
+SNAPSHOT_INTERVAL = 60  # seconds between metrics file updates
+QUANTILES = (50, 95, 99)
+PROM_PREFIX = "wc"
+
+
+class Histogram:
+    """Rolling window of durations (seconds) with nearest-rank percentiles."""
+
+    def __init__(self, window=WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0   # all-time, unlike samples
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, p, ordered=None):
+        ordered = ordered if ordered is not None else sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        summary = {f"p{p}": self.percentile(p, ordered) for p in QUANTILES}
+        summary.update(count=self.count, sum=self.total, max=ordered[-1] if ordered else 0.0)
+        return summary
+
+
+class Metrics:
+    """
+    Thread-safe stage timers and counters. path=None keeps everything in
+    memory (e.g. for --benchmark); otherwise snapshots are written to path.
+    gauges_fn() -> dict, if set, adds point-in-time values to each snapshot.
+    """
+
+    enabled = True
+
+    def __init__(self, path=None, interval=SNAPSHOT_INTERVAL, window=WINDOW, gauges_fn=None):
+        self.path = path
+        self.interval = interval
+        self.window = window
+        self.gauges_fn = gauges_fn
+        self.started = time.time()
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._next_write = time.monotonic() + interval
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.window)
+            histogram.observe(seconds)
+        self._maybe_write()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+        self._maybe_write()
+
+    def timed(self, stage, fn):
+        """Returns fn wrapped so that every call's duration is observed under stage."""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - start)
+        return wrapper
+
+    def snapshot(self):
+        with self._lock:
+            stages = {stage: h.summary() for stage, h in self.histograms.items()}
+            counters = dict(self.counters)
+        snapshot = {
+            'updated': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'uptime_seconds': time.time() - self.started,
+            'stages': stages,
+            'counters': counters,
+        }
+        if self.gauges_fn is not None:
+            snapshot['gauges'] = self.gauges_fn()
+        return snapshot
+
+    def _maybe_write(self):
+        if self.path is None or time.monotonic() < self._next_write:
+            return
+        with self._lock:
+            # Another thread may have taken this slot already
+            if time.monotonic() < self._next_write:
+                return
+            self._next_write = time.monotonic() + self.interval
+        self.write()
+
+    def write(self):
+        """Writes a snapshot to the metrics file now (atomically replacing it)."""
+        if self.path is None:
+            return
+        snapshot = self.snapshot()
+        if self.path.endswith(".prom"):
+            text = format_prometheus(snapshot)
+        else:
+            text = json.dumps(snapshot, ensure_ascii=False, indent=2) + "\n"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Failed to write metrics: {e}")
+
+
+class NullMetrics:
+    """Disabled metrics: every method is a no-op and timed() adds no wrapper."""
+
+    enabled = False
+
+    def observe(self, stage, seconds):
+        pass
+
+    def incr(self, name, n=1):
+        pass
+
+    def timed(self, stage, fn):
+        return fn
+
+    def snapshot(self):
+        return {'stages': {}, 'counters': {}}
+
+    def write(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _prom_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def format_prometheus(snapshot):
+    """Prometheus text exposition format for a snapshot."""
+    lines = [f"# TYPE {PROM_PREFIX}_stage_seconds summary"]
+    for stage, s in sorted(snapshot['stages'].items()):
+        for p in QUANTILES:
+            lines.append(f'{PROM_PREFIX}_stage_seconds{{stage="{stage}",quantile="{p / 100}"}} {s[f"p{p}"]:.6f}')
+        lines.append(f'{PROM_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {s["sum"]:.6f}')
+        lines.append(f'{PROM_PREFIX}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+    for name, value in sorted(snapshot['counters'].items()):
+        metric = f"{PROM_PREFIX}_{_prom_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted(snapshot.get('gauges', {}).items()):
+        metric = f"{PROM_PREFIX}_{_prom_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    lines.append(f"# TYPE {PROM_PREFIX}_uptime_seconds gauge")
+    lines.append(f"{PROM_PREFIX}_uptime_seconds {snapshot['uptime_seconds']:.1f}")
+    return "\n".join(lines) + "\n"
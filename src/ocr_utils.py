@@ -3,6 +3,8 @@ import Vision
 from Cocoa import NSURL, NSData, NSImage
 import CoreFoundation
 
+from src.frame_hash import dhash, HASH_WIDTH, HASH_HEIGHT
+
 def capture_screen_to_image():
     """
     Captures the main screen and returns a CGImage.
@@ -14,17 +16,40 @@ def capture_screen_to_image():
     image_ref = Quartz.CGDisplayCreateImage(display_id)
     return image_ref
 
-def recognize_text(image_ref):
+def capture_thumbnail(image_ref, width, height):
     """
-    Recognizes text in the given CGImage using Vision Framework.
+    Downsamples the CGImage into an 8-bit grayscale buffer (row-major, width x height).
+    """
+    color_space = Quartz.CGColorSpaceCreateDeviceGray()
+    buffer = bytearray(width * height)
+    context = Quartz.CGBitmapContextCreate(buffer, width, height, 8, width, color_space, Quartz.kCGImageAlphaNone)
+    Quartz.CGContextSetInterpolationQuality(context, Quartz.kCGInterpolationLow)
+    Quartz.CGContextDrawImage(context, Quartz.CGRectMake(0, 0, width, height), image_ref)
+    return bytes(buffer)
+
+def frame_fingerprint(image_ref):
+    """
+    Returns a 64-bit perceptual hash of the CGImage, or None if there is no image.
     """
     if image_ref is None:
-        return ""
+        return None
+    return dhash(capture_thumbnail(image_ref, HASH_WIDTH + 1, HASH_HEIGHT))
 
+def _new_text_request():
     text_request = Vision.VNRecognizeTextRequest.alloc().init()
     text_request.setRecognitionLevel_(Vision.VNRequestTextRecognitionLevelAccurate)
     text_request.setUsesLanguageCorrection_(True)
     text_request.setRecognitionLanguages_(["ja-JP", "en-US"]) # Prioritize Japanese and English
+    return text_request
+
+def recognize_text(image_ref):
+    """
+    Recognizes text in the given CGImage using Vision Framework.
+    """
+    if image_ref is None:
+        return ""
+
+    text_request = _new_text_request()
 
     handler = Vision.VNImageRequestHandler.alloc().initWithCGImage_options_(image_ref, None)
     
@@ -44,6 +69,40 @@ def recognize_text(image_ref):
         
     return "\n".join(extracted_text)
 
+def recognize_text_regions(image_ref, rects):
+    """
+    Recognizes text only inside the given regions of the CGImage.
+    rects are (x, y, width, height) normalized with a top-left origin.
+    Returns a list of (text, rect) with rect in the same full-frame coordinates.
+    """
+    if image_ref is None or not rects:
+        return []
+
+    requests = []
+    for x, y, w, h in rects:
+        text_request = _new_text_request()
+        # Vision uses a bottom-left origin
+        text_request.setRegionOfInterest_(Quartz.CGRectMake(x, 1.0 - y - h, w, h))
+        requests.append(text_request)
+
+    handler = Vision.VNImageRequestHandler.alloc().initWithCGImage_options_(image_ref, None)
+    success, error = handler.performRequests_error_(requests, None)
+
+    if not success:
+        print(f"Error executing text recognition: {error}")
+        return []
+
+    lines = []
+    for (rx, ry, rw, rh), text_request in zip(rects, requests):
+        for observation in text_request.results():
+            candidate = observation.topCandidates_(1)[0]
+            # Observation boxes are normalized to the region of interest
+            box = observation.boundingBox()
+            x = rx + box.origin.x * rw
+            y = ry + (1.0 - box.origin.y - box.size.height) * rh
+            lines.append((candidate.string(), (x, y, box.size.width * rw, box.size.height * rh)))
+    return lines
+
 def get_screen_text():
     """
     Captures the screen and returns the recognized text.
@@ -5,9 +5,12 @@ import configparser
 import pyautogui
 import pyperclip
 
+from src.perplexity_common import PERPLEXITY_URL, normalize_prompt_parts, select_search_mode, clean_response
+from src.screen_wait import ScreenWaiter, region_around, load_reference, save_reference
+
 PROMPT_FILE_PATH = "./outputs/daily_report_prompt.txt"
-PERPLEXITY_URL = "https://www.perplexity.ai/"
 CONFIG_FILE_PATH = "./config/perplexity_coordinates.ini"
+READY_IMAGE_PATH = "./config/copy_button_ready.png"
 
 # pyautoguiの設定
 pyautogui.PAUSE = 0.1
@@ -52,6 +55,8 @@ def load_config():
         result['wait_time'] = settings.getint('wait_time')
         result['browser_load_time'] = settings.getint('browser_load_time')
         result['paste_delay'] = settings.getint('paste_delay')
+        # 任意: 回答完了時のコピーボタン周辺の見本画像
+        result['copy_button_ready_image'] = settings.get('copy_button_ready_image', fallback='')
                 
     except (configparser.Error, ValueError, KeyError) as e:
         print(f"\n[ERROR] 設定ファイルが不完全または不正です: {CONFIG_FILE_PATH}")
@@ -97,6 +102,8 @@ def save_config(config_data):
         'browser_load_time': str(config_data['browser_load_time']),
         'paste_delay': str(config_data['paste_delay'])
     }
+    if config_data.get('copy_button_ready_image'):
+        config['settings']['copy_button_ready_image'] = config_data['copy_button_ready_image']
     
     with open(CONFIG_FILE_PATH, 'w') as f:
         config.write(f)
@@ -156,6 +163,11 @@ def setup_coordinates():
     
     x, y = get_position("回答のコピーボタン(回答生成後のアイコン)")
     config_data['copy_button'] = (x, y)
+    choice = input("回答完了の検出用に、コピーボタン周辺の画像を見本として保存しますか？ (y/n): ").strip().lower()
+    if choice == 'y':
+        save_reference((x, y), READY_IMAGE_PATH)
+        config_data['copy_button_ready_image'] = READY_IMAGE_PATH
+        print(f"見本画像を保存しました: {READY_IMAGE_PATH}")
     
     x, y = get_position("スクロール用フォーカス解除位置(画面上の何もない場所)")
     config_data['scroll_focus'] = (x, y)
@@ -173,29 +185,12 @@ def setup_coordinates():
     save_config(config_data)
     return config_data
 
-def select_search_mode():
-    """Select search mode."""
-    print("\n検索モードを選択してください:")
-    print("1: Normal検索")
-    print("2: Deep Research")
-    while True:
-        choice = input("選択 (1 または 2): ").strip()
-        if choice == '1':
-            return 'normal'
-        elif choice == '2':
-            return 'deep'
-        else:
-            print("1または2で選択してください。")
-
 def submit_to_perplexity(prompt_parts):
     """
     Submits the prompt(s) to Perplexity using pyautogui.
     prompt_parts can be a string, list, or dict.
     """
-    if isinstance(prompt_parts, str):
-        prompt_parts = {"プロンプト": prompt_parts}
-    elif isinstance(prompt_parts, list):
-        prompt_parts = {f"パーツ {i+1}": p for i, p in enumerate(prompt_parts)}
+    prompt_parts = normalize_prompt_parts(prompt_parts)
         
     print("Perplexityに送信します...")
     total_len = sum(len(p) for p in prompt_parts.values())
@@ -207,14 +202,26 @@ def submit_to_perplexity(prompt_parts):
     # Select search mode
     search_mode = select_search_mode()
     
+    # Each wait returns as soon as the screen around the coordinate settles;
+    # the configured times are upper bounds (see screen_wait)
+    waiter = ScreenWaiter()
+    input_region = region_around(config_data['input_field'])
+    copy_region = region_around(config_data['copy_button'])
+    ready_image = load_reference(config_data['copy_button_ready_image'])
+    before_launch = waiter.snapshot(input_region)
+
     # Open Perplexity in default browser (Brave)
     print(f"Perplexityを開いています: {PERPLEXITY_URL}")
     webbrowser.open(PERPLEXITY_URL)
-    
+
     # Wait for browser to load
     load_time = config_data['browser_load_time']
-    print(f"ブラウザの読み込みを待機中 ({load_time}秒)...")
-    time.sleep(load_time)
+    print(f"ブラウザの読み込みを待機中 (最大{load_time}秒)...")
+    # Whatever window sat under the input field before the launch is stable too,
+    # so the page only counts as loaded once the region has changed from it
+    elapsed, _ = waiter.wait('browser_load', input_region, load_time, stable_for=1.5, min_wait=1.0,
+                             require_change=True, initial=before_launch)
+    print(f"読み込み完了 ({elapsed:.1f}秒)")
     
     # Click search mode button
     if search_mode == 'normal':
@@ -252,8 +259,8 @@ def submit_to_perplexity(prompt_parts):
     
     # Wait for all pastes to complete
     paste_delay = config_data['paste_delay']
-    print(f"貼り付け完了を待機中 ({paste_delay}秒)...")
-    time.sleep(paste_delay)
+    print(f"貼り付け完了を待機中 (最大{paste_delay}秒)...")
+    waiter.wait('paste', input_region, paste_delay, stable_for=1.0)
     
     # Click submit button
     submit_pos = config_data['submit_button']
@@ -264,11 +271,16 @@ def submit_to_perplexity(prompt_parts):
     
     # Automatic post-submission sequence
     wait_sec = config_data['wait_time']
-    print(f"\n回答生成を待機中 ({wait_sec}秒)...")
-    for i in range(wait_sec, 0, -1):
-        print(f"残り: {i}秒 ", end='\r')
-        time.sleep(1)
-    print("\n待機完了。")
+    print(f"\n回答生成を待機中 (最大{wait_sec}秒)...")
+    # Deep Research answers take far longer than normal ones, so each mode has
+    # its own history. With a ready image the wait ends as soon as the answer is
+    # done, so the configured time is kept as the bound instead of a tuned one
+    # that could cut a slow answer short and copy it unfinished.
+    elapsed, ready = waiter.wait(
+        f'answer_{search_mode}', copy_region, wait_sec, ready=ready_image, stable_for=3.0, require_change=True,
+        progress=lambda elapsed, limit: print(f"経過: {int(elapsed)}秒 / 最大{int(limit)}秒 ", end='\r'),
+        tune=ready_image is None)
+    print(f"\n待機完了 ({elapsed:.1f}秒{'' if ready else '、上限に到達'})。")
     
     # Click neutral area to lose focus from input field
     scroll_focus_pos = config_data['scroll_focus']
@@ -279,7 +291,7 @@ def submit_to_perplexity(prompt_parts):
     # Scroll to bottom
     print("一番下までスクロール中...")
     pyautogui.press('end')
-    time.sleep(3)
+    waiter.wait('scroll', copy_region, 3, ready=ready_image, stable_for=0.5)
     
     # Click copy button
     copy_pos = config_data['copy_button']
@@ -290,24 +302,12 @@ def submit_to_perplexity(prompt_parts):
     print("回答をコピーしました！")
     
     response = pyperclip.paste()
+    waiter.history.save()
     
     if not response:
         return "エラー: クリップボードが空でした。"
     
-    # Clean up response preamble
-    # The template starts with titles like "作業日報 YY-MM-DD" or similar.
-    # We look for the first occurrence of "# 作業日報" or simply "作業日報" to find the start.
-    target_marker = "作業日報"
-    if target_marker in response:
-        start_index = response.find(target_marker)
-        # If there's a '#' before it, include it.
-        if start_index > 0 and response[start_index-1] == "#":
-            start_index -= 1
-        
-        print(f"回答から導入文を検出しました。キーワード '{target_marker}' 以降を抽出します。")
-        response = response[start_index:].strip()
-    
-    return response
+    return clean_response(response)
 
 def submit_to_gemini(prompt, prompt_file_path=None):
     """Wrapper function for backward compatibility."""
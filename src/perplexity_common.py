@@ -0,0 +1,48 @@
+"""
+Helpers shared by the Perplexity submitters (pyautogui and Playwright).
+"""
+
+PERPLEXITY_URL = "https://www.perplexity.ai/"
+
+
+def normalize_prompt_parts(prompt_parts):
+    """prompt_parts can be a string, list, or dict. Returns a dict of title -> content."""
+    if isinstance(prompt_parts, str):
+        return {"プロンプト": prompt_parts}
+    if isinstance(prompt_parts, list):
+        return {f"パーツ {i+1}": p for i, p in enumerate(prompt_parts)}
+    return prompt_parts
+
+
+def select_search_mode():
+    """Select search mode."""
+    print("\n検索モードを選択してください:")
+    print("1: Normal検索")
+    print("2: Deep Research")
+    while True:
+        choice = input("選択 (1 または 2): ").strip()
+        if choice == '1':
+            return 'normal'
+        elif choice == '2':
+            return 'deep'
+        else:
+            print("1または2で選択してください。")
+
+
+def clean_response(response):
+    """
+    Clean up response preamble.
+    The template starts with titles like "作業日報 YY-MM-DD" or similar.
+    We look for the first occurrence of "# 作業日報" or simply "作業日報" to find the start.
+    """
+    target_marker = "作業日報"
+    if target_marker in response:
+        start_index = response.find(target_marker)
+        # If there's a '#' before it, include it.
+        if start_index > 0 and response[start_index-1] == "#":
+            start_index -= 1
+
+        print(f"回答から導入文を検出しました。キーワード '{target_marker}' 以降を抽出します。")
+        response = response[start_index:].strip()
+
+    return response
@@ -0,0 +1,159 @@
+"""
+Perplexity submitter driven by Playwright instead of screen coordinates.
+
+Each prompt part is pasted into the input element, like the pyautogui
+submitter does, so Perplexity turns long parts into the attachments the
+template refers to (「添付ファイル」). Completion is detected from the page
+itself: a new copy button has appeared, it is enabled, and the streaming
+indicator is gone. The answer is read from the DOM, so the system clipboard
+is never involved and there is no fixed wait time.
+"""
+import os
+import configparser
+
+from src.perplexity_common import PERPLEXITY_URL, normalize_prompt_parts, clean_response
+
+CONFIG_FILE_PATH = "./config/perplexity_playwright.ini"
+
+DEFAULT_SELECTORS = {
+    'input': '#ask-input, textarea',
+    'submit': 'button[aria-label="Submit"]',
+    'streaming': 'button[aria-label="Stop"]',
+    'copy_button': 'button[aria-label="Copy"]',
+    'answer': '.prose',
+    'normal_search': '',
+    'deep_research': '',
+}
+DEFAULT_SETTINGS = {
+    'user_data_dir': '~/.auto-daily-report/playwright-profile',
+    'headless': False,
+    'answer_timeout': 600,
+}
+
+# True once the answer has finished streaming: a copy button newer than the
+# ones present before submitting exists and is enabled, and no streaming
+# indicator is visible.
+ANSWER_COMPLETE_JS = """
+([copySelector, streamingSelector, copiesBefore]) => {
+    const copies = document.querySelectorAll(copySelector);
+    if (copies.length <= copiesBefore) return false;
+    const last = copies[copies.length - 1];
+    if (last.disabled || last.getAttribute('aria-disabled') === 'true') return false;
+    const streaming = streamingSelector ? document.querySelector(streamingSelector) : null;
+    return !streaming || streaming.offsetParent === null;
+}
+"""
+
+
+# Pastes text into the element as a clipboard paste would. Returns true if the
+# page handled the paste itself (e.g. made it an attachment); otherwise the
+# caller types the text in, as a real paste would have inserted it.
+PART_SEPARATOR = "\n\n"  # between parts typed into the box, so they do not run together
+
+PASTE_JS = """
+(element, text) => {
+    const data = new DataTransfer();
+    data.setData('text/plain', text);
+    element.focus();
+    const paste = new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true});
+    return !element.dispatchEvent(paste);
+}
+"""
+
+
+def load_config(path=CONFIG_FILE_PATH):
+    """Returns (selectors, settings). Missing values fall back to the defaults."""
+    config = configparser.ConfigParser()
+    config.read(path)
+    selectors = dict(DEFAULT_SELECTORS)
+    if config.has_section('selectors'):
+        selectors.update({k: v.strip() for k, v in config['selectors'].items()})
+    settings = dict(DEFAULT_SETTINGS)
+    if config.has_section('settings'):
+        section = config['settings']
+        settings['user_data_dir'] = section.get('user_data_dir', settings['user_data_dir'])
+        settings['headless'] = section.getboolean('headless', settings['headless'])
+        settings['answer_timeout'] = section.getint('answer_timeout', settings['answer_timeout'])
+    return selectors, settings
+
+
+def wait_for_answer(page, selectors, copies_before, timeout):
+    """Blocks until the page reports a finished answer. timeout is in seconds."""
+    page.wait_for_function(
+        ANSWER_COMPLETE_JS,
+        arg=[selectors['copy_button'], selectors['streaming'], copies_before],
+        timeout=timeout * 1000,
+        polling=250,
+    )
+
+
+def paste_parts(page, input_box, prompt_parts):
+    """
+    Pastes each part into input_box in order, one paste per part like the
+    pyautogui submitter. Parts the page does not take over are inserted as
+    text, separated from the part before by PART_SEPARATOR.
+    """
+    for i, (title, content) in enumerate(prompt_parts.items()):
+        print(f"「{title}」を貼り付け中...")
+        if not input_box.evaluate(PASTE_JS, content):
+            page.keyboard.insert_text(PART_SEPARATOR + content if i else content)
+
+
+def ask(page, prompt_parts, search_mode, url, selectors, answer_timeout):
+    """
+    Drives an open page through one question and returns the answer text.
+    Raises the page's timeout error if the answer does not finish in time.
+    """
+    print(f"Perplexityを開いています: {url}")
+    page.goto(url)
+
+    mode_selector = selectors.get('deep_research' if search_mode == 'deep' else 'normal_search')
+    if search_mode and mode_selector:
+        page.locator(mode_selector).first.click()
+
+    input_box = page.locator(selectors['input']).first
+    input_box.wait_for()
+    paste_parts(page, input_box, prompt_parts)
+
+    copies_before = page.locator(selectors['copy_button']).count()
+    page.locator(selectors['submit']).first.click()
+    print("検索を実行しました！回答の完了を待機中...")
+
+    wait_for_answer(page, selectors, copies_before, answer_timeout)
+    return page.locator(selectors['answer']).last.inner_text()
+
+
+def submit_with_playwright(prompt_parts, search_mode=None, url=PERPLEXITY_URL, selectors=None, settings=None):
+    """
+    Submits the prompt(s) to Perplexity with Playwright and returns the answer text.
+    prompt_parts can be a string, list, or dict.
+    """
+    try:
+        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+    except ImportError:
+        return "エラー: playwright がインストールされていません。'pip install playwright && playwright install chromium' を実行してください。"
+
+    file_selectors, file_settings = load_config()
+    selectors = selectors or file_selectors
+    settings = settings or file_settings
+
+    prompt_parts = normalize_prompt_parts(prompt_parts)
+    print("Perplexityに送信します (Playwright)...")
+    print(f"プロンプト合計長: {sum(len(p) for p in prompt_parts.values())}文字 (分割数: {len(prompt_parts)})")
+
+    with sync_playwright() as p:
+        context = p.chromium.launch_persistent_context(
+            os.path.expanduser(settings['user_data_dir']), headless=settings['headless'])
+        try:
+            page = context.pages[0] if context.pages else context.new_page()
+            try:
+                response = ask(page, prompt_parts, search_mode, url, selectors, settings['answer_timeout'])
+            except PlaywrightTimeoutError:
+                return f"エラー: {settings['answer_timeout']}秒以内に回答の完了を検出できませんでした。"
+        finally:
+            context.close()
+
+    print("回答を取得しました！")
+    if not response:
+        return "エラー: 回答が空でした。"
+    return clean_response(response)
@@ -1,99 +1,308 @@
-import json
 import datetime
 import os
-from src.calendar_utils import get_todays_events
+import queue
+import threading
+import time
+from src.calendar_utils import get_todays_event_items, event_start_summary, event_interval
+from src.blob_store import BlobStore
+from src.log_analyzer import LOG_DIR, find_log, stream_log, default_aggregators, format_log_line, AppCountAggregator
+from src.sessions import SessionAggregator, IDLE_THRESHOLD, render_overlap_table
+from src.condenser import BlockAggregator, condense_blocks
+from src.log_checkpoint import stream_log_checkpointed
+from src.time_index import stream_log_window
+from src.live_stats import restore_live
+from src.summary_sidecar import load_day_summary, period_dates, render_period
 
-LOG_DIR = "logs"
 TEMPLATE_DIR = "templates"
+PERIOD_LABELS = {'week': "週報", 'month': "月報"}
+CALENDAR_TIMEOUT = 20  # seconds to wait for the calendar before building the prompt without it
+SUMMARY_CHARS = 500    # main.append_log cuts text_summary here
 
 def calculate_app_usage_stats(date_str):
     """
     Logs data からアプリごとの使用回数を集計し、
     概要テキストを生成する。
     """
-    filename = os.path.join(LOG_DIR, f"daily_log_{date_str}.jsonl")
-    if not os.path.exists(filename):
-        return ""
-    
-    stats = {}
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
-            try:
-                entry = json.loads(line)
-                app_name = entry.get('app_name', 'Unknown')
-                stats[app_name] = stats.get(app_name, 0) + 1
-            except json.JSONDecodeError:
-                continue
+    counts = AppCountAggregator()
+    for _ in stream_log(date_str, [counts]):
+        pass
+    return "\n".join(counts.render())
 
-    if not stats:
-        return ""
+_blob_stores = {}
 
-    # Sort by frequency
-    sorted_stats = sorted(stats.items(), key=lambda x: x[1], reverse=True)
-    
-    lines = ["\n### アプリ使用統計 (キャプチャ頻度)"]
-    lines.append("| アプリケーション | キャプチャ回数 |")
-    lines.append("|---|---|")
-    for app, count in sorted_stats:
-        lines.append(f"| {app} | {count}回 |")
-    
-    return "\n".join(lines)
+def get_full_text(date_str, entry):
+    """
+    ログ行の全文OCRテキストを返す。全文はその日のblobストアから必要な時だけ読み込む。
+    text_ref を持たない古いログ行では text_summary を返す。
+    """
+    text_ref = entry.get('text_ref')
+    if text_ref:
+        store = _blob_stores.get(date_str)
+        if store is None:
+            store = _blob_stores[date_str] = BlobStore(LOG_DIR, date_str)
+        text = store.get(text_ref)
+        if text is not None:
+            return text
+    return entry.get('text_summary', '')
+
+def full_text_line(date_str):
+    """
+    format_log_line の代わりに使う整形関数を返す。text_summary が切り詰められた行だけ
+    blobストアから全文を読み込んで掲載する。
+    """
+    def format_line(entry):
+        summary = entry.get('text_summary', '')
+        if entry.get('type') is None and len(summary) >= SUMMARY_CHARS:
+            entry = dict(entry, text_summary=get_full_text(date_str, entry).replace("\n", " "))
+        return format_log_line(entry)
+    return format_line
 
 def get_log_content(date_str):
-    filename = os.path.join(LOG_DIR, f"daily_log_{date_str}.jsonl")
-    if not os.path.exists(filename):
+    if find_log(date_str) is None:
         return None
-    
-    log_lines = []
-    with open(filename, 'r', encoding='utf-8') as f:
-        for line in f:
+    return "\n".join(stream_log(date_str))
+
+def iter_log_section(date_str, aggregators, budget=None, since=None, until=None, live=True, full_text=False):
+    """
+    ログ部分のプロンプトを1行ずつ返すジェネレータ。
+    ログは1回だけ読み込み、その間に aggregators の集計を行い、最後に統計表を続ける。
+    前回実行時のチェックポイントがあれば、それ以降に追記された行だけを読み込む (log_checkpoint を参照)。
+    今日のログで記録中の main.py が応答する場合は、ログを読まずにその集計結果を使う (live_stats を参照。live=False で無効)。
+    budget (文字数) を指定すると、ログ行はアプリごとの時間ブロックに要約して budget 以内に収める。
+    since / until ('HH:MM:SS') を指定すると、時刻索引 (time_index) を使ってその時間帯の行だけを読み込む。
+    full_text=True では、500文字で切り詰められた行を全文で掲載する (full_text_line を参照)。
+    チェックポイントと記録中の main.py は要約の行しか持たないため、その場合はログを全て読み直す。
+    budget 指定時はブロック要約に代表テキストしか載らないため full_text は使わない。
+    """
+    if find_log(date_str) is None:
+        yield "（ログファイルが見つかりません。）"
+        return
+
+    windowed = since or until
+    used = 0  # characters of the notes above the log lines, which count against budget
+    if windowed:
+        note = f"（{(since or '')[:5]}〜{(until or '')[:5]} の記録のみ）"
+        used += len(note) + 1
+        yield note
+    # Only the running capture process knows today's log; other days go straight to disk
+    live = live and not windowed and date_str == datetime.date.today().isoformat()
+
+    if budget:
+        blocks = BlockAggregator()
+        if windowed:
+            entries = stream_log_window(date_str, list(aggregators.values()) + [blocks], since, until)
+        elif live and restore_live(date_str, dict(aggregators, blocks=blocks), keep_lines=False, log_dir=LOG_DIR) is not None:
+            entries = []
+        else:
+            entries = stream_log_checkpointed(date_str, dict(aggregators, blocks=blocks), keep_lines=False)
+        for _ in entries:
+            pass
+        note = f"（ログは{budget}文字以内に要約済み: 同じアプリが続く区間を1ブロックにまとめ、代表的な画面テキストのみ掲載）"
+        used += len(note) + 1
+        yield note
+        yield from condense_blocks(blocks.blocks, max(0, budget - used))
+    elif windowed:
+        yield from stream_log_window(date_str, aggregators.values(), since, until,
+                                     format_fn=full_text_line(date_str) if full_text else format_log_line)
+    elif full_text:
+        yield from stream_log(date_str, aggregators.values(), format_fn=full_text_line(date_str))
+    else:
+        lines = restore_live(date_str, aggregators, log_dir=LOG_DIR) if live else None
+        if lines is not None:
+            yield from lines
+        else:
+            yield from stream_log_checkpointed(date_str, aggregators)
+    for key in ('sessions', 'counts', 'hourly', 'switches'):
+        yield from aggregators[key].render()
+
+class CallTimeout(Exception):
+    """
+    A background call did not finish in time. Kept apart from TimeoutError,
+    which network errors raised inside the call (socket.timeout) also are.
+    """
+
+class _BackgroundCall:
+    """
+    Runs fn(*args) on a daemon thread. A hung call (e.g. an OAuth flow waiting
+    for the browser) never blocks the caller past its timeout or process exit.
+    """
+
+    def __init__(self, fn, *args):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        threading.Thread(target=self._run, args=(fn, args), daemon=True).start()
+
+    def _run(self, fn, args):
+        try:
+            self._result = fn(*args)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise CallTimeout()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+def prefetch_events(date_strs, timeout=CALENDAR_TIMEOUT):
+    """
+    Fetches calendar events for several dates (YYYY-MM-DD) one after another on
+    a daemon thread, reusing one calendar client and cache for all of them.
+    Yields (date_str, events, seconds) as each date arrives, in order. A date
+    that does not arrive within timeout seconds of the previous one, and every
+    date after it, gets a CallTimeout in place of its events; either value can
+    be passed to generate_prompt_parts(events=...).
+    """
+    results = queue.Queue()
+
+    def fetch_all():
+        for date_str in date_strs:
+            started = time.perf_counter()
+            try:
+                events = get_todays_event_items(datetime.datetime.strptime(date_str, "%Y-%m-%d"))
+            except Exception as e:
+                events = e
+            results.put((date_str, events, time.perf_counter() - started))
+
+    threading.Thread(target=fetch_all, daemon=True).start()
+    timed_out = False
+    for date_str in date_strs:
+        if not timed_out:
             try:
-                entry = json.loads(line)
-                # Reformat for the prompt
-                log_lines.append(f"{entry['timestamp']} | {entry['app_name']} | {entry.get('text_summary', '')}")
-            except json.JSONDecodeError:
+                yield results.get(timeout=timeout)
                 continue
-    
-    return "\n".join(log_lines)
+            except queue.Empty:
+                # The fetch thread is stuck; later results would arrive out of step
+                timed_out = True
+        yield date_str, CallTimeout(), None
 
-def generate_prompt_parts(target_date_str):
+def _prefetched(events):
+    if isinstance(events, Exception):
+        raise events
+    return events
+
+def load_template(name="report_prompt_template.txt"):
+    template_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), TEMPLATE_DIR, name)
+    try:
+        with open(template_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def _time_on(day, hhmmss):
+    hours, minutes, seconds = map(int, hhmmss.split(":"))
+    return day + datetime.timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+def generate_prompt_parts(target_date_str, idle_threshold=IDLE_THRESHOLD, budget=None, calendar_timeout=CALENDAR_TIMEOUT,
+                          events=None, since=None, until=None, live=True, full_text=False):
     """
     Generate the prompt sections for given date.
+    Calendar retrieval, template loading and log streaming run concurrently;
+    the calendar leg gives up after calendar_timeout seconds.
+    budget: optional character budget for the log lines (see condenser).
+    events: already fetched event items (or the exception fetching them raised),
+    e.g. from prefetch_events(); the calendar is then not contacted.
+    since / until: optional 'HH:MM:SS' bounds; only that part of the day is read
+    (see time_index) and only overlapping events are joined against it.
+    live: use the running capture process's in-memory stats for today (see live_stats).
+    full_text: show the full OCR text of rows whose summary was cut (see full_text_line).
     Returns (instructions, logs_with_stats)
     """
-    # 1. Get Calendar Events
     target_date = datetime.datetime.strptime(target_date_str, "%Y-%m-%d")
+    deadline = time.monotonic() + calendar_timeout
+
+    # 1. Start Calendar and Template legs in the background
+    if events is None:
+        calendar_call = _BackgroundCall(get_todays_event_items, target_date)
+    else:
+        calendar_call = _BackgroundCall(_prefetched, events)
+    template_call = _BackgroundCall(load_template)
+
+    # 2. Stream Work Logs and Calculate Stats in a single pass (on this thread)
+    aggregators = default_aggregators()
+    aggregators['sessions'] = SessionAggregator(idle_threshold)
+    log_lines = list(iter_log_section(target_date_str, aggregators, budget, since, until, live, full_text))
+
+    # 3. Collect Calendar Events
+    event_intervals = []
     try:
-        events = get_todays_events(target_date)
+        events = calendar_call.result(timeout=max(0.0, deadline - time.monotonic()))
         events_text = ""
         if events:
-            for start, summary in events:
+            for event in events:
+                start, summary = event_start_summary(event)
                 events_text += f"- {start}: {summary}\n"
+            event_intervals = [i for i in map(event_interval, events) if i]
+            if since:
+                event_intervals = [i for i in event_intervals if i[1] > _time_on(target_date, since)]
+            if until:
+                event_intervals = [i for i in event_intervals if i[0] < _time_on(target_date, until)]
         else:
             events_text = "（予定なし）"
+    except CallTimeout:
+        events_text = f"（予定取得中にタイムアウト: {calendar_timeout}秒以内に取得できませんでした）"
     except Exception as e:
         events_text = f"（カレンダー取得エラー: {e}）"
 
-    # 2. Get Work Logs
-    log_content = get_log_content(target_date_str)
-    if not log_content:
-        log_content = "（ログファイルが見つかりません。）"
-
-    # 3. Calculate Stats
-    stats_text = calculate_app_usage_stats(target_date_str)
-    
-    full_logs_with_stats = log_content + "\n" + stats_text
+    if find_log(target_date_str) is not None:
+        log_lines.extend(render_overlap_table(aggregators['sessions'].sessions, event_intervals))
+    full_logs_with_stats = "\n".join(log_lines)
 
     # 4. Load Template
-    template_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), TEMPLATE_DIR, "report_prompt_template.txt")
-    try:
-        with open(template_path, "r", encoding="utf-8") as f:
-            template = f.read()
-    except FileNotFoundError:
+    template = template_call.result()
+    if template is None:
         return None, None
 
     # 5. Build instructions
     parts = template.split("{daily_logs}")
-    instructions = parts[0].format(calendar_events=events_text, date=target_date_str).strip() + "\n"
-    
+    instructions = parts[0].format(
+        calendar_events=events_text,
+        date=target_date_str,
+        record_period=aggregators['time_range'].period_text(),
+        capture_count=aggregators['counts'].total,
+    ).strip() + "\n"
+
     return instructions, full_logs_with_stats
+
+def _event_intervals(date_str, calendar_timeout=CALENDAR_TIMEOUT):
+    """Calendar intervals for one day; raises CallTimeout if the calendar does not answer in time."""
+    if calendar_timeout <= 0:
+        raise CallTimeout()
+    events = _BackgroundCall(get_todays_event_items, datetime.datetime.strptime(date_str, "%Y-%m-%d"))
+    return [i for i in map(event_interval, events.result(timeout=calendar_timeout)) if i]
+
+def generate_period_prompt_parts(period, target_date_str, idle_threshold=IDLE_THRESHOLD, calendar_timeout=CALENDAR_TIMEOUT):
+    """
+    Generate the prompt sections for the week ('week') or month ('month')
+    containing the given date, from per-day summary sidecars only
+    (see summary_sidecar). Stale or missing sidecars are rebuilt first.
+    calendar_timeout bounds all calendar requests of the period together;
+    days rebuilt after it has passed get no events and are retried next time.
+    Returns (instructions, period_data, first date, last date)
+    """
+    dates = period_dates(period, datetime.date.fromisoformat(target_date_str))
+    # One deadline for the period, so a hung calendar costs calendar_timeout once rather than per day
+    deadline = time.monotonic() + calendar_timeout
+    summaries = []
+    for date_str in dates:
+        summary = load_day_summary(date_str, lambda d: _event_intervals(d, deadline - time.monotonic()), idle_threshold)
+        if summary is not None:
+            summaries.append(summary)
+
+    template = load_template("period_report_prompt_template.txt")
+    if template is None:
+        return None, None, dates[0], dates[-1]
+
+    parts = template.split("{period_logs}")
+    instructions = parts[0].format(
+        period_label=PERIOD_LABELS[period],
+        start_date=dates[0],
+        end_date=dates[-1],
+        recorded_days=len(summaries),
+        capture_count=sum(s['capture_count'] for s in summaries),
+    ).strip() + "\n"
+    return instructions, "\n".join(render_period(summaries, len(dates))), dates[0], dates[-1]
@@ -0,0 +1,168 @@
+"""
+Screen-state polling for the coordinate-based Perplexity submitter.
+
+Instead of sleeping a fixed time, each phase polls a small screen region
+around one of the configured coordinates and returns as soon as the region
+matches a "ready" reference image or has stopped changing. Every phase keeps
+its configured wait as an upper bound.
+
+Measured phase durations are kept in cache/perplexity_timings.json. Once a
+phase has enough history its upper bound is tightened to 1.5x its p95 (never
+above the configured value); a phase that hits its bound falls back to the
+configured value on the next run. Phases whose duration depends on a setting
+(the answer wait per search mode) are recorded under separate names.
+"""
+import json
+import os
+import time
+
+TIMINGS_PATH = os.path.join("cache", "perplexity_timings.json")
+REGION_SIZE = 80          # pixels around the watched coordinate
+POLL_INTERVAL = 0.25      # seconds between screenshots
+SIGNATURE_SIZE = 16       # grayscale thumbnail edge used for comparisons
+TOLERANCE = 6             # mean absolute difference (0-255) still counted as equal
+HISTORY_LENGTH = 50       # durations kept per phase
+MIN_HISTORY = 5           # runs before the history is used for tuning
+TUNE_FACTOR = 1.5
+MIN_TUNED = 2.0           # seconds; tuned bounds never go below this
+
+
+def region_around(point, size=REGION_SIZE):
+    """(left, top, width, height) of a size x size square centred on point."""
+    x, y = point
+    return (max(0, x - size // 2), max(0, y - size // 2), size, size)
+
+
+def grab_region(region):
+    import pyautogui
+    return pyautogui.screenshot(region=region)
+
+
+def image_signature(image):
+    """Small grayscale thumbnail of a PIL image, as bytes."""
+    return image.convert('L').resize((SIGNATURE_SIZE, SIGNATURE_SIZE)).tobytes()
+
+
+def load_reference(path):
+    """Signature of a saved reference image, or None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    from PIL import Image
+    with Image.open(path) as image:
+        return image_signature(image)
+
+
+def save_reference(point, path, size=REGION_SIZE):
+    """Saves the region around point as a reference image for later waits."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    grab_region(region_around(point, size)).save(path)
+
+
+def signatures_match(a, b, tolerance=TOLERANCE):
+    if a is None or b is None or len(a) != len(b):
+        return False
+    return sum(abs(x - y) for x, y in zip(a, b)) / max(1, len(a)) <= tolerance
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class TimingHistory:
+    """Per-phase wait durations persisted as JSON."""
+
+    def __init__(self, path=TIMINGS_PATH):
+        self.path = path
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.phases = json.load(f)
+        except (OSError, ValueError):
+            self.phases = {}
+
+    def record(self, phase, seconds, timed_out):
+        runs = self.phases.setdefault(phase, [])
+        runs.append({'seconds': round(seconds, 3), 'timed_out': timed_out})
+        del runs[:-HISTORY_LENGTH]
+
+    def limit(self, phase, configured):
+        """Upper bound for the phase: tuned from history, never above configured."""
+        runs = self.phases.get(phase, [])
+        if len(runs) < MIN_HISTORY or runs[-1]['timed_out']:
+            return configured
+        tuned = _percentile([r['seconds'] for r in runs], 0.95) * TUNE_FACTOR
+        return min(configured, max(MIN_TUNED, tuned))
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.phases, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class ScreenWaiter:
+    """
+    grab(region) returns a screenshot and signature(image) turns it into
+    comparable bytes; both are injectable so the logic runs without a screen.
+    """
+
+    def __init__(self, history=None, grab=grab_region, signature=image_signature,
+                 poll_interval=POLL_INTERVAL, clock=time.monotonic, sleep=time.sleep):
+        self.history = history if history is not None else TimingHistory()
+        self.grab = grab
+        self.signature = signature
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+
+    def snapshot(self, region):
+        """Signature of the region as it looks now, e.g. before launching an app (see wait's initial)."""
+        return self.signature(self.grab(region))
+
+    def wait(self, phase, region, max_wait, ready=None, stable_for=1.0,
+             require_change=False, min_wait=0.0, progress=None, tune=True, initial=None):
+        """
+        Polls region until it matches the ready signature (if given) or has
+        not changed for stable_for seconds. With require_change, stability only
+        counts after the region first differed from initial (a snapshot taken
+        earlier), or from how it looked at the start of the wait. Only waits
+        that saw such a change are recorded in the history.
+        Gives up after the phase's limit (see TimingHistory.limit), or after
+        max_wait itself when tune is False.
+        Returns (seconds waited, True if the UI was detected ready).
+        """
+        limit = self.history.limit(phase, max_wait) if tune else max_wait
+        started = self.clock()
+        previous = self.snapshot(region)
+        if initial is None:
+            initial = previous
+        changed = not require_change or not signatures_match(previous, initial)
+        stable_since = started
+        ready_seen = False
+
+        while True:
+            elapsed = self.clock() - started
+            if ready is not None and signatures_match(previous, ready):
+                ready_seen = elapsed >= min_wait
+            elif ready is None and changed and self.clock() - stable_since >= stable_for:
+                ready_seen = elapsed >= min_wait
+            if ready_seen or elapsed >= limit:
+                break
+            if progress:
+                progress(elapsed, limit)
+            self.sleep(self.poll_interval)
+
+            current = self.snapshot(region)
+            if not signatures_match(current, previous):
+                stable_since = self.clock()
+            if not changed and not signatures_match(current, initial):
+                changed = True
+                stable_since = self.clock()
+            previous = current
+
+        elapsed = self.clock() - started
+        if changed:
+            # A region that never changed says nothing about how long the phase takes
+            self.history.record(phase, elapsed, not ready_seen)
+        return elapsed, ready_seen
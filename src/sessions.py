@@ -0,0 +1,157 @@
+"""
+Time-weighted app sessions.
+
+Turns the timestamped log into contiguous per-app intervals. Each capture
+counts until the next one, but a gap longer than the idle threshold only
+counts up to the threshold (the machine slept or the user was away), so
+durations stay right when capture intervals vary or captures are skipped.
+Rows written with an adaptive capture interval record it ('interval'); a
+gap the scheduler planned (up to INTERVAL_SLACK times that interval) is not
+idle time even when it exceeds the threshold.
+The resulting intervals can be joined against calendar events.
+"""
+import datetime
+
+from src.log_analyzer import entry_datetime
+
+IDLE_THRESHOLD = 180      # seconds; longer gaps are not counted as usage
+DEFAULT_INTERVAL = 60     # seconds a capture covers when nothing follows it
+INTERVAL_SLACK = 1.25     # a planned interval may run this much late and still count fully
+
+
+class Session:
+    def __init__(self, app_name, start, end):
+        self.app_name = app_name
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"Session({self.app_name!r}, {self.start:%H:%M:%S}-{self.end:%H:%M:%S})"
+
+
+def format_duration(delta):
+    minutes = int(delta.total_seconds()) // 60
+    return f"{minutes // 60}時間{minutes % 60:02d}分"
+
+
+class SessionAggregator:
+    """Builds sessions while the log is streamed (see log_analyzer.stream_log)."""
+
+    def __init__(self, idle_threshold=IDLE_THRESHOLD):
+        self.idle = datetime.timedelta(seconds=idle_threshold)
+        self.sessions = []
+        self._current = None    # Session being extended
+        self._last_seen = None  # time of the last capture in the current session
+        self._last_interval = None
+
+    def add(self, entry):
+        start = entry_datetime(entry['date'], entry['timestamp'])
+        end = entry_datetime(entry['date'], entry['end']) if 'end' in entry else start
+        current = self._current
+
+        if current is not None:
+            gap = start - self._last_seen
+            allowed = self._allowed_gap()
+            if current.app_name == entry['app_name'] and gap <= allowed:
+                current.end = end
+                self._last_seen = end
+                self._last_interval = entry.get('interval')
+                return
+            current.end = self._last_seen + min(max(gap, datetime.timedelta(0)), allowed)
+
+        self._current = Session(entry['app_name'], start, end)
+        self.sessions.append(self._current)
+        self._last_seen = end
+        self._last_interval = entry.get('interval')
+
+    def _allowed_gap(self):
+        """Longest gap after the last capture that still counts as usage."""
+        if not self._last_interval:
+            return self.idle
+        return max(self.idle, datetime.timedelta(seconds=self._last_interval * INTERVAL_SLACK))
+
+    def state(self):
+        """JSON-serializable state for checkpoints (see log_checkpoint). Call before finish()."""
+        return {
+            'idle': self.idle.total_seconds(),
+            'sessions': [[s.app_name, s.start.isoformat(), s.end.isoformat()] for s in self.sessions],
+            'open': self._current is not None,
+            'last_seen': self._last_seen.isoformat() if self._last_seen else None,
+            'last_interval': self._last_interval,
+        }
+
+    def load_state(self, state):
+        if state['idle'] != self.idle.total_seconds():
+            raise ValueError("idle threshold differs from the checkpoint")
+        parse = datetime.datetime.fromisoformat
+        self.sessions = [Session(app, parse(start), parse(end)) for app, start, end in state['sessions']]
+        self._current = self.sessions[-1] if state['open'] else None
+        self._last_seen = parse(state['last_seen']) if state['last_seen'] else None
+        self._last_interval = state['last_interval']
+
+    def finish(self):
+        """Gives the last capture its own interval of coverage. Returns the sessions."""
+        if self._current is not None:
+            tail = datetime.timedelta(seconds=self._last_interval or DEFAULT_INTERVAL)
+            self._current.end = self._last_seen + min(tail, self._allowed_gap())
+            self._current = None
+        return self.sessions
+
+    def durations(self):
+        totals = {}
+        for s in self.sessions:
+            totals[s.app_name] = totals.get(s.app_name, datetime.timedelta(0)) + s.duration
+        return totals
+
+    def render(self):
+        self.finish()
+        if not self.sessions:
+            return []
+        totals = self.durations()
+        session_counts = {}
+        for s in self.sessions:
+            session_counts[s.app_name] = session_counts.get(s.app_name, 0) + 1
+
+        lines = [f"\n### アプリ使用時間 (アイドル{int(self.idle.total_seconds() // 60)}分超の空白は除外)"]
+        lines.append("| アプリケーション | 使用時間 | セッション数 |")
+        lines.append("|---|---|---|")
+        for app, total in sorted(totals.items(), key=lambda x: x[1], reverse=True):
+            lines.append(f"| {app} | {format_duration(total)} | {session_counts[app]}回 |")
+        return lines
+
+
+def overlap_table(sessions, events):
+    """
+    Joins sessions against calendar events given as (start, end, summary) with
+    naive local datetimes. Returns [(event, {app_name: timedelta})] per event.
+    """
+    sessions = sorted(sessions, key=lambda s: s.start)
+    table = []
+    for event in events:
+        ev_start, ev_end, _ = event
+        usage = {}
+        for s in sessions:
+            if s.start >= ev_end:
+                break
+            overlap = min(s.end, ev_end) - max(s.start, ev_start)
+            if overlap > datetime.timedelta(0):
+                usage[s.app_name] = usage.get(s.app_name, datetime.timedelta(0)) + overlap
+        table.append((event, usage))
+    return table
+
+
+def render_overlap_table(sessions, events, top_apps=3):
+    if not events:
+        return []
+    lines = ["\n### 予定と実際のアプリ使用 (重なり)"]
+    lines.append("| 予定 | 時間 | 実際に使用していたアプリ |")
+    lines.append("|---|---|---|")
+    for (start, end, summary), usage in overlap_table(sessions, events):
+        top = sorted(usage.items(), key=lambda x: x[1], reverse=True)[:top_apps]
+        apps = "、".join(f"{app} ({format_duration(d)})" for app, d in top) or "記録なし"
+        lines.append(f"| {summary} | {start:%H:%M}~{end:%H:%M} | {apps} |")
+    return lines
@@ -0,0 +1,202 @@
+"""
+Per-day summary sidecars for weekly and monthly reports.
+
+Each day's log is rolled up once into logs/summaries/daily_summary_<date>.json:
+app durations, captures per hour, a few distinct snippets per app and the
+calendar overlap. The sidecar records the size and mtime of the log it was
+built from and is rebuilt automatically when either changes (or when the
+idle threshold or the format version differs), so a month-level report only
+reads about 30 small files instead of re-parsing every log.
+"""
+import datetime
+import json
+import os
+
+from src.log_analyzer import (LOG_DIR, find_log, stream_log, AppCountAggregator, TimeRangeAggregator,
+                              HourlyHistogramAggregator, AppSwitchAggregator)
+from src.sessions import SessionAggregator, IDLE_THRESHOLD, overlap_table, format_duration
+from src.condenser import Block, rank_by_novelty
+
+SUMMARY_VERSION = 1
+TOP_SNIPPETS = 3       # distinct snippets kept per app and day
+TOP_APPS = 3           # apps listed per day or event in the period prompt
+
+
+def summary_path(date_str, log_dir=LOG_DIR):
+    return os.path.join(log_dir, "summaries", f"daily_summary_{date_str}.json")
+
+
+class AppSnippetAggregator:
+    """Distinct snippets per app, sampled over the whole day (see condenser.Block)."""
+
+    def __init__(self):
+        self.blocks = {}
+
+    def add(self, entry):
+        if entry.get('type') in ('continued', 'app_switch'):
+            return
+        block = self.blocks.get(entry['app_name'])
+        if block is None:
+            block = self.blocks[entry['app_name']] = Block(entry['app_name'], entry['timestamp'], entry['timestamp'])
+        block.add_snippet(entry.get('text_summary', ''))
+
+    def top(self, n=TOP_SNIPPETS):
+        return {app: rank_by_novelty(block.candidates)[:n] for app, block in self.blocks.items()}
+
+
+def _source_stamp(filename):
+    st = os.stat(filename)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def build_day_summary(date_str, events=None, idle_threshold=IDLE_THRESHOLD, log_dir=LOG_DIR):
+    """
+    Streams one day's log once and returns its summary dict.
+    events: calendar events as (start, end, summary) naive local datetimes, or
+    None when they could not be fetched (the sidecar is then rebuilt next time).
+    """
+    stamp = _source_stamp(find_log(date_str, log_dir))
+    sessions = SessionAggregator(idle_threshold)
+    counts, time_range = AppCountAggregator(), TimeRangeAggregator()
+    hourly, switches, snippets = HourlyHistogramAggregator(), AppSwitchAggregator(), AppSnippetAggregator()
+    for _ in stream_log(date_str, [sessions, counts, time_range, hourly, switches, snippets], log_dir):
+        pass
+    sessions.finish()
+
+    session_counts = {}
+    for s in sessions.sessions:
+        session_counts[s.app_name] = session_counts.get(s.app_name, 0) + 1
+    overlaps = None
+    if events is not None:
+        overlaps = [
+            {'summary': summary, 'start': start.strftime("%H:%M"), 'end': end.strftime("%H:%M"),
+             'apps': {app: d.total_seconds() for app, d in usage.items()}}
+            for (start, end, summary), usage in overlap_table(sessions.sessions, events)
+        ]
+
+    return {
+        'version': SUMMARY_VERSION,
+        'date': date_str,
+        'source': stamp,
+        'idle_threshold': int(sessions.idle.total_seconds()),
+        'capture_count': counts.total,
+        'record_period': time_range.period_text(),
+        'app_seconds': {app: d.total_seconds() for app, d in sessions.durations().items()},
+        'session_counts': session_counts,
+        'hourly': {f"{h:02d}": n for h, n in sorted(hourly.hours.items())},
+        'switches': switches.switches,
+        'snippets': snippets.top(),
+        'events': overlaps,
+    }
+
+
+def _is_fresh(summary, date_str, idle_threshold, log_dir):
+    return (summary.get('version') == SUMMARY_VERSION
+            and summary.get('idle_threshold') == idle_threshold
+            and summary.get('events') is not None
+            and summary.get('source') == _source_stamp(find_log(date_str, log_dir)))
+
+
+def load_day_summary(date_str, events_fn=None, idle_threshold=IDLE_THRESHOLD, log_dir=LOG_DIR):
+    """
+    Returns the day's summary from its sidecar, rebuilding the sidecar first if
+    it is missing or stale. Returns None for days without a log.
+    events_fn(date_str) returns the day's calendar intervals and is only called
+    on rebuild; an exception from it leaves the summary without events.
+    """
+    if find_log(date_str, log_dir) is None:
+        return None
+    path = summary_path(date_str, log_dir)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        if _is_fresh(summary, date_str, idle_threshold, log_dir):
+            return summary
+    except (OSError, ValueError):
+        pass
+
+    events = []
+    if events_fn is not None:
+        try:
+            events = events_fn(date_str)
+        except Exception as e:
+            print(f"{date_str} の予定を取得できませんでした: {e}")
+            events = None
+    summary = build_day_summary(date_str, events, idle_threshold, log_dir)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return summary
+
+
+def period_dates(period, day):
+    """Dates (YYYY-MM-DD) of the Monday-Sunday week or the calendar month containing day."""
+    if period == 'week':
+        first = day - datetime.timedelta(days=day.weekday())
+        last = first + datetime.timedelta(days=6)
+    elif period == 'month':
+        first = day.replace(day=1)
+        last = (first + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(days=1)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    return [(first + datetime.timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def _top_apps(seconds_by_app, n=TOP_APPS):
+    top = sorted(seconds_by_app.items(), key=lambda x: x[1], reverse=True)[:n]
+    return "、".join(f"{app} ({format_duration(datetime.timedelta(seconds=s))})" for app, s in top)
+
+
+def render_period(summaries, day_count):
+    """Prompt lines for a period, built from day summaries only."""
+    if not summaries:
+        return ["（対象期間のログが見つかりません。）"]
+
+    totals, days_used = {}, {}
+    hourly = HourlyHistogramAggregator()
+    for s in summaries:
+        for app, seconds in s['app_seconds'].items():
+            totals[app] = totals.get(app, 0) + seconds
+            days_used[app] = days_used.get(app, 0) + 1
+        for hour, n in s['hourly'].items():
+            hourly.hours[int(hour)] = hourly.hours.get(int(hour), 0) + n
+
+    lines = ["### 期間の概要"]
+    lines.append(f"- 記録のある日: {len(summaries)}日 / {day_count}日")
+    lines.append(f"- キャプチャ回数合計: {sum(s['capture_count'] for s in summaries)}回")
+    lines.append(f"- アプリ切り替え合計: {sum(s['switches'] for s in summaries)}回")
+
+    lines.append("\n### アプリ使用時間 (期間合計)")
+    lines.append("| アプリケーション | 使用時間 | 記録日あたり平均 | 使用日数 |")
+    lines.append("|---|---|---|---|")
+    for app, seconds in sorted(totals.items(), key=lambda x: x[1], reverse=True):
+        total = datetime.timedelta(seconds=seconds)
+        lines.append(f"| {app} | {format_duration(total)} | {format_duration(total / len(summaries))} | {days_used[app]}日 |")
+
+    lines.append("\n### 日別の記録")
+    lines.append("| 日付 | 記録期間 | キャプチャ回数 | 主なアプリ |")
+    lines.append("|---|---|---|---|")
+    for s in summaries:
+        lines.append(f"| {s['date']} | {s['record_period']} | {s['capture_count']}回 | {_top_apps(s['app_seconds'])} |")
+
+    lines.extend(hourly.render())
+
+    meetings = [(s['date'], e) for s in summaries for e in (s['events'] or [])]
+    if meetings:
+        lines.append("\n### 予定と実際のアプリ使用 (重なり)")
+        lines.append("| 日付 | 予定 | 時間 | 実際に使用していたアプリ |")
+        lines.append("|---|---|---|---|")
+        for date_str, e in meetings:
+            lines.append(f"| {date_str} | {e['summary']} | {e['start']}~{e['end']} | {_top_apps(e['apps']) or '記録なし'} |")
+
+    lines.append("\n### 日別の代表的な画面テキスト")
+    for s in summaries:
+        lines.append(f"#### {s['date']}")
+        for app in sorted(s['app_seconds'], key=s['app_seconds'].get, reverse=True)[:TOP_APPS]:
+            texts = s['snippets'].get(app)
+            if texts:
+                lines.append(f"- {app}: " + " / ".join(texts))
+    return lines
@@ -0,0 +1,114 @@
+"""
+Dirty-tile incremental OCR.
+
+The frame is split into a grid of tiles and each tile is hashed from a small
+grayscale thumbnail. Tiles whose (position, hash) pair is already cached reuse
+their text; only the tile rows holding changed tiles are sent to the
+recognizer, as full-width regions of interest so that a text line crossing
+a tile boundary is recognized whole. Because the cache is keyed by content
+rather than by "previous frame", it is safe to share between parallel OCR
+workers.
+
+Rectangles are (x, y, width, height) normalized to 0..1 with a top-left origin.
+"""
+import threading
+from collections import OrderedDict
+
+from src.frame_hash import tile_hashes
+
+TILE_COLS = 8
+TILE_ROWS = 6
+TILE_SAMPLE = 32            # thumbnail pixels per tile side used for hashing
+FULL_FRAME_RATIO = 0.6      # above this share of dirty tiles, OCR the whole frame
+CACHE_FRAMES = 8            # roughly how many distinct screens the cache remembers
+
+
+class TileOCR:
+    """
+    thumbnail_fn(frame, width, height) -> row-major 8-bit grayscale bytes.
+    recognize_regions_fn(frame, rects) -> list of (text, rect) in frame coordinates.
+    """
+
+    def __init__(self, thumbnail_fn, recognize_regions_fn, cols=TILE_COLS, rows=TILE_ROWS,
+                 full_frame_ratio=FULL_FRAME_RATIO, cache_frames=CACHE_FRAMES):
+        self.thumbnail_fn = thumbnail_fn
+        self.recognize_regions_fn = recognize_regions_fn
+        self.cols = cols
+        self.rows = rows
+        self.full_frame_ratio = full_frame_ratio
+        self.max_entries = cols * rows * cache_frames
+        self._cache = OrderedDict()  # (tile_index, hash) -> [(text, rect), ...]
+        self._lock = threading.Lock()
+
+    def recognize(self, frame):
+        if frame is None:
+            return ""
+
+        width, height = self.cols * TILE_SAMPLE, self.rows * TILE_SAMPLE
+        hashes = tile_hashes(self.thumbnail_fn(frame, width, height), width, height, self.cols, self.rows)
+
+        lines = []
+        dirty = set()
+        with self._lock:
+            for index, h in enumerate(hashes):
+                cached = self._cache.get((index, h))
+                if cached is None:
+                    dirty.add(index)
+                else:
+                    self._cache.move_to_end((index, h))
+                    lines.extend(cached)
+
+        if dirty:
+            rects, covered = self._dirty_regions(dirty)
+            fresh = {index: [] for index in covered}
+            for text, rect in self.recognize_regions_fn(frame, rects):
+                fresh.setdefault(self._tile_of(rect), []).append((text, rect))
+
+            # Tiles inside a recognized region take the fresh result, even if they were clean
+            lines = [line for line in lines if self._tile_of(line[1]) not in covered]
+            with self._lock:
+                for index, tile_lines in fresh.items():
+                    self._cache[(index, hashes[index])] = tile_lines
+                    lines.extend(tile_lines)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        return "\n".join(text for text, rect in sorted(lines, key=_reading_order))
+
+    def _dirty_regions(self, dirty):
+        """
+        Groups dirty tiles into full-width bands: every tile row with a dirty
+        tile is recognized across the whole screen width, since a text line
+        rarely ends at a tile boundary, and consecutive rows are merged so
+        lines crossing a row boundary are not cut in half either.
+        Returns (rects, covered tile indices).
+        """
+        if len(dirty) >= self.full_frame_ratio * self.cols * self.rows:
+            return [(0.0, 0.0, 1.0, 1.0)], set(range(self.cols * self.rows))
+
+        groups = []
+        for r in sorted({index // self.cols for index in dirty}):
+            if groups and groups[-1][1] == r - 1:
+                groups[-1] = (groups[-1][0], r)
+            else:
+                groups.append((r, r))
+
+        rects = []
+        covered = set()
+        for first, last in groups:
+            rects.append((0.0, first / self.rows, 1.0, (last - first + 1) / self.rows))
+            covered.update(range(first * self.cols, (last + 1) * self.cols))
+        return rects, covered
+
+    def _tile_of(self, rect):
+        """Tile index containing the center of rect."""
+        x, y, w, h = rect
+        c = min(int((x + w / 2) * self.cols), self.cols - 1)
+        r = min(int((y + h / 2) * self.rows), self.rows - 1)
+        return max(r, 0) * self.cols + max(c, 0)
+
+
+def _reading_order(line):
+    x, y, w, h = line[1]
+    # Lines whose centers are within ~1% of the screen height share a row
+    return (round((y + h / 2) * 100), x)
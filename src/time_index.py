@@ -0,0 +1,119 @@
+"""
+Sparse time index for reading part of a day's log.
+
+Every INDEX_EVERY rows, logs/.time_index/daily_log_<date>.json records the
+byte offset of the next row together with the latest capture time (row end)
+seen before it. To read a window, bisect finds the last mark whose preceding
+rows all ended before the window starts, reading begins at its offset, and
+stops at the first row starting at or after the window end (rows are written
+in capture order). The index is brought up to date incrementally before each
+use, from the offset it had reached; a replaced or rewritten log (see
+log_checkpoint.tail_guard) is indexed again from the start. Converted days
+(see log_segment) need no index: their segment headers carry the times.
+"""
+import bisect
+import json
+import os
+
+from src.log_analyzer import LOG_DIR, log_path, find_log, iter_log_entries_from, prepare_entry, entry_end, format_log_line
+from src.log_checkpoint import tail_guard
+from src.log_segment import SEGMENT_SUFFIX, iter_segment_entries
+
+INDEX_EVERY = 64
+INDEX_VERSION = 1
+
+
+def index_path(date_str, log_dir=LOG_DIR):
+    return os.path.join(log_dir, ".time_index", f"daily_log_{date_str}.json")
+
+
+def normalize_time(value):
+    """'H:MM' or 'HH:MM[:SS]' -> 'HH:MM:SS'. Raises ValueError on anything else."""
+    parts = value.split(":")
+    if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts):
+        raise ValueError(f"time must be HH:MM or HH:MM:SS: {value!r}")
+    h, m, s = (int(p) for p in parts + ["0"] * (3 - len(parts)))
+    if h > 24 or m > 59 or s > 59 or (h == 24 and (m or s)):
+        raise ValueError(f"time out of range: {value!r}")
+    return f"{h:02d}:{m:02d}:{s:02d}"
+
+
+def _empty_index(inode):
+    return {'version': INDEX_VERSION, 'inode': inode, 'every': INDEX_EVERY, 'indexed_to': 0,
+            'since_mark': 0, 'max_end': "", 'marks': []}
+
+
+def update_index(date_str, log_dir=LOG_DIR):
+    """Indexes rows appended since the last update and returns the index dict."""
+    filename = log_path(date_str, log_dir)
+    path = index_path(date_str, log_dir)
+    inode = os.stat(filename).st_ino
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = None
+    if (index is None or index.get('version') != INDEX_VERSION or index.get('inode') != inode
+            or index.get('every') != INDEX_EVERY or os.path.getsize(filename) < index['indexed_to']
+            or index.get('guard') != tail_guard(filename, index['indexed_to'])):
+        index = _empty_index(inode)
+
+    start = index['indexed_to']
+    offset = start
+    for entry, offset in iter_log_entries_from(filename, start):
+        if not prepare_entry(entry, date_str):
+            continue
+        index['max_end'] = max(index['max_end'], entry_end(entry))
+        index['since_mark'] += 1
+        if index['since_mark'] == INDEX_EVERY:
+            index['marks'].append([index['max_end'], offset])
+            index['since_mark'] = 0
+    if offset != start or 'guard' not in index:
+        index['indexed_to'] = offset
+        index['guard'] = tail_guard(filename, offset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+    return index
+
+
+def seek_offset(index, since):
+    """Byte offset from which every row that ends at or after since is read."""
+    if not since:
+        return 0
+    # marks[i][0] is the latest row end before marks[i][1]; skip marks that are all earlier than since
+    i = bisect.bisect_left([m[0] for m in index['marks']], since)
+    return index['marks'][i - 1][1] if i else 0
+
+
+def iter_window_entries(date_str, since=None, until=None, log_dir=LOG_DIR):
+    """
+    Yields the day's rows that overlap [since, until) ('HH:MM:SS' strings,
+    either may be None), reading only from the indexed offset onwards.
+    """
+    filename = find_log(date_str, log_dir)
+    if filename is None:
+        return
+    if filename.endswith(SEGMENT_SUFFIX):
+        entries = iter_segment_entries(filename, since, until)
+    else:
+        index = update_index(date_str, log_dir)
+        entries = (entry for entry, _ in iter_log_entries_from(filename, seek_offset(index, since)))
+    for entry in entries:
+        if not prepare_entry(entry, date_str):
+            continue
+        if until and entry['timestamp'] >= until:
+            return
+        if since and entry_end(entry) < since:
+            continue
+        yield entry
+
+
+def stream_log_window(date_str, aggregators=(), since=None, until=None, log_dir=LOG_DIR, format_fn=format_log_line):
+    """Like log_analyzer.stream_log for the part of one day between since and until."""
+    for entry in iter_window_entries(date_str, since, until, log_dir):
+        for aggregator in aggregators:
+            aggregator.add(entry)
+        yield format_fn(entry)
@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from src.activity_index import ActivityIndex
+from src.blob_store import BlobStore
+
+
+def fts5_available():
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason="SQLite built without FTS5")
+
+
+def append(log_dir, date_str, rows):
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"daily_log_{date_str}.jsonl"), "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+@pytest.fixture
+def index(tmp_path):
+    idx = ActivityIndex(str(tmp_path / "index.db"), str(tmp_path / "logs"))
+    yield idx
+    idx.close()
+
+
+def test_indexes_full_text_and_searches_with_filters(tmp_path, index):
+    log_dir = str(tmp_path / "logs")
+    ref = BlobStore(log_dir, "2025-01-06").put("Traceback\nModuleNotFoundError: No module named 'google'")
+    append(log_dir, "2025-01-06", [
+        {'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "Traceback", 'text_ref': ref},
+        {'timestamp': "09:05:00", 'app_name': "Slack", 'text_summary': "定例ミーティングの議事録"},
+        {'timestamp': "09:06:00", 'app_name': "Slack", 'type': "continued", 'end': "09:10:00", 'count': 4},
+    ])
+    append(log_dir, "2025-01-07", [
+        {'timestamp': "14:00:00", 'app_name': "Terminal", 'text_summary': "ModuleNotFoundError again"},
+    ])
+    assert index.index_all() == {"2025-01-06": 2, "2025-01-07": 1}
+
+    # The full text behind text_ref is searchable, not just the summary
+    results = index.search("ModuleNotFoundError")
+    assert {(r['date'], r['app_name']) for r in results} == {("2025-01-06", "Code"), ("2025-01-07", "Terminal")}
+    assert "[" in results[0]['snippet']
+
+    assert [r['app_name'] for r in index.search("ModuleNotFoundError", since="2025-01-07")] == ["Terminal"]
+    assert [r['app_name'] for r in index.search("ModuleNotFoundError", until="2025-01-06")] == ["Code"]
+    assert [r['date'] for r in index.search("ModuleNotFoundError", app="Code")] == ["2025-01-06"]
+
+    # Japanese substrings, including ones shorter than a trigram
+    assert index.search("ミーティング")[0]['app_name'] == "Slack"
+    assert index.search("議事")[0]['snippet'].count("[議事]") == 1
+
+    # Not valid FTS5 syntax: searched as a phrase
+    assert index.search("No module named 'google'")[0]['app_name'] == "Code"
+
+
+def test_indexing_is_incremental_and_idempotent(tmp_path, index):
+    log_dir = str(tmp_path / "logs")
+    append(log_dir, "2025-01-06", [{'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "first row"}])
+    assert index.index_all() == {"2025-01-06": 1}
+    assert index.index_all() == {}
+
+    append(log_dir, "2025-01-06", [{'timestamp': "09:01:00", 'app_name': "Code", 'text_summary': "second row"}])
+    assert index.index_all() == {"2025-01-06": 1}
+    assert len(index.search("row")) == 2
+
+
+def test_rewritten_log_is_reindexed(tmp_path, index):
+    log_dir = str(tmp_path / "logs")
+    path = os.path.join(log_dir, "daily_log_2025-01-06.jsonl")
+    append(log_dir, "2025-01-06", [{'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "old content"}])
+    index.index_all()
+
+    os.remove(path)
+    append(log_dir, "2025-01-06", [{'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "new content"}])
+    index.index_all()
+    assert index.search("old content") == []
+    assert len(index.search("content")) == 1
+
+
+def test_converted_days_are_indexed_from_the_seg_file(tmp_path, index):
+    from src.log_segment import convert_log
+
+    log_dir = str(tmp_path / "logs")
+    append(log_dir, "2025-01-06", [{'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "converted day"}])
+    convert_log("2025-01-06", log_dir)
+    assert not os.path.exists(os.path.join(log_dir, "daily_log_2025-01-06.jsonl"))
+
+    # e.g. after cache/ was deleted: the day is still found through its .seg file
+    assert index.index_all() == {"2025-01-06": 1}
+    assert index.search("converted day")[0]['date'] == "2025-01-06"
+    assert index.index_all() == {}
+
+
+def test_conversion_after_indexing_does_not_duplicate_rows(tmp_path, index):
+    from src.log_segment import convert_log
+
+    log_dir = str(tmp_path / "logs")
+    append(log_dir, "2025-01-06", [{'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "same row"}])
+    index.index_all()
+    convert_log("2025-01-06", log_dir)
+    index.index_all()
+    assert len(index.search("same row")) == 1
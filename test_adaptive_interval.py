@@ -0,0 +1,50 @@
+from src.adaptive_interval import AdaptivePacer
+
+
+def pacer(**options):
+    options.setdefault('load_fn', lambda: None)
+    return AdaptivePacer(base=60, min_interval=10, max_interval=300, small_change=3, big_change=16, **options)
+
+
+def test_unchanged_screen_backs_off_to_the_maximum():
+    p = pacer()
+    intervals = [p.next_interval("Code", 0b1010) for _ in range(6)]
+    assert intervals == [60, 120, 240, 300, 300, 300]
+
+
+def test_app_switch_tightens_then_relaxes_to_base():
+    p = pacer()
+    p.next_interval("Code", 0)
+    p.next_interval("Code", 0)                            # backed off to 120
+    assert p.next_interval("Slack", 0) == 10              # switch
+    # Ordinary changes (between small_change and big_change bits) relax step by step
+    assert [p.next_interval("Slack", f) for f in (0xFF, 0x0F, 0xFF, 0x0F)] == [20, 40, 60, 60]
+
+
+def test_big_screen_change_tightens_and_activity_ends_backoff():
+    p = pacer()
+    for _ in range(4):
+        p.next_interval("Code", 0)
+    assert p.interval == 300
+    assert p.next_interval("Code", 0xFF) == 60            # 8 bits: ordinary change, back to base
+    assert p.next_interval("Code", 0xFFFF_FF00) == 10     # 32 bits: big change
+
+
+def test_idle_input_backs_off_even_when_the_screen_changes():
+    idle = [0]
+    p = pacer(idle_fn=lambda: idle[0], idle_after=120)
+    p.next_interval("Zoom", 0)
+    assert p.next_interval("Zoom", 0xFF) == 60
+    idle[0] = 600
+    assert [p.next_interval("Zoom", f) for f in (0x0F, 0xFF)] == [120, 240]
+
+
+def test_load_ceiling_keeps_the_interval_at_base_or_above():
+    load = [0.5]
+    p = pacer(max_load=1.0, load_fn=lambda: load[0])
+    p.next_interval("Code", 0)
+    assert p.next_interval("Slack", 0) == 10
+    load[0] = 2.0
+    assert p.next_interval("Code", 0) == 60
+    # Backing off is still allowed under load
+    assert p.next_interval("Code", 0) == 120
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from src.app_events import FakeAppSwitchSource
+from src.capture_engine import CaptureEngine, AppSwitch
+
+
+def run_engine(script, settle=0.05, interval=10):
+    """
+    Runs an engine with a fake switch source. script(source, front) is called on a
+    separate thread; front[0] is the app that capture_fn reports.
+    Returns the written items as ('capture' | 'switch', app_name) in log order.
+    """
+    source = FakeAppSwitchSource()
+    front = ["Code"]
+    written = []
+
+    def write(capture, text):
+        written.append(("capture", capture.app_name))
+
+    def write_switch(switch):
+        assert isinstance(switch, AppSwitch)
+        written.append(("switch", switch.app_name))
+
+    engine = CaptureEngine(lambda: (front[0], object()), lambda frame: "text", write, interval=interval,
+                           switch_events=source, switch_fn=write_switch, settle=settle)
+
+    def drive():
+        script(source, front)
+        engine.stop()
+    driver = threading.Thread(target=drive)
+    driver.start()
+    engine.run()
+    driver.join()
+    return engine, written
+
+
+def test_switches_are_logged_and_the_settled_app_is_captured_once():
+    def script(source, front):
+        time.sleep(0.05)
+        for app in ("Slack", "Safari", "Terminal"):  # Quick hops: only Terminal settles
+            front[0] = app
+            source.switch(app)
+            time.sleep(0.01)
+        time.sleep(0.2)
+
+    engine, written = run_engine(script)
+
+    assert written == [
+        ("capture", "Code"),
+        ("switch", "Slack"), ("switch", "Safari"), ("switch", "Terminal"),
+        ("capture", "Terminal"),
+    ]
+    assert engine.switches == 3
+    assert engine.captured == 2
+
+
+def test_switch_to_the_app_already_in_front_is_ignored():
+    def script(source, front):
+        time.sleep(0.05)
+        source.switch("Code")
+        time.sleep(0.15)
+
+    engine, written = run_engine(script)
+
+    assert written == [("capture", "Code")]
+
+
+def test_switch_settling_restarts_the_capture_grid():
+    def script(source, front):
+        time.sleep(0.2)
+        front[0] = "Slack"
+        source.switch("Slack")
+        time.sleep(0.25)
+
+    # Captures are due every 0.3s. Slack is captured at 0.25s, so the capture
+    # due at 0.3s moves to 0.55s, after the engine has stopped
+    engine, written = run_engine(script, settle=0.05, interval=0.3)
+
+    assert written[:3] == [("capture", "Code"), ("switch", "Slack"), ("capture", "Slack")]
+    assert engine.captured == 2
@@ -0,0 +1,157 @@
+import json
+import struct
+import zlib
+
+import main
+from src.backends import get_backend
+from src.backends.png import read_png, gray_thumbnail
+from src.backends.replay import MANIFEST_NAME, FULL_FRAME
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _filter(filter_type, line, prev, bpp):
+    """Forward PNG filter, the inverse of png._unfilter."""
+    out = bytearray(len(line))
+    for i, x in enumerate(line):
+        a = line[i - bpp] if i >= bpp else 0
+        b = prev[i]
+        c = prev[i - bpp] if i >= bpp else 0
+        predictor = [0, a, b, (a + b) >> 1, _paeth(a, b, c)][filter_type]
+        out[i] = (x - predictor) & 0xFF
+    return bytes(out)
+
+
+def write_png(path, width, height, channels, pixels, filters):
+    """Writes pixels as an 8-bit PNG, filtering row y with filters[y % len(filters)]."""
+    color_type = {3: 2, 4: 6}[channels]
+    stride = width * channels
+    raw = bytearray()
+    prev = bytes(stride)
+    for y in range(height):
+        line = pixels[y * stride:(y + 1) * stride]
+        filter_type = filters[y % len(filters)]
+        raw += bytes([filter_type]) + _filter(filter_type, line, prev, channels)
+        prev = line
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        # Split IDAT to check that chunks are joined before decompressing
+        data = zlib.compress(bytes(raw))
+        f.write(chunk(b"IDAT", data[:10]))
+        f.write(chunk(b"IDAT", data[10:]))
+        f.write(chunk(b"IEND", b""))
+
+
+def _pixels(width, height, channels):
+    return bytes((x * 37 + y * 91 + c * 53 + x * y) % 256
+                 for y in range(height) for x in range(width) for c in range(channels))
+
+
+def test_png_round_trip_with_every_filter(tmp_path):
+    for channels in (3, 4):
+        pixels = _pixels(7, 10, channels)
+        path = tmp_path / f"frame{channels}.png"
+        write_png(path, 7, 10, channels, pixels, filters=[0, 1, 2, 3, 4])
+        assert read_png(str(path)) == (7, 10, channels, pixels)
+
+
+def test_gray_thumbnail_uses_luma_for_rgb():
+    pixels = bytes([255, 0, 0, 0, 255, 0, 0, 0, 255, 255, 255, 255])
+    assert gray_thumbnail(2, 2, 3, pixels, 2, 2) == bytes([76, 149, 29, 255])
+
+
+def _replay_dir(tmp_path, records):
+    for record in records:
+        write_png(tmp_path / record["file"], 4, 4, 3, _pixels(4, 4, 3), filters=[4])
+    with open(tmp_path / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return str(tmp_path)
+
+
+RECORDS = [
+    {"file": "000001.png", "app_name": "Slack", "text": "hello\nworld",
+     "lines": [["hello", [0.0, 0.0, 1.0, 0.5]], ["world", [0.0, 0.5, 1.0, 0.5]]], "ocr_seconds": 0.05},
+    {"file": "000002.png", "app_name": "Code", "text": "def main():", "idle_seconds": 30},
+]
+
+
+def test_replay_streams_frames_and_stops_at_the_end(tmp_path):
+    backend = get_backend("replay", frame_dir=_replay_dir(tmp_path, RECORDS))
+    assert backend.apps.active_app() == "Slack"
+    first = backend.screen.capture()
+    assert backend.screen.fingerprint(first) is not None
+    assert backend.apps.active_app() == "Code"
+    second = backend.screen.capture()
+    assert backend.recognizer.recognize(second) == "def main():"
+    assert backend.apps.idle_seconds() == 30
+    assert backend.apps.active_app() == "Unknown"
+    try:
+        backend.screen.capture()
+        assert False, "capture past the last frame should raise StopIteration"
+    except StopIteration:
+        pass
+
+
+def test_replay_regions_use_manifest_lines_and_ocr_seconds(tmp_path, monkeypatch):
+    slept = []
+    monkeypatch.setattr("src.backends.replay.time.sleep", slept.append)
+    backend = get_backend("replay", frame_dir=_replay_dir(tmp_path, RECORDS), ocr_latency=1.0)
+    first = backend.screen.capture()
+    assert backend.recognizer.recognize_regions(first, [(0.0, 0.5, 1.0, 0.5)]) == [("world", (0.0, 0.5, 1.0, 0.5))]
+    assert slept == [0.025]  # half the frame of the recorded 0.05s
+
+    # Without "lines" the whole text covers the frame; without "ocr_seconds" --ocr-latency applies
+    second = backend.screen.capture()
+    assert backend.recognizer.recognize_regions(second, [FULL_FRAME]) == [("def main():", FULL_FRAME)]
+    assert slept[-1] == 1.0
+
+
+def test_replay_loop_restarts_from_the_first_frame(tmp_path):
+    backend = get_backend("replay", frame_dir=_replay_dir(tmp_path, RECORDS), loop=True)
+    apps = []
+    for _ in range(5):
+        apps.append(backend.apps.active_app())
+        backend.screen.capture()
+    assert apps == ["Slack", "Code", "Slack", "Code", "Slack"]
+
+
+def test_benchmark_replay_runs_to_the_end_and_reports(tmp_path, monkeypatch, capsys):
+    frames = tmp_path / "frames"
+    frames.mkdir()
+    records = [dict(RECORDS[0], ocr_seconds=0.01), RECORDS[1], dict(RECORDS[0], file="000003.png", app_name="Zoom")]
+    backend = get_backend("replay", frame_dir=_replay_dir(frames, records))
+    monkeypatch.setattr(main, "LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(main, "_blob_stores", {})
+
+    main.main_loop(backend, interval=0.02, benchmark=True, app_events=False, live_port=None)
+
+    out = capsys.readouterr().out
+    assert "--- Benchmark ---" in out
+    assert "Frames captured: 3" in out
+    logs = list((tmp_path / "logs").glob("daily_log_*.jsonl"))
+    assert len(logs) == 1
+    rows = [json.loads(line) for line in logs[0].read_text(encoding="utf-8").splitlines()]
+    assert [row["app_name"] for row in rows] == ["Slack", "Code", "Zoom"]
+
+
+def test_frame_hash_distance_reaches_the_engine_and_the_pacer(monkeypatch, tmp_path):
+    seen = {}
+    monkeypatch.setattr(main, "LOG_DIR", main.LOG_DIR)  # main() sets it from --log-dir
+    monkeypatch.setattr(main, "main_loop", lambda backend, **kwargs: seen.update(kwargs))
+    monkeypatch.setattr("sys.argv", ["main.py", "--backend", "replay", "--replay-dir", _replay_dir(tmp_path, RECORDS),
+                                     "--adaptive", "--frame-hash-distance", "7", "--log-dir", str(tmp_path / "logs")])
+    main.main()
+    assert seen["max_distance"] == 7
+    assert seen["pacer"].small_change == 7
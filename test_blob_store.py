@@ -0,0 +1,45 @@
+import os
+
+from src.blob_store import BlobStore, normalize_text, text_hash
+
+
+def test_put_get_round_trip_stores_identical_text_once(tmp_path):
+    store = BlobStore(str(tmp_path), "2025-12-24")
+    ref = store.put("  def main():\n\n    return 1  \n")
+    assert ref == text_hash("def main():\nreturn 1")
+    assert store.put("def main():\nreturn 1") == ref
+    assert len(store) == 1
+    assert ref in store
+    assert store.get(ref) == "def main():\nreturn 1"
+
+
+def test_missing_blob_is_none(tmp_path):
+    store = BlobStore(str(tmp_path), "2025-12-24")
+    assert store.get(text_hash("never stored")) is None
+    store.put("something")
+    assert store.get(text_hash("never stored")) is None
+
+
+def test_index_is_reloaded_by_a_new_store(tmp_path):
+    first = BlobStore(str(tmp_path), "2025-12-24")
+    refs = [first.put(f"screen {i}\n" * 50) for i in range(3)]
+
+    second = BlobStore(str(tmp_path), "2025-12-24")
+    assert len(second) == 3
+    assert [second.get(ref) for ref in refs] == [normalize_text(f"screen {i}\n" * 50) for i in range(3)]
+    # Another day has its own pack
+    assert len(BlobStore(str(tmp_path), "2025-12-25")) == 0
+
+
+def test_index_entries_past_the_pack_end_are_ignored(tmp_path):
+    store = BlobStore(str(tmp_path), "2025-12-24")
+    kept = store.put("kept")
+    lost = store.put("lost in a crash")
+    # The blob write was cut short after its index line was written
+    with open(store.pack_path, "rb+") as f:
+        f.truncate(os.path.getsize(store.pack_path) - 1)
+
+    reloaded = BlobStore(str(tmp_path), "2025-12-24")
+    assert reloaded.get(kept) == "kept"
+    assert lost not in reloaded
+    assert reloaded.get(lost) is None
@@ -0,0 +1,123 @@
+import datetime
+
+from src.calendar_cache import CalendarCache, fetch_calendars
+from src.calendar_fake import FakeCalendarService
+
+TODAY = datetime.date(2025, 12, 24)
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime.combine(day, datetime.time(hour, minute))
+
+
+def make_cache(tmp_path, service, **kwargs):
+    built = []
+
+    def factory():
+        built.append(1)
+        return service
+
+    cache = CalendarCache(factory, cache_dir=str(tmp_path), today_fn=lambda: TODAY, **kwargs)
+    return cache, built
+
+
+def summaries(events):
+    return [e['summary'] for e in events]
+
+
+def test_incremental_sync_picks_up_changes(tmp_path):
+    service = FakeCalendarService()
+    standup = service.add_event("朝会", at(TODAY, 10), at(TODAY, 10, 15))
+    service.add_event("明日の会議", at(TODAY + datetime.timedelta(days=1), 14), at(TODAY + datetime.timedelta(days=1), 15))
+    cache, _ = make_cache(tmp_path, service)
+
+    assert summaries(cache.events_for_day(TODAY)) == ["朝会"]
+    assert service.calls[-1][1]['syncToken'] is None
+
+    service.add_event("1on1", at(TODAY, 9), at(TODAY, 9, 30))
+    service.cancel_event(standup)
+    assert summaries(cache.events_for_day(TODAY)) == ["1on1"]
+    assert service.calls[-1][1]['syncToken'] is not None
+
+
+def test_past_days_are_served_from_disk(tmp_path):
+    service = FakeCalendarService()
+    yesterday = TODAY - datetime.timedelta(days=1)
+    service.add_event("振り返り", at(yesterday, 17), at(yesterday, 18))
+    cache, _ = make_cache(tmp_path, service)
+    assert summaries(cache.events_for_day(yesterday)) == ["振り返り"]
+
+    # A new process with a fresh cache object never builds the service
+    cache, built = make_cache(tmp_path, service)
+    calls = len(service.calls)
+    assert summaries(cache.events_for_day(yesterday)) == ["振り返り"]
+    assert built == []
+    assert len(service.calls) == calls
+
+
+def test_days_before_the_window_use_a_bounded_query(tmp_path):
+    service = FakeCalendarService()
+    old_day = TODAY - datetime.timedelta(days=90)
+    service.add_event("古い予定", at(old_day, 13), at(old_day, 14))
+    cache, _ = make_cache(tmp_path, service, sync_window_days=30)
+
+    assert summaries(cache.events_for_day(old_day)) == ["古い予定"]
+    assert service.calls[-1][1]['timeMax'] is not None
+
+
+def test_expired_sync_token_falls_back_to_full_sync(tmp_path):
+    service = FakeCalendarService(page_size=2)
+    for hour in range(9, 14):
+        service.add_event(f"予定{hour}", at(TODAY, hour), at(TODAY, hour, 30))
+    cache, _ = make_cache(tmp_path, service)
+    cache.events_for_day(TODAY)
+
+    service.expire_sync_tokens()
+    service.add_event("追加", at(TODAY, 16), at(TODAY, 17))
+    assert summaries(cache.events_for_day(TODAY))[-1] == "追加"
+    assert len(cache.events_for_day(TODAY)) == 6
+
+
+def test_fetch_calendars_merges_and_deduplicates(tmp_path):
+    service = FakeCalendarService(latency=0.05)
+    service.add_event("定例", at(TODAY, 11), at(TODAY, 12), calendar_id="primary", iCalUID="shared@x")
+    service.add_event("定例", at(TODAY, 11), at(TODAY, 12), calendar_id="team", iCalUID="shared@x")
+    service.add_event("会議室予約", at(TODAY, 9), at(TODAY, 10), calendar_id="rooms")
+    caches = [CalendarCache(lambda: service, calendar_id=c, cache_dir=str(tmp_path), today_fn=lambda: TODAY)
+              for c in ("primary", "team", "rooms")]
+
+    events, latencies = fetch_calendars(caches, TODAY)
+
+    assert summaries(events) == ["会議室予約", "定例"]
+    assert set(latencies) == {"primary", "team", "rooms"}
+
+
+def test_one_cache_is_never_used_from_two_threads_at_once(tmp_path):
+    import threading
+
+    class ExclusiveService(FakeCalendarService):
+        """Fails like a shared HTTP client would if two requests overlap."""
+
+        def __init__(self):
+            super().__init__(latency=0.02)
+            self.busy = threading.Lock()
+
+        def _list(self, calendarId, **params):
+            assert self.busy.acquire(blocking=False), "service used concurrently"
+            try:
+                return super()._list(calendarId, **params)
+            finally:
+                self.busy.release()
+
+    service = ExclusiveService()
+    service.add_event("朝会", at(TODAY, 10), at(TODAY, 10, 15))
+    cache, _ = make_cache(tmp_path, service)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(summaries(cache.events_for_day(TODAY))))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [["朝会"]] * 4
@@ -0,0 +1,50 @@
+import datetime
+import threading
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from src import calendar_utils
+from src.calendar_fake import FakeCalendarService
+
+
+@pytest.fixture
+def calendars(tmp_path, monkeypatch):
+    """Two calendars served by fakes; returns the list of services built."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(calendar_utils, "_services", {})
+    monkeypatch.setattr(calendar_utils, "_caches", {})
+    monkeypatch.setattr(calendar_utils, "_get_credentials", lambda: object())
+    monkeypatch.setattr(calendar_utils, "load_calendar_ids", lambda: ["primary", "team"])
+    built = []
+
+    def build(*args, **kwargs):
+        service = FakeCalendarService()
+        day = datetime.datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        service.add_event(f"予定{len(built)}", day, day + datetime.timedelta(minutes=30), calendar_id="primary")
+        built.append(service)
+        return service
+
+    monkeypatch.setattr(calendar_utils, "build", build)
+    return built
+
+
+def test_service_is_built_once_per_calendar_across_threads(calendars):
+    # Every report and batch date fetches on a thread of its own
+    for _ in range(3):
+        threads = [threading.Thread(target=calendar_utils.get_todays_event_items) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(calendars) == 2
+    assert calendar_utils.get_calendar_service("team") is calendar_utils.get_calendar_service("team")
+
+
+def test_no_credentials_builds_nothing(calendars, monkeypatch):
+    monkeypatch.setattr(calendar_utils, "_get_credentials", lambda: None)
+    assert calendar_utils.get_calendar_service() is None
+    assert calendar_utils.get_todays_event_items() == []
+    assert calendars == []
@@ -0,0 +1,109 @@
+import threading
+import time
+
+from src.capture_engine import CaptureEngine, DropOldestQueue
+
+
+def test_drop_oldest_queue_returns_dropped_item():
+    q = DropOldestQueue(2)
+    assert q.put(1) is None
+    assert q.put(2) is None
+    assert q.put(3) == 1
+    q.close()
+    assert [q.get(), q.get(), q.get()] == [2, 3, None]
+
+
+def test_results_are_written_in_capture_order():
+    frames = iter(range(6))
+    written = []
+
+    def capture():
+        return "App", next(frames)
+
+    def ocr(frame):
+        # Earlier frames take longer so workers finish out of order
+        time.sleep(0.02 * (6 - frame))
+        return f"text {frame}"
+
+    def write(capture, text):
+        written.append(text)
+        if len(written) == 6:
+            engine.stop()
+
+    engine = CaptureEngine(capture, ocr, write, interval=0.005, workers=3, max_pending=10)
+    stopper = threading.Timer(0.06, engine.stop)
+    stopper.start()
+    engine.run()
+    stopper.cancel()
+
+    assert written == [f"text {i}" for i in range(len(written))]
+
+
+def test_slow_ocr_drops_frames_instead_of_slowing_capture():
+    captured = []
+    written = []
+
+    def capture():
+        captured.append(time.monotonic())
+        return "App", len(captured)
+
+    def ocr(frame):
+        time.sleep(0.1)
+        return str(frame)
+
+    engine = CaptureEngine(capture, ocr, lambda c, t: written.append(t),
+                           interval=0.01, workers=1, max_pending=2)
+    stopper = threading.Timer(0.2, engine.stop)
+    stopper.start()
+    engine.run()
+
+    assert len(captured) >= 10
+    assert engine.dropped > 0
+    assert written == sorted(written, key=int)
+
+
+def test_unchanged_frames_reuse_previous_text():
+    # Frames 0-2 look identical, frame 3 differs
+    fingerprints = [0b0000, 0b0001, 0b0000, 0b1111]
+    frames = iter(range(4))
+    ocr_calls = []
+    written = []
+
+    def ocr(frame):
+        ocr_calls.append(frame)
+        return f"text {frame}"
+
+    def write(capture, text):
+        written.append((capture.unchanged, text))
+        if len(written) == 4:
+            engine.stop()
+
+    engine = CaptureEngine(lambda: ("App", next(frames)), ocr, write, interval=0.01,
+                           fingerprint_fn=lambda f: fingerprints[f], max_distance=1)
+    engine.run()
+
+    assert ocr_calls == [0, 3]
+    assert written == [(False, "text 0"), (True, "text 0"), (True, "text 0"), (False, "text 3")]
+
+
+def test_pacer_sets_the_interval_per_capture():
+    frames = iter(range(4))
+    written = []
+
+    class Pacer:
+        intervals = iter([0.01, 0.02, 0.04, 0.08])
+
+        def next_interval(self, app_name, fingerprint):
+            return next(self.intervals)
+
+    def write(capture, text):
+        written.append(capture.interval)
+        if len(written) == 4:
+            engine.stop()
+
+    engine = CaptureEngine(lambda: ("App", next(frames)), lambda f: "text", write, interval=0.01, pacer=Pacer())
+    started = time.monotonic()
+    engine.run()
+
+    assert written == [0.01, 0.02, 0.04, 0.08]
+    assert time.monotonic() - started >= 0.07
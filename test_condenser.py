@@ -0,0 +1,38 @@
+import random
+
+from src.condenser import BlockAggregator, condense_blocks, rank_by_novelty
+
+
+def synthetic_day(n=800, seed=1):
+    rng = random.Random(seed)
+    apps = ["Code", "Slack", "Brave Browser", "Terminal", "Zoom"]
+    words = ["report", "deploy", "エラー", "会議", "レビュー", "calendar", "OCR", "テスト", "修正", "設計"]
+    blocks = BlockAggregator()
+    app = apps[0]
+    for i in range(n):
+        if rng.random() < 0.15:
+            app = rng.choice(apps)
+        text = " ".join(rng.choice(words) for _ in range(80))
+        blocks.add({"timestamp": f"{9 + i // 60 % 15:02d}:{i % 60:02d}:00", "app_name": app, "text_summary": text})
+    return blocks.blocks
+
+
+def test_output_always_fits_budget_and_is_deterministic():
+    for budget in (200, 2000, 20000):
+        lines = condense_blocks(synthetic_day(), budget)
+        assert len("\n".join(lines)) <= budget
+        assert lines == condense_blocks(synthetic_day(), budget)
+
+
+def test_every_block_gets_a_snippet_before_any_gets_a_second():
+    blocks = synthetic_day(n=40)
+    lines = condense_blocks(blocks, 20000)
+    headers = [i for i, line in enumerate(lines) if not line.startswith("  - ")]
+    assert len(headers) == len(blocks)
+    assert all(lines[i + 1].startswith("  - ") for i in headers)
+
+
+def test_novelty_prefers_new_content():
+    ranked = rank_by_novelty(["aaaa bbbb", "aaaa bbbb cccc", "zzzz yyyy"])
+    assert ranked[0] == "aaaa bbbb cccc"
+    assert ranked[1] == "zzzz yyyy"
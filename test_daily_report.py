@@ -0,0 +1,106 @@
+import argparse
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+import daily_report
+from src import report_generator
+from src.report_generator import prefetch_events, CallTimeout
+
+DATES = ["2025-12-22", "2025-12-23", "2025-12-24"]
+
+
+def fake_calendar(fail=(), hang=(), release=None):
+    """get_todays_event_items stand-in: one meeting a day, an error or a hang on the given dates."""
+    def fetch(day):
+        date_str = day.strftime("%Y-%m-%d")
+        if date_str in fail:
+            raise RuntimeError(f"calendar down on {date_str}")
+        if date_str in hang:
+            release.wait(10)
+        return [{'summary': f"定例 {date_str}", 'start': {'dateTime': f"{date_str}T10:00:00"},
+                 'end': {'dateTime': f"{date_str}T10:30:00"}}]
+    return fetch
+
+
+def test_prefetch_keeps_date_order_and_reports_errors_per_date(monkeypatch):
+    monkeypatch.setattr(report_generator, "get_todays_event_items", fake_calendar(fail={"2025-12-23"}))
+
+    results = list(prefetch_events(DATES, timeout=5))
+
+    assert [date_str for date_str, _, _ in results] == DATES
+    assert results[0][1][0]['summary'] == "定例 2025-12-22"
+    assert isinstance(results[1][1], RuntimeError)
+    assert results[2][1][0]['summary'] == "定例 2025-12-24"
+    assert all(seconds is not None for _, _, seconds in results)
+
+
+def test_prefetch_gives_up_on_a_hung_date_and_the_rest(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(report_generator, "get_todays_event_items",
+                        fake_calendar(hang={"2025-12-23"}, release=release))
+    started = time.monotonic()
+    try:
+        results = list(prefetch_events(DATES, timeout=0.2))
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 5
+    assert results[0][1][0]['summary'] == "定例 2025-12-22"
+    for date_str, events, seconds in results[1:]:
+        assert isinstance(events, CallTimeout)
+        assert seconds is None
+
+
+def batch_args(**options):
+    defaults = dict(from_date="251222", to_date="251224", workers=2, calendar_timeout=0.5,
+                    idle_threshold=180, budget=None, full_text=False)
+    return argparse.Namespace(**dict(defaults, **options))
+
+
+def test_run_batch_writes_a_prompt_per_date(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "logs").mkdir()
+    with open(tmp_path / "logs" / "daily_log_2025-12-24.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": "09:00:00", "app_name": "Code", "text_summary": "def main():"}) + "\n")
+    monkeypatch.setattr(report_generator, "get_todays_event_items", fake_calendar(fail={"2025-12-23"}))
+
+    daily_report.run_batch(batch_args())
+
+    outputs = tmp_path / daily_report.OUTPUT_DIR
+    for date_str in DATES:
+        assert (outputs / f"daily_report_prompt_{date_str}.txt").exists()
+        assert (outputs / f"daily_report_logs_{date_str}.txt").exists()
+    prompts = {d: (outputs / f"daily_report_prompt_{d}.txt").read_text(encoding="utf-8") for d in DATES}
+    assert "定例 2025-12-22" in prompts["2025-12-22"]
+    assert "カレンダー取得エラー: calendar down on 2025-12-23" in prompts["2025-12-23"]
+    assert "def main():" in (outputs / "daily_report_logs_2025-12-24.txt").read_text(encoding="utf-8")
+
+    out = capsys.readouterr().out
+    assert "成功 3 / 3日" in out
+    assert out.count("ログなし") == 2
+
+
+def test_run_batch_marks_hung_calendar_dates_as_timeouts(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    release = threading.Event()
+    monkeypatch.setattr(report_generator, "get_todays_event_items",
+                        fake_calendar(hang={"2025-12-24"}, release=release))
+    try:
+        daily_report.run_batch(batch_args(calendar_timeout=0.2))
+    finally:
+        release.set()
+
+    prompt = (tmp_path / daily_report.OUTPUT_DIR / "daily_report_prompt_2025-12-24.txt").read_text(encoding="utf-8")
+    assert "予定取得中にタイムアウト" in prompt
+    assert "タイムアウト" in [line.split()[1] for line in capsys.readouterr().out.splitlines()
+                              if line.startswith("2025-12-24")]
+
+
+def test_run_batch_rejects_a_reversed_range(monkeypatch):
+    with pytest.raises(SystemExit):
+        daily_report.run_batch(batch_args(from_date="251224", to_date="251222"))
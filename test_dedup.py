@@ -0,0 +1,65 @@
+import datetime
+
+from src.dedup import MAX_DISTANCE, RunCollapser, simhash
+
+BASE = "def calculate_app_usage_stats(date_str): filename = os.path.join(LOG_DIR, f'daily_log_{date_str}.jsonl') " * 3
+
+
+def test_simhash_is_close_for_small_edits():
+    a = simhash(BASE)
+    b = simhash(BASE + " x")
+    c = simhash("Slack - #general: lunch plans for friday, anyone up for ramen?")
+    assert bin(a ^ b).count("1") <= 3
+    assert bin(a ^ c).count("1") > 10
+
+
+def test_changes_past_the_first_shingles_of_a_long_text_count():
+    # A chat window whose last messages changed, far below the first 2000 characters
+    history = "".join(f"[10:{i:02d}] alice: message number {i} about the release plan\n" for i in range(60))
+    before = history + "".join(f"[11:{i:02d}] bob: reply {i} on the deploy window and rollback steps\n" for i in range(20))
+    after = history + "".join(f"[11:{i:02d}] carol: new topic {i}, the quarterly budget review notes\n" for i in range(20))
+    assert len(history) > 2000
+    assert bin(simhash(before) ^ simhash(after)).count("1") > MAX_DISTANCE
+    # A few characters more still shift the sampled windows only slightly
+    assert bin(simhash(before) ^ simhash(before + " x")).count("1") <= MAX_DISTANCE
+
+    collapser = RunCollapser()
+    t0 = datetime.datetime(2025, 12, 24, 10, 0)
+    assert not collapser.add(t0, "Slack", before)
+    assert not collapser.add(t0 + datetime.timedelta(minutes=1), "Slack", after)
+
+
+def test_consecutive_duplicates_collapse_into_one_run():
+    runs = []
+    collapser = RunCollapser(flush_fn=lambda *run: runs.append(run))
+    t0 = datetime.datetime(2025, 12, 24, 10, 0)
+    minute = datetime.timedelta(minutes=1)
+
+    written = [not collapser.add(t0 + i * minute, "Code", BASE + " " * i) for i in range(4)]
+    written.append(not collapser.add(t0 + 4 * minute, "Slack", "new message"))
+
+    assert written == [True, False, False, False, True]
+    assert runs == [("Code", t0 + minute, t0 + 3 * minute, 3)]
+
+
+def test_run_only_continues_the_last_written_row():
+    runs = []
+    collapser = RunCollapser(flush_fn=lambda *run: runs.append(run))
+    t0 = datetime.datetime(2025, 12, 24, 10, 0)
+    minute = datetime.timedelta(minutes=1)
+    other = "def render(self): lines = [] for app, total in sorted(totals.items()): lines.append(app) " * 3
+
+    # A, B, A': A' matches A but B was written in between, so it is a row of its own
+    written = [not collapser.add(t0 + i * minute, "Code", text) for i, text in enumerate([BASE, other, BASE + " x"])]
+    assert written == [True, True, True]
+    assert collapser.add(t0 + 3 * minute, "Code", BASE + " y")
+    collapser.flush()
+    assert runs == [("Code", t0 + 3 * minute, t0 + 3 * minute, 1)]
+
+
+def test_reset_starts_a_new_row():
+    collapser = RunCollapser()
+    t0 = datetime.datetime(2025, 12, 24, 10, 0)
+    assert not collapser.add(t0, "Code", BASE)
+    collapser.reset()
+    assert not collapser.add(t0 + datetime.timedelta(minutes=1), "Code", BASE)
@@ -0,0 +1,99 @@
+import http.client
+import json
+import urllib.parse
+import urllib.request
+
+import pytest
+
+from src.live_stats import LiveStats, serve_live_stats, fetch_live, restore_live, live_aggregators
+from src.log_analyzer import stream_log
+from src.sessions import SessionAggregator
+
+DATE = "2025-12-24"
+ROWS = [
+    {"timestamp": "09:00:00", "app_name": "Code", "text_summary": "def main():"},
+    {"timestamp": "09:01:00", "app_name": "Code", "type": "continued", "end": "09:20:00", "count": 20},
+    {"timestamp": "09:21:00", "app_name": "Slack", "type": "app_switch"},
+    {"timestamp": "09:21:03", "app_name": "Slack", "text_summary": "standup"},
+]
+
+
+def append(log_dir, row, live=None):
+    with open(log_dir / f"daily_log_{DATE}.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    if live is not None:
+        live.add(row, DATE)
+
+
+@pytest.fixture
+def served(tmp_path):
+    # Two rows exist before the capture process starts, two are written while it runs
+    for row in ROWS[:2]:
+        append(tmp_path, row)
+    live = LiveStats(str(tmp_path))
+    live.load_day(DATE)
+    for row in ROWS[2:]:
+        append(tmp_path, row, live)
+    server = serve_live_stats(live, port=0)
+    yield tmp_path, server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_restored_stats_match_a_rescan_of_the_log(served):
+    log_dir, port = served
+    restored = live_aggregators()
+    lines = restore_live(DATE, restored, log_dir=str(log_dir), port=port)
+
+    scanned = live_aggregators()
+    assert lines == list(stream_log(DATE, scanned.values(), str(log_dir)))
+    for name in scanned:
+        assert json.dumps(restored[name].state()) == json.dumps(scanned[name].state())
+    assert restored['sessions'].render() == scanned['sessions'].render()
+
+
+def test_summary_and_log_endpoints(served):
+    log_dir, port = served
+    stats = fetch_live(DATE, str(log_dir), lines=False, port=port)
+    assert 'lines' not in stats
+    assert stats['summary']['capture_count'] == 22
+    assert stats['summary']['app_seconds'] == {"Code": 21 * 60, "Slack": 63}
+    assert stats['summary']['recent'][-1] == "09:21:03 | Slack | standup"
+
+    query = f"date={DATE}&log_dir={log_dir}&tail=2"
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/log?{query}", timeout=1) as response:
+        assert response.read().decode("utf-8").splitlines() == [
+            "09:21:00 | Slack | （アプリ切り替え）", "09:21:03 | Slack | standup"]
+
+
+def test_other_hosts_are_rejected(served):
+    log_dir, port = served
+    query = urllib.parse.urlencode({'date': DATE, 'log_dir': str(log_dir)})
+    for host, status in [(f"evil.example:{port}", 403), ("127.0.0.1:1", 403), (f"localhost:{port}", 200)]:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+        connection.putrequest("GET", f"/log?{query}", skip_host=True)
+        connection.putheader("Host", host)
+        connection.endheaders()
+        assert connection.getresponse().status == status
+        connection.close()
+
+
+def test_other_days_and_directories_fall_back(served, tmp_path_factory):
+    log_dir, port = served
+    assert fetch_live("2025-12-25", str(log_dir), port=port) is None
+    assert fetch_live(DATE, str(tmp_path_factory.mktemp("other")), port=port) is None
+
+
+def test_mismatched_idle_threshold_leaves_aggregators_fresh(served):
+    log_dir, port = served
+    aggregators = {'sessions': SessionAggregator(idle_threshold=600)}
+    assert restore_live(DATE, aggregators, log_dir=str(log_dir), port=port) is None
+    assert aggregators['sessions'].sessions == []
+
+
+def test_no_daemon_returns_none(tmp_path):
+    server = serve_live_stats(LiveStats(str(tmp_path)), port=0)
+    port = server.server_address[1]
+    server.shutdown()
+    server.server_close()
+    assert fetch_live(DATE, str(tmp_path), port=port, timeout=0.2) is None
@@ -0,0 +1,60 @@
+import json
+
+from src.log_analyzer import stream_log, default_aggregators
+
+ROWS = [
+    {"timestamp": "09:00:00", "app_name": "Code", "text_summary": "def main():"},
+    {"timestamp": "09:01:00", "app_name": "Code", "type": "continued", "end": "09:30:00", "count": 30},
+    {"timestamp": "10:15:00", "app_name": "Slack", "text_summary": "standup"},
+    {"timestamp": "10:45:30", "app_name": "Code", "text_summary": "tests"},
+]
+
+
+def write_log(tmp_path, date_str, rows):
+    with open(tmp_path / f"daily_log_{date_str}.jsonl", "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.write("not json\n")
+
+
+def test_single_pass_yields_lines_and_aggregates(tmp_path):
+    write_log(tmp_path, "2025-12-24", ROWS)
+    aggregators = default_aggregators()
+
+    lines = list(stream_log("2025-12-24", aggregators.values(), log_dir=str(tmp_path)))
+
+    assert lines[0] == "09:00:00 | Code | def main():"
+    assert lines[1] == "09:01:00-09:30:00 | Code | （同様の画面が継続: 30回）"
+    assert len(lines) == 4
+    assert aggregators['counts'].counts == {"Code": 32, "Slack": 1}
+    assert aggregators['counts'].total == 33
+    assert aggregators['time_range'].period_text() == "09:00~10:45(約1時間45分)"
+    assert aggregators['hourly'].hours == {9: 31, 10: 2}
+    assert aggregators['switches'].switches == 2
+
+
+def test_time_range_spans_multiple_days(tmp_path):
+    write_log(tmp_path, "2025-12-24", ROWS[:1])
+    write_log(tmp_path, "2025-12-25", ROWS[2:3])
+    aggregators = default_aggregators()
+
+    list(stream_log(["2025-12-24", "2025-12-25", "2025-12-26"], aggregators.values(), log_dir=str(tmp_path)))
+
+    assert aggregators['time_range'].duration().total_seconds() == (24 + 1.25) * 3600
+
+
+def test_app_switch_rows_mark_switches_without_counting_captures(tmp_path):
+    write_log(tmp_path, "2025-12-24", ROWS[:1] + [
+        {"timestamp": "09:05:10", "app_name": "Slack", "type": "app_switch"},
+        {"timestamp": "09:05:40", "app_name": "Code", "type": "app_switch"},
+        {"timestamp": "09:06:00", "app_name": "Code", "text_summary": "tests"},
+    ])
+    aggregators = default_aggregators()
+
+    lines = list(stream_log("2025-12-24", aggregators.values(), log_dir=str(tmp_path)))
+
+    assert lines[1] == "09:05:10 | Slack | （アプリ切り替え）"
+    assert aggregators['counts'].counts == {"Code": 2}
+    assert aggregators['hourly'].hours == {9: 2}
+    # The 30-second visit to Slack is only visible through the switch rows
+    assert aggregators['switches'].transitions == {"Code → Slack": 1, "Slack → Code": 1}
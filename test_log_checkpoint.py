@@ -0,0 +1,143 @@
+import json
+import os
+
+from src import log_checkpoint
+from src.log_analyzer import stream_log, default_aggregators
+from src.log_checkpoint import stream_log_checkpointed, checkpoint_path
+from src.sessions import SessionAggregator
+from src.condenser import BlockAggregator
+
+DATE = "2025-01-06"
+
+
+def rows(start_minute, n, app="Code"):
+    return [{'timestamp': f"{9 + (start_minute + i) // 60:02d}:{(start_minute + i) % 60:02d}:00",
+             'app_name': app, 'text_summary': f"{app} text {start_minute + i}"} for i in range(n)]
+
+
+def append(log_dir, entries, raw=""):
+    with open(os.path.join(log_dir, f"daily_log_{DATE}.jsonl"), "a", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+        f.write(raw)
+
+
+def fresh_aggregators(idle=180):
+    aggregators = default_aggregators()
+    aggregators['sessions'] = SessionAggregator(idle)
+    return aggregators
+
+
+def snapshot(aggregators, lines):
+    state = {name: a.state() for name, a in aggregators.items()}
+    rendered = [line for key in ('sessions', 'counts', 'hourly', 'switches') for line in aggregators[key].render()]
+    return lines, state, rendered
+
+
+def run_checkpointed(log_dir, idle=180):
+    aggregators = fresh_aggregators(idle)
+    lines = list(stream_log_checkpointed(DATE, aggregators, log_dir=log_dir))
+    return snapshot(aggregators, lines)
+
+
+def run_full(log_dir, idle=180):
+    aggregators = fresh_aggregators(idle)
+    lines = list(stream_log(DATE, aggregators.values(), log_dir))
+    return snapshot(aggregators, lines)
+
+
+def spy_offsets(monkeypatch):
+    offsets = []
+    original = log_checkpoint.iter_log_entries_from
+
+    def spy(filename, offset=0):
+        offsets.append(offset)
+        return original(filename, offset)
+
+    monkeypatch.setattr(log_checkpoint, 'iter_log_entries_from', spy)
+    return offsets
+
+
+def test_resumes_from_offset_and_matches_full_scan(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    offsets = spy_offsets(monkeypatch)
+    append(log_dir, rows(0, 30))
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+    assert os.path.exists(checkpoint_path(DATE, log_dir))
+
+    append(log_dir, rows(30, 10, "Slack") + rows(40, 5))
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+    size_before = os.path.getsize(os.path.join(log_dir, f"daily_log_{DATE}.jsonl")) - sum(
+        len(json.dumps(e)) + 1 for e in rows(30, 10, "Slack") + rows(40, 5))
+    assert offsets == [0, size_before]
+
+    # Nothing new: everything comes from the checkpoint
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+
+
+def test_partial_last_line_is_left_for_next_run(tmp_path):
+    log_dir = str(tmp_path)
+    append(log_dir, rows(0, 3), raw='{"timestamp": "09:03:00", "app_na')
+    lines, _, _ = run_checkpointed(log_dir)
+    assert len(lines) == 3
+    append(log_dir, [], raw='me": "Code", "text_summary": "done"}\n')
+    lines, _, _ = run_checkpointed(log_dir)
+    assert len(lines) == 4 and lines[-1].endswith("done")
+
+
+def test_truncation_and_rotation_fall_back_to_full_scan(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    path = os.path.join(log_dir, f"daily_log_{DATE}.jsonl")
+    offsets = spy_offsets(monkeypatch)
+    append(log_dir, rows(0, 20))
+    run_checkpointed(log_dir)
+
+    # Truncated and rewritten shorter
+    os.truncate(path, 0)
+    append(log_dir, rows(0, 5, "Slack"))
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+    assert offsets[-1] == 0
+
+    # Replaced by a different file of the same length (rotation)
+    with open(path, "rb") as f:
+        data = f.read().replace(b"Slack", b"Skype")
+    os.remove(path)
+    with open(path, "wb") as f:
+        f.write(data)
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+    assert offsets[-1] == 0
+
+
+def test_rewritten_tail_is_detected(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    path = os.path.join(log_dir, f"daily_log_{DATE}.jsonl")
+    offsets = spy_offsets(monkeypatch)
+    append(log_dir, rows(0, 5))
+    run_checkpointed(log_dir)
+    with open(path, "r+b") as f:
+        data = f.read()
+        f.seek(0)
+        f.write(data.replace(b"Code text 4", b"Code text X"))
+    assert run_checkpointed(log_dir) == run_full(log_dir)
+    assert offsets[-1] == 0
+
+
+def test_different_aggregators_or_idle_threshold_rescan(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    offsets = spy_offsets(monkeypatch)
+    append(log_dir, rows(0, 10))
+    run_checkpointed(log_dir)
+
+    assert run_checkpointed(log_dir, idle=60) == run_full(log_dir, idle=60)
+    assert offsets[-1] == 0
+
+    # Budget mode adds the block aggregator and keeps no lines
+    blocks = BlockAggregator()
+    aggregators = dict(fresh_aggregators(60), blocks=blocks)
+    assert list(stream_log_checkpointed(DATE, aggregators, keep_lines=False, log_dir=log_dir))
+    assert offsets[-1] == 0
+    blocks_again = BlockAggregator()
+    aggregators = dict(fresh_aggregators(60), blocks=blocks_again)
+    assert list(stream_log_checkpointed(DATE, aggregators, keep_lines=False, log_dir=log_dir)) == []
+    assert [b.header() for b in blocks_again.blocks] == [b.header() for b in blocks.blocks]
+    assert blocks_again.blocks[0].candidates == blocks.blocks[0].candidates
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+from src import log_segment
+from src.log_segment import write_segment_file, iter_segment_entries, convert_log, SEGMENT_SUFFIX
+from src.log_analyzer import stream_log, find_log, default_aggregators
+from src.time_index import iter_window_entries
+
+DATE = "2025-01-06"
+
+ROWS = [
+    {'timestamp': "09:00:00", 'app_name': "Code", 'text_summary': "def main():", 'text_ref': "ab" * 20},
+    {'timestamp': "09:01:00", 'app_name': "Code", 'text_summary': "def main():", 'text_ref': "ab" * 20, 'unchanged': True},
+    {'timestamp': "09:02:00", 'app_name': "Code", 'type': "continued", 'end': "09:30:00", 'count': 28},
+    {'timestamp': "09:31:00", 'app_name': "Slack", 'text_summary': "定例ミーティングの議事録を共有しました"},
+    {'timestamp': "09:32:00", 'app_name': "Slack", 'text_summary': "", 'interval': 120.5},
+    {'timestamp': "bad", 'app_name': "Odd", 'text_ref': "not-a-hash", 'unchanged': False, 'count': "3"},
+    {'timestamp': "23:59:59", 'app_name': "Terminal", 'text_summary': "exit\nlogout"},
+]
+
+
+def test_rows_round_trip_across_segments(tmp_path):
+    path = str(tmp_path / "day.seg")
+    write_segment_file(path, ROWS, rows_per_segment=3)
+    assert list(iter_segment_entries(path)) == ROWS
+
+
+def test_window_skips_segments_outside_it(tmp_path, monkeypatch):
+    path = str(tmp_path / "day.seg")
+    rows = [{'timestamp': f"{h:02d}:00:00", 'app_name': "Code", 'text_summary': f"hour {h}"} for h in range(8, 20)]
+    write_segment_file(path, rows, rows_per_segment=2)
+    decoded = []
+    original = log_segment.decode_segment
+    monkeypatch.setattr(log_segment, 'decode_segment', lambda p: decoded.append(1) or original(p))
+
+    window = list(iter_segment_entries(path, since="12:00:00", until="14:00:00"))
+    assert [r['timestamp'] for r in window] == ["12:00:00", "13:00:00"]
+    assert len(decoded) == 1
+
+
+def write_jsonl(log_dir, rows):
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"daily_log_{DATE}.jsonl"), "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.write("not json\n")
+        f.write(json.dumps({'app_name': "NoTimestamp"}) + "\n")
+
+
+def report(log_dir):
+    aggregators = default_aggregators()
+    lines = list(stream_log(DATE, aggregators.values(), log_dir))
+    return lines, [aggregators[k].render() for k in ('counts', 'hourly', 'switches')]
+
+
+def test_converted_day_reads_like_jsonl(tmp_path):
+    log_dir = str(tmp_path)
+    write_jsonl(log_dir, [r for r in ROWS if r['app_name'] != "Odd"])
+    expected = report(log_dir)
+
+    before, after = convert_log(DATE, log_dir)
+    assert after < before
+    assert find_log(DATE, log_dir).endswith(SEGMENT_SUFFIX)
+    assert not os.path.exists(os.path.join(log_dir, f"daily_log_{DATE}.jsonl"))
+    assert report(log_dir) == expected
+
+    window = list(iter_window_entries(DATE, since="09:10:00", until="09:32:00", log_dir=log_dir))
+    assert [r['app_name'] for r in window] == ["Code", "Slack"]
+
+
+def test_keep_jsonl_prefers_jsonl(tmp_path):
+    log_dir = str(tmp_path)
+    write_jsonl(log_dir, ROWS)
+    convert_log(DATE, log_dir, keep_jsonl=True)
+    assert find_log(DATE, log_dir).endswith(".jsonl")
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "x.seg"
+    path.write_bytes(b"hello")
+    with pytest.raises(ValueError):
+        list(iter_segment_entries(str(path)))
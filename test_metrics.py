@@ -0,0 +1,74 @@
+import json
+
+from src.metrics import Metrics, NULL_METRICS, Histogram, format_prometheus
+
+
+def test_histogram_percentiles_use_the_rolling_window():
+    h = Histogram(window=100)
+    for i in range(1, 201):
+        h.observe(i / 1000)
+    summary = h.summary()
+    # Only the last 100 samples (0.101 .. 0.200) count for percentiles
+    assert summary['p50'] == 0.151
+    assert summary['p99'] == 0.2
+    assert summary['max'] == 0.2
+    assert summary['count'] == 200
+    assert abs(summary['sum'] - sum(i / 1000 for i in range(1, 201))) < 1e-9
+
+
+def test_timed_records_duration_and_passes_through_results():
+    metrics = Metrics()
+    double = metrics.timed('ocr', lambda x: x * 2)
+    assert double(21) == 42
+
+    def fail():
+        raise ValueError("boom")
+    failing = metrics.timed('ocr', fail)
+    try:
+        failing()
+    except ValueError:
+        pass
+    assert metrics.snapshot()['stages']['ocr']['count'] == 2
+
+
+def test_snapshot_file_is_written_periodically(tmp_path):
+    path = tmp_path / "metrics.json"
+    metrics = Metrics(str(path), interval=0, gauges_fn=lambda: {'ocr_backlog': 3})
+    metrics.incr('bytes_written', 120)
+    metrics.incr('empty_frames')
+    metrics.observe('write', 0.002)
+
+    snapshot = json.loads(path.read_text(encoding='utf-8'))
+    assert snapshot['counters'] == {'bytes_written': 120, 'empty_frames': 1}
+    assert snapshot['stages']['write']['p95'] == 0.002
+    assert snapshot['gauges'] == {'ocr_backlog': 3}
+
+
+def test_snapshot_waits_for_the_interval(tmp_path):
+    path = tmp_path / "metrics.json"
+    metrics = Metrics(str(path), interval=3600)
+    metrics.incr('log_rows')
+    assert not path.exists()
+    metrics.write()
+    assert json.loads(path.read_text(encoding='utf-8'))['counters'] == {'log_rows': 1}
+
+
+def test_prometheus_format(tmp_path):
+    path = tmp_path / "metrics.prom"
+    metrics = Metrics(str(path), interval=3600)
+    metrics.observe('ocr', 0.5)
+    metrics.incr('skipped_frames', 4)
+    metrics.write()
+    text = path.read_text(encoding='utf-8')
+    assert 'wc_stage_seconds{stage="ocr",quantile="0.95"} 0.500000' in text
+    assert 'wc_stage_seconds_count{stage="ocr"} 1' in text
+    assert 'wc_skipped_frames_total 4' in text
+    assert text.startswith(format_prometheus(metrics.snapshot()).split("wc_uptime_seconds ")[0])
+
+
+def test_null_metrics_adds_no_wrapper():
+    def ocr(frame):
+        return "text"
+    assert NULL_METRICS.timed('ocr', ocr) is ocr
+    NULL_METRICS.incr('bytes_written', 10)
+    assert NULL_METRICS.snapshot() == {'stages': {}, 'counters': {}}
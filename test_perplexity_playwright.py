@@ -0,0 +1,140 @@
+import pytest
+
+from src.perplexity_playwright import submit_with_playwright, ask, paste_parts, PASTE_JS, PART_SEPARATOR, DEFAULT_SELECTORS
+
+# Simulates Perplexity: the answer streams in chunks while a Stop button is
+# shown, and the Copy button only appears (enabled) once streaming ends.
+STUB_PAGE = """<!doctype html>
+<html><body>
+<textarea id="ask-input"></textarea>
+<button aria-label="Submit" onclick="answer()">Submit</button>
+<div id="thread"></div>
+<script>
+function answer() {
+  const prompt = document.getElementById('ask-input').value;
+  const thread = document.getElementById('thread');
+  const stop = document.createElement('button');
+  stop.setAttribute('aria-label', 'Stop');
+  stop.textContent = 'Stop';
+  thread.appendChild(stop);
+  const prose = document.createElement('div');
+  prose.className = 'prose';
+  thread.appendChild(prose);
+  const chunks = ['はい、承知しました。\\n', '# 作業日報 25-12-24\\n', '## 1. 本日の業務概要\\n',
+                  '- 受信文字数: ' + prompt.length];
+  let i = 0;
+  const timer = setInterval(() => {
+    prose.textContent += chunks[i++];
+    if (i === chunks.length) {
+      clearInterval(timer);
+      stop.remove();
+      const copy = document.createElement('button');
+      copy.setAttribute('aria-label', 'Copy');
+      copy.textContent = 'Copy';
+      thread.appendChild(copy);
+    }
+  }, 150);
+}
+</script>
+</body></html>
+"""
+
+
+def test_waits_for_streaming_to_finish_and_reads_answer_from_dom(tmp_path):
+    pytest.importorskip("playwright.sync_api")
+    page = tmp_path / "stub.html"
+    page.write_text(STUB_PAGE, encoding="utf-8")
+    settings = {'user_data_dir': str(tmp_path / "profile"), 'headless': True, 'answer_timeout': 10}
+
+    response = submit_with_playwright({"a": "12345", "b": "67890"}, url=page.as_uri(),
+                                      selectors=dict(DEFAULT_SELECTORS), settings=settings)
+
+    # Preamble before the title is stripped, and the last chunk arrived before reading
+    assert response.startswith("# 作業日報 25-12-24")
+    # The parts are pasted one after the other, as the pyautogui submitter does
+    assert response.endswith("受信文字数: 10")
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    @property
+    def first(self):
+        return self
+
+    @property
+    def last(self):
+        return self
+
+    def wait_for(self):
+        self.page.actions.append(("wait_for", self.selector))
+
+    def click(self):
+        self.page.actions.append(("click", self.selector))
+
+    def count(self):
+        return 0
+
+    def evaluate(self, script, text):
+        assert script == PASTE_JS
+        self.page.actions.append(("paste", text))
+        # Like Perplexity, long pastes become attachments; short ones are left to the browser
+        return len(text) > self.page.attach_over
+
+    def inner_text(self):
+        return "はい。\n# 作業日報 25-12-24\n本文"
+
+
+class FakeKeyboard:
+    def __init__(self, page):
+        self.page = page
+
+    def insert_text(self, text):
+        self.page.actions.append(("type", text))
+
+
+class FakePage:
+    """Records what ask() does to the page instead of driving a browser."""
+
+    def __init__(self, attach_over=10):
+        self.attach_over = attach_over
+        self.actions = []
+        self.keyboard = FakeKeyboard(self)
+
+    def goto(self, url):
+        self.actions.append(("goto", url))
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+    def wait_for_function(self, script, arg, timeout, polling):
+        self.actions.append(("wait_for_answer", timeout))
+
+
+def test_each_part_is_pasted_separately_without_a_browser():
+    page = FakePage(attach_over=10)
+    selectors = dict(DEFAULT_SELECTORS, deep_research='button[value="research"]')
+    parts = {"指示とカレンダー": "短い指示", "作業ログデータ (統計含む)": "09:00:00 | Code | " + "x" * 100}
+
+    answer = ask(page, parts, 'deep', "https://example.invalid/", selectors, answer_timeout=5)
+
+    assert answer.endswith("本文")
+    assert page.actions == [
+        ("goto", "https://example.invalid/"),
+        ("click", 'button[value="research"]'),
+        ("wait_for", DEFAULT_SELECTORS['input']),
+        ("paste", "短い指示"),
+        ("type", "短い指示"),          # not taken over by the page: inserted as a paste would
+        ("paste", parts["作業ログデータ (統計含む)"]),  # taken over: becomes an attachment
+        ("click", DEFAULT_SELECTORS['submit']),
+        ("wait_for_answer", 5000),
+    ]
+
+
+def test_parts_inserted_as_text_are_separated():
+    page = FakePage(attach_over=1000)
+    paste_parts(page, page.locator("textarea").first, {"指示": "日報を作成してください。", "ログ": "09:00:00 | Code | main.py"})
+    typed = [text for action, text in page.actions if action == "type"]
+    assert "".join(typed) == "日報を作成してください。" + PART_SEPARATOR + "09:00:00 | Code | main.py"
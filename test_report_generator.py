@@ -0,0 +1,137 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("googleapiclient")
+
+from src import report_generator
+from src.blob_store import BlobStore
+from src.log_analyzer import default_aggregators
+from src.sessions import SessionAggregator
+
+DATE = "2025-12-24"
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Runs the test in tmp_path, where report_generator reads logs/."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(report_generator, "_blob_stores", {})
+    (tmp_path / "logs").mkdir()
+    return tmp_path / "logs"
+
+
+def write_log(log_dir, date_str, rows):
+    with open(log_dir / f"daily_log_{date_str}.jsonl", "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def summary_row(timestamp, app_name, text, log_dir):
+    ref = BlobStore(str(log_dir), DATE).put(text)
+    return {"timestamp": timestamp, "app_name": app_name, "text_summary": text.replace("\n", " ")[:500], "text_ref": ref}
+
+
+def test_full_text_replaces_only_cut_summaries(log_dir):
+    long_text = "\n".join(f"line {i:03d} " + "x" * 40 for i in range(30))
+    rows = [
+        summary_row("09:00:00", "Code", long_text, log_dir),
+        {"timestamp": "09:01:00", "app_name": "Code", "type": "continued", "end": "09:05:00", "count": 5},
+        {"timestamp": "09:06:00", "app_name": "Slack", "text_summary": "short", "text_ref": "0" * 40},
+    ]
+    format_line = report_generator.full_text_line(DATE)
+
+    assert format_line(rows[0]) == f"09:00:00 | Code | {long_text.replace(chr(10), ' ')}"
+    assert format_line(rows[1]) == "09:01:00-09:05:00 | Code | （同様の画面が継続: 5回）"
+    # Not cut, so the store is not consulted (the ref is unknown anyway)
+    assert format_line(rows[2]) == "09:06:00 | Slack | short"
+
+
+def test_full_text_falls_back_to_the_summary_without_a_blob(log_dir):
+    row = {"timestamp": "09:00:00", "app_name": "Code", "text_summary": "y" * 500, "text_ref": "0" * 40}
+    assert report_generator.full_text_line(DATE)(row) == "09:00:00 | Code | " + "y" * 500
+
+
+def test_log_section_shows_full_text_on_request(log_dir):
+    write_log(log_dir, DATE, [summary_row("09:00:00", "Code", "z" * 800, log_dir),
+                              summary_row("09:01:00", "Slack", "standup", log_dir)])
+
+    def section(**options):
+        aggregators = default_aggregators()
+        aggregators['sessions'] = SessionAggregator()
+        return list(report_generator.iter_log_section(DATE, aggregators, live=False, **options))[:2]
+
+    assert section() == ["09:00:00 | Code | " + "z" * 500, "09:01:00 | Slack | standup"]
+    assert section(full_text=True) == ["09:00:00 | Code | " + "z" * 800, "09:01:00 | Slack | standup"]
+    assert section(full_text=True, since="09:00:30") == ["（09:00〜 の記録のみ）", "09:01:00 | Slack | standup"]
+
+
+def test_budgeted_log_section_fits_the_budget_with_its_notes(log_dir):
+    rows = [summary_row(f"{9 + i // 60:02d}:{i % 60:02d}:00", ["Code", "Slack", "Chrome"][i // 7 % 3],
+                        f"screen {i} " + "words " * 60, log_dir) for i in range(120)]
+    write_log(log_dir, DATE, rows)
+
+    for budget, options in ((1500, {}), (800, {}), (1500, {"since": "09:30:00", "until": "10:30:00"})):
+        aggregators = default_aggregators()
+        aggregators['sessions'] = SessionAggregator()
+        section = report_generator.iter_log_section(DATE, aggregators, budget=budget, live=False, **options)
+        log_part = []
+        for line in section:
+            if line.startswith("\n###"):  # the statistics tables follow the log part
+                break
+            log_part.append(line)
+        assert budget // 2 < len("\n".join(log_part)) <= budget
+
+
+def test_calendar_that_hangs_is_reported_as_a_timeout(log_dir, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(report_generator, "get_todays_event_items", lambda day: release.wait(10) and [])
+    started = time.monotonic()
+    try:
+        instructions, logs = report_generator.generate_prompt_parts(DATE, calendar_timeout=0.2, live=False)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 5
+    assert "予定取得中にタイムアウト: 0.2秒以内に取得できませんでした" in instructions
+    assert logs == "（ログファイルが見つかりません。）"
+
+
+def test_network_timeout_inside_the_calendar_is_an_error_not_the_deadline(log_dir, monkeypatch):
+    def fetch(day):
+        raise socket.timeout("timed out")
+
+    monkeypatch.setattr(report_generator, "get_todays_event_items", fetch)
+    instructions, _ = report_generator.generate_prompt_parts(DATE, calendar_timeout=5, live=False)
+
+    assert "カレンダー取得エラー: timed out" in instructions
+    assert "タイムアウト:" not in instructions
+
+
+def test_period_report_waits_for_a_hung_calendar_once(log_dir, monkeypatch):
+    for day in range(22, 29):
+        write_log(log_dir, f"2025-12-{day}", [{"timestamp": "09:00:00", "app_name": "Code", "text_summary": "x"}])
+    release = threading.Event()
+    calls = []
+
+    def fetch(day):
+        calls.append(day)
+        release.wait(10)
+        return []
+
+    monkeypatch.setattr(report_generator, "get_todays_event_items", fetch)
+    started = time.monotonic()
+    try:
+        instructions, data, first, last = report_generator.generate_period_prompt_parts(
+            'week', DATE, calendar_timeout=0.3)
+    finally:
+        release.set()
+
+    # Seven days, but the 0.3s deadline is spent once for the whole week
+    assert time.monotonic() - started < 1.5
+    assert len(calls) == 1
+    assert (first, last) == ("2025-12-22", "2025-12-28")
+    assert "記録のある日: 7日" in instructions
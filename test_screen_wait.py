@@ -0,0 +1,129 @@
+from src.screen_wait import ScreenWaiter, TimingHistory, region_around, MIN_HISTORY
+
+
+class FakeScreen:
+    """Replays a region's appearance over a fake clock: [(from_second, signature), ...]."""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def grab(self, region):
+        current = self.frames[0][1]
+        for at, signature in self.frames:
+            if self.now >= at:
+                current = signature
+        return current
+
+
+def make_waiter(screen, tmp_path):
+    history = TimingHistory(str(tmp_path / "timings.json"))
+    return ScreenWaiter(history, grab=screen.grab, signature=lambda image: image,
+                        poll_interval=0.25, clock=screen.clock, sleep=screen.sleep)
+
+
+def test_returns_once_region_is_stable(tmp_path):
+    screen = FakeScreen([(0, b"\x00" * 4), (1.0, b"\x80" * 4), (2.0, b"\xff" * 4)])
+    elapsed, ready = make_waiter(screen, tmp_path).wait('load', (0, 0, 4, 4), 45, stable_for=1.0)
+    assert ready
+    assert 3.0 <= elapsed < 3.5
+
+
+def test_require_change_ignores_initial_stillness(tmp_path):
+    # The answer area stays blank for 10 s, then streams until 14 s
+    frames = [(0, b"\x00" * 4)] + [(10 + i, bytes([40 * (i + 1)]) * 4) for i in range(5)]
+    screen = FakeScreen(frames)
+    elapsed, ready = make_waiter(screen, tmp_path).wait(
+        'answer', (0, 0, 4, 4), 60, stable_for=3.0, require_change=True)
+    assert ready
+    assert 17.0 <= elapsed < 17.5
+
+
+def test_ready_image_match(tmp_path):
+    screen = FakeScreen([(0, b"\x00" * 4), (5.0, b"\xf0" * 4)])
+    elapsed, ready = make_waiter(screen, tmp_path).wait(
+        'answer', (0, 0, 4, 4), 60, ready=b"\xf2" * 4, stable_for=30)
+    assert ready
+    assert 5.0 <= elapsed < 5.5
+
+
+def test_times_out_at_configured_maximum(tmp_path):
+    screen = FakeScreen([(i * 0.25, bytes([(i * 37) % 256]) * 4) for i in range(200)])
+    waiter = make_waiter(screen, tmp_path)
+    elapsed, ready = waiter.wait('answer', (0, 0, 4, 4), 10, stable_for=1.0)
+    assert not ready
+    assert 10.0 <= elapsed < 10.5
+    assert waiter.history.phases['answer'][-1]['timed_out']
+
+
+def test_limit_is_tuned_from_history_and_persisted(tmp_path):
+    path = str(tmp_path / "timings.json")
+    history = TimingHistory(path)
+    assert history.limit('answer', 45) == 45
+    for seconds in [8, 9, 10, 9, 8, 10]:
+        history.record('answer', seconds, False)
+    history.save()
+
+    reloaded = TimingHistory(path)
+    assert len(reloaded.phases['answer']) >= MIN_HISTORY
+    assert reloaded.limit('answer', 45) == 15.0
+    assert reloaded.limit('answer', 12) == 12  # never above the configured value
+
+    # A timeout means the tuned limit was too tight: use the configured one next time
+    reloaded.record('answer', 15.0, True)
+    assert reloaded.limit('answer', 45) == 45
+
+
+def test_region_around_clamps_to_screen():
+    assert region_around((100, 200), 80) == (60, 160, 80, 80)
+    assert region_around((10, 10), 80) == (0, 0, 80, 80)
+
+
+def test_phases_are_tuned_independently(tmp_path):
+    history = TimingHistory(str(tmp_path / "timings.json"))
+    for seconds in [8, 9, 10, 9, 8, 10]:
+        history.record('answer_normal', seconds, False)
+    # Quick normal answers must not cap a Deep Research answer
+    assert history.limit('answer_normal', 600) == 15.0
+    assert history.limit('answer_deep', 600) == 600
+
+
+def test_untuned_wait_keeps_the_configured_maximum(tmp_path):
+    screen = FakeScreen([(0, b"\x00" * 4), (30.0, b"\xf0" * 4)])
+    waiter = make_waiter(screen, tmp_path)
+    for seconds in [8, 9, 10, 9, 8, 10]:
+        waiter.history.record('answer_deep', seconds, False)
+
+    # Tuned, the wait would give up at 15 s, before the answer is done at 30 s
+    elapsed, ready = waiter.wait('answer_deep', (0, 0, 4, 4), 60, ready=b"\xf2" * 4, tune=False)
+    assert ready
+    assert 30.0 <= elapsed < 30.5
+
+
+def test_static_window_before_launch_is_not_taken_for_the_page(tmp_path):
+    # A terminal stays under the input field: it is stable, but nothing was launched over it
+    screen = FakeScreen([(0, b"\x10" * 4)])
+    waiter = make_waiter(screen, tmp_path)
+    before = waiter.snapshot((0, 0, 4, 4))
+    elapsed, ready = waiter.wait('browser_load', (0, 0, 4, 4), 10, stable_for=1.5, min_wait=1.0,
+                                 require_change=True, initial=before)
+    assert not ready
+    assert 10.0 <= elapsed < 10.5
+    assert 'browser_load' not in waiter.history.phases  # no sample from a wait that saw nothing
+
+
+def test_change_since_the_snapshot_counts_from_the_start(tmp_path):
+    # The page was already drawn when the wait started
+    screen = FakeScreen([(0, b"\xf0" * 4)])
+    waiter = make_waiter(screen, tmp_path)
+    elapsed, ready = waiter.wait('browser_load', (0, 0, 4, 4), 10, stable_for=1.5, min_wait=1.0,
+                                 require_change=True, initial=b"\x10" * 4)
+    assert ready
+    assert 1.5 <= elapsed < 2.0
+    assert len(waiter.history.phases['browser_load']) == 1
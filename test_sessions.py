@@ -0,0 +1,61 @@
+import datetime
+
+from src.sessions import SessionAggregator, overlap_table
+
+
+def entry(ts, app, **extra):
+    return dict(date="2025-12-24", timestamp=ts, app_name=app, **extra)
+
+
+def at(hms):
+    return datetime.datetime.strptime(f"2025-12-24 {hms}", "%Y-%m-%d %H:%M:%S")
+
+
+def test_sessions_cap_idle_gaps():
+    agg = SessionAggregator(idle_threshold=180)
+    for e in [
+        entry("09:00:00", "Code"),
+        entry("09:01:00", "Code", type="continued", end="09:10:00", count=10),
+        entry("09:11:00", "Slack"),
+        # Away for an hour: only the idle threshold counts
+        entry("10:11:00", "Code"),
+    ]:
+        agg.add(e)
+    sessions = agg.finish()
+
+    assert [(s.app_name, s.start, s.end) for s in sessions] == [
+        ("Code", at("09:00:00"), at("09:11:00")),
+        ("Slack", at("09:11:00"), at("09:14:00")),
+        ("Code", at("10:11:00"), at("10:12:00")),
+    ]
+    assert agg.durations()["Code"] == datetime.timedelta(minutes=12)
+
+
+def test_overlap_with_calendar_events():
+    agg = SessionAggregator()
+    for ts, app in [("10:00:00", "Zoom"), ("10:20:00", "Slack"), ("10:22:00", "Zoom")]:
+        agg.add(entry(ts, app))
+    meeting = (at("10:00:00"), at("10:30:00"), "定例")
+
+    [(event, usage)] = overlap_table(agg.finish(), [meeting])
+
+    assert event == meeting
+    # The 20-minute gap after the first capture only counts up to the idle threshold
+    assert usage == {"Zoom": datetime.timedelta(minutes=4), "Slack": datetime.timedelta(minutes=2)}
+
+
+def test_adaptive_interval_gaps_are_not_idle():
+    agg = SessionAggregator(idle_threshold=180)
+    for e in [
+        entry("09:00:00", "Code", interval=300),
+        entry("09:05:02", "Code", interval=300),
+        # Planned 300s, but the user came back an hour later
+        entry("10:10:00", "Slack", interval=10),
+    ]:
+        agg.add(e)
+    sessions = agg.finish()
+
+    assert [(s.app_name, s.start, s.end) for s in sessions] == [
+        ("Code", at("09:00:00"), at("09:11:17")),
+        ("Slack", at("10:10:00"), at("10:10:10")),
+    ]
@@ -0,0 +1,92 @@
+import datetime
+import json
+import os
+
+from src import summary_sidecar
+from src.summary_sidecar import load_day_summary, summary_path, period_dates, render_period
+
+
+def write_log(log_dir, date_str, rows):
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"daily_log_{date_str}.jsonl"), "w", encoding="utf-8") as f:
+        for timestamp, app, text in rows:
+            f.write(json.dumps({'timestamp': timestamp, 'app_name': app, 'text_summary': text}, ensure_ascii=False) + "\n")
+
+
+def day_rows():
+    rows = [(f"09:{m:02d}:00", "Code", f"def handler_{m % 3}(): pass") for m in range(30, 60)]
+    rows += [(f"10:{m:02d}:00", "Zoom", "定例ミーティング") for m in range(0, 30)]
+    return rows
+
+
+def test_sidecar_is_built_once_and_reused(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    write_log(log_dir, "2025-01-06", day_rows())
+    calls = []
+
+    def events_fn(date_str):
+        calls.append(date_str)
+        return [(datetime.datetime(2025, 1, 6, 10, 0), datetime.datetime(2025, 1, 6, 10, 30), "定例")]
+
+    summary = load_day_summary("2025-01-06", events_fn, log_dir=log_dir)
+    assert os.path.exists(summary_path("2025-01-06", log_dir))
+    assert summary['capture_count'] == 60
+    assert summary['app_seconds'] == {'Code': 1800.0, 'Zoom': 1800.0}
+    assert summary['hourly'] == {'09': 30, '10': 30}
+    assert summary['switches'] == 1
+    assert len(summary['snippets']['Code']) == 3
+    assert summary['events'][0]['apps'] == {'Zoom': 1800.0}
+
+    # Second load comes from the sidecar without reading the log or the calendar
+    monkeypatch.setattr(summary_sidecar, 'stream_log', None)
+    assert load_day_summary("2025-01-06", events_fn, log_dir=log_dir) == summary
+    assert calls == ["2025-01-06"]
+
+
+def test_sidecar_is_rebuilt_when_log_changes(tmp_path):
+    log_dir = str(tmp_path)
+    write_log(log_dir, "2025-01-06", day_rows())
+    assert load_day_summary("2025-01-06", log_dir=log_dir)['capture_count'] == 60
+
+    with open(os.path.join(log_dir, "daily_log_2025-01-06.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps({'timestamp': "11:00:00", 'app_name': "Slack", 'text_summary': "hi"}) + "\n")
+    summary = load_day_summary("2025-01-06", log_dir=log_dir)
+    assert summary['capture_count'] == 61
+    assert 'Slack' in summary['app_seconds']
+
+    # A different idle threshold also invalidates the sidecar
+    assert load_day_summary("2025-01-06", idle_threshold=60, log_dir=log_dir)['idle_threshold'] == 60
+
+
+def test_calendar_failure_is_retried_on_next_load(tmp_path):
+    log_dir = str(tmp_path)
+    write_log(log_dir, "2025-01-06", day_rows())
+
+    def failing(date_str):
+        raise TimeoutError()
+
+    assert load_day_summary("2025-01-06", failing, log_dir=log_dir)['events'] is None
+    assert load_day_summary("2025-01-06", lambda d: [], log_dir=log_dir)['events'] == []
+
+
+def test_missing_log_has_no_summary(tmp_path):
+    assert load_day_summary("2025-01-07", log_dir=str(tmp_path)) is None
+    assert not os.path.exists(summary_path("2025-01-07", str(tmp_path)))
+
+
+def test_period_dates():
+    week = period_dates('week', datetime.date(2025, 1, 8))
+    assert week[0] == "2025-01-06" and week[-1] == "2025-01-12" and len(week) == 7
+    month = period_dates('month', datetime.date(2024, 2, 10))
+    assert month[0] == "2024-02-01" and month[-1] == "2024-02-29"
+
+
+def test_render_period_totals_across_days(tmp_path):
+    log_dir = str(tmp_path)
+    write_log(log_dir, "2025-01-06", day_rows())
+    write_log(log_dir, "2025-01-07", day_rows())
+    summaries = [load_day_summary(d, log_dir=log_dir) for d in ("2025-01-06", "2025-01-07")]
+    text = "\n".join(render_period(summaries, 7))
+    assert "- 記録のある日: 2日 / 7日" in text
+    assert "| Code | 1時間00分 | 0時間30分 | 2日 |" in text
+    assert "| 09:00 | 60回 |" in text
@@ -0,0 +1,68 @@
+from src.tile_ocr import TileOCR
+
+COLS, ROWS, SAMPLE = 4, 2, 32
+WIDTH, HEIGHT = COLS * SAMPLE, ROWS * SAMPLE
+
+
+def make_frame(dirty_tiles=(), value=200):
+    """A flat gray thumbnail with the given tiles painted a different shade."""
+    gray = bytearray([0] * (WIDTH * HEIGHT))
+    for index in dirty_tiles:
+        r, c = divmod(index, COLS)
+        for y in range(r * SAMPLE, (r + 1) * SAMPLE):
+            for x in range(c * SAMPLE, (c + 1) * SAMPLE):
+                gray[y * WIDTH + x] = value
+    return bytes(gray)
+
+
+class FakeRecognizer:
+    """Returns one line per tile inside each requested region."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frame, rects):
+        self.calls.append(rects)
+        lines = []
+        for x, y, w, h in rects:
+            for r in range(round(y * ROWS), round((y + h) * ROWS)):
+                for c in range(round(x * COLS), round((x + w) * COLS)):
+                    rect = (c / COLS, r / ROWS, 1 / COLS, 1 / ROWS)
+                    lines.append((f"tile{r * COLS + c}:{frame[(r * SAMPLE) * WIDTH + c * SAMPLE]}", rect))
+        return lines
+
+
+def test_only_rows_with_changed_tiles_are_recognized():
+    recognizer = FakeRecognizer()
+    ocr = TileOCR(lambda frame, w, h: frame, recognizer, cols=COLS, rows=ROWS)
+
+    first = ocr.recognize(make_frame())
+    assert recognizer.calls == [[(0.0, 0.0, 1.0, 1.0)]]
+    assert first.splitlines() == [f"tile{i}:0" for i in range(8)]
+
+    second = ocr.recognize(make_frame(dirty_tiles=[5]))
+    assert recognizer.calls[-1] == [(0.0, 0.5, 1.0, 0.5)]
+    assert second.splitlines()[5] == "tile5:200"
+    assert second.splitlines()[:5] == first.splitlines()[:5]
+
+    # Going back to the first screen is served entirely from the cache
+    calls = len(recognizer.calls)
+    assert ocr.recognize(make_frame()) == first
+    assert len(recognizer.calls) == calls
+
+
+def test_line_crossing_tile_boundaries_is_recognized_whole():
+    def recognize_lines(frame, rects):
+        """One text line per tile row, reading every tile of the row the region covers."""
+        lines = []
+        for x, y, w, h in rects:
+            for r in range(round(y * ROWS), round((y + h) * ROWS)):
+                cols = range(round(x * COLS), round((x + w) * COLS))
+                text = " ".join(str(frame[(r * SAMPLE) * WIDTH + c * SAMPLE]) for c in cols)
+                lines.append((text, (x, r / ROWS, w, 1 / ROWS)))
+        return lines
+
+    ocr = TileOCR(lambda frame, w, h: frame, recognize_lines, cols=COLS, rows=ROWS)
+    ocr.recognize(make_frame())
+    # Tiles 4 and 6 change, 5 and 7 do not: the row's line is still read as one
+    assert ocr.recognize(make_frame(dirty_tiles=[4, 6])).splitlines() == ["0 0 0 0", "200 0 200 0"]
@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from src import time_index
+from src.log_analyzer import stream_log
+from src.time_index import iter_window_entries, stream_log_window, update_index, normalize_time, index_path
+
+DATE = "2025-01-06"
+
+
+def write_day(log_dir, n=600):
+    """One row per minute from 08:00, with a continued row every 50 rows."""
+    os.makedirs(log_dir, exist_ok=True)
+    with open(os.path.join(log_dir, f"daily_log_{DATE}.jsonl"), "a", encoding="utf-8") as f:
+        for i in range(n):
+            t = 8 * 60 + i
+            row = {'timestamp': f"{t // 60:02d}:{t % 60:02d}:00", 'app_name': f"App{i % 3}", 'text_summary': f"row {i}"}
+            if i % 50 == 49:
+                end = t + 20
+                row = {'timestamp': row['timestamp'], 'app_name': "Zoom", 'type': "continued",
+                       'end': f"{end // 60:02d}:{end % 60:02d}:00", 'count': 20}
+            f.write(json.dumps(row) + "\n")
+
+
+def window_by_scan(log_dir, since, until):
+    lines = list(stream_log(DATE, log_dir=log_dir))
+    entries = []
+    with open(os.path.join(log_dir, f"daily_log_{DATE}.jsonl"), encoding="utf-8") as f:
+        for line, raw in zip(lines, f):
+            e = json.loads(raw)
+            if e['timestamp'] < until and e.get('end', e['timestamp']) >= since:
+                entries.append(line)
+    return entries
+
+
+def test_window_matches_full_scan_and_reads_from_a_mark(tmp_path, monkeypatch):
+    log_dir = str(tmp_path)
+    write_day(log_dir)
+    index = update_index(DATE, log_dir)
+    assert len(index['marks']) == 600 // time_index.INDEX_EVERY
+
+    offsets = []
+    original = time_index.iter_log_entries_from
+
+    def spy(filename, offset=0):
+        offsets.append(offset)
+        return original(filename, offset)
+
+    monkeypatch.setattr(time_index, 'iter_log_entries_from', spy)
+    since, until = "14:00:00", "15:00:00"
+    assert list(stream_log_window(DATE, since=since, until=until, log_dir=log_dir)) == window_by_scan(log_dir, since, until)
+    assert offsets[-1] > 0
+
+    # A continued row that started before the window but runs into it is included
+    entries = list(iter_window_entries(DATE, since="08:50:00", until="08:55:00", log_dir=log_dir))
+    assert entries[0]['type'] == "continued" and entries[0]['timestamp'] == "08:49:00"
+
+
+def test_open_ended_windows(tmp_path):
+    log_dir = str(tmp_path)
+    write_day(log_dir, 100)
+    assert len(list(iter_window_entries(DATE, until="08:10:00", log_dir=log_dir))) == 10
+    assert len(list(iter_window_entries(DATE, since="09:30:00", log_dir=log_dir))) == 10
+    assert len(list(iter_window_entries(DATE, log_dir=log_dir))) == 100
+
+
+def test_index_is_updated_incrementally_and_rebuilt_after_rewrite(tmp_path):
+    log_dir = str(tmp_path)
+    write_day(log_dir, 100)
+    first = update_index(DATE, log_dir)
+    write_day(log_dir, 100)  # appends a second copy of the morning
+    second = update_index(DATE, log_dir)
+    assert second['indexed_to'] > first['indexed_to']
+    assert second['marks'][:len(first['marks'])] == first['marks']
+    assert len(second['marks']) == 200 // time_index.INDEX_EVERY
+
+    path = os.path.join(log_dir, f"daily_log_{DATE}.jsonl")
+    os.remove(path)
+    write_day(log_dir, 10)
+    assert update_index(DATE, log_dir)['marks'] == []
+    assert os.path.exists(index_path(DATE, log_dir))
+
+
+def test_normalize_time():
+    assert normalize_time("9:05") == "09:05:00"
+    assert normalize_time("13:00:30") == "13:00:30"
+    assert normalize_time("24:00") == "24:00:00"
+    for bad in ("1300", "25:00", "12:60", "ab:cd"):
+        with pytest.raises(ValueError):
+            normalize_time(bad)